@@ -0,0 +1,81 @@
+"""
+Накладные расходы разрешения обработчика через DI-контейнер на одну отправку запроса:
+решение графа на каждое разрешение против графа, решенного один раз.
+
+Запуск::
+
+    python benchmarks/di_resolve.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+for name, value in {
+    "MYSQL_HOSTNAME": "localhost",
+    "MYSQL_PORT": "3306",
+    "MYSQL_DATABASE": "scada",
+    "MYSQL_USER": "scada",
+    "MYSQL_PASSWORD": "scada",
+    "AMQP_HOSTNAME": "localhost",
+    "AMQP_USER": "guest",
+    "AMQP_PASSWORD": "guest",
+    "AMQP_VHOST": "scada",
+    "AMQP_EVENTS_EXCHANGE": "scada-events",
+    "AMQP_EVENTS_ROUTEING_KEY": "scada-events",
+    "AMQP_EVENTS_QUEUE": "scada-events",
+    "REDIS_HOSTNAME": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DATABASE": "0",
+    "REDIS_PASSWORD": "scada-api",
+}.items():
+    os.environ.setdefault(name, value)
+
+from di import dependent, executors  # noqa: E402
+
+from service_layer import dependencies  # noqa: E402
+from service_layer.cqrs.container import di as di_container  # noqa: E402
+from service_layer.handlers import commands as command_handlers  # noqa: E402
+from service_layer.handlers import queries as query_handlers  # noqa: E402
+
+NUMBER = 2_000
+HANDLERS = (
+    command_handlers.UpdatedDeviceIndicatorsHandler,
+    command_handlers.UpdateIndicatorsBatchHandler,
+    query_handlers.GetTechNestsHandler,
+)
+
+
+async def resolve_unsolved(type_):
+    """Разрешение с решением графа на каждый вызов"""
+    container = dependencies.container
+    solved = container.solve(dependent.Dependent(type_, scope="request"), scopes=di_container.DIContainer.SCOPES)
+    with container.enter_scope("app") as app_state:
+        with container.enter_scope("request", state=app_state) as state:
+            return await solved.execute_async(executor=executors.AsyncExecutor(), state=state)
+
+
+async def measure(resolve, type_) -> float:
+    await resolve(type_)
+    started_at = time.perf_counter()
+    for _ in range(NUMBER):
+        await resolve(type_)
+    return (time.perf_counter() - started_at) / NUMBER * 1e6
+
+
+async def main() -> None:
+    container = di_container.DIContainer()
+    container.attach_external_container(dependencies.container)
+    print(f"{'handler':<34}{'solve each, us':>16}{'cached, us':>12}")
+    for type_ in HANDLERS:
+        before = await measure(resolve_unsolved, type_)
+        after = await measure(container.resolve, type_)
+        print(f"{type_.__name__:<34}{before:>16.1f}{after:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
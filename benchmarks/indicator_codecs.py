@@ -0,0 +1,67 @@
+"""
+Сравнение кодеков значений индикаторов: размер записи и время кодирования/декодирования.
+
+Запуск::
+
+    python benchmarks/indicator_codecs.py
+"""
+
+import datetime
+import decimal
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from domain import models  # noqa: E402
+from infrastructire import codecs  # noqa: E402
+
+NUMBER = 20_000
+
+
+def tech_nest_values() -> models.TechNestIndicatorsValues:
+    return models.TechNestIndicatorsValues(
+        input_power=models.InputPowerIndicatorsGroup(
+            inputs=[
+                models.InputPowerIndicators(
+                    input_number=number,
+                    supply=True,
+                    voltage=models.VoltageValue(value=decimal.Decimal("220.15")),
+                )
+                for number in (1, 2, 3)
+            ],
+        ),
+        consumption=models.ConsumptionIndicatorsGroup(
+            power=models.PowerConsumptionValue(value=decimal.Decimal("12.5")),
+            water=models.WaterConsumptionIndicators(
+                cumulative=models.CumulativeWaterConsumptionValue(value=decimal.Decimal("10234.7")),
+                instantaneous=models.InstantaneousWaterConsumptionValue(value=decimal.Decimal("0.003")),
+            ),
+        ),
+        updated_at=datetime.datetime.now(),
+    )
+
+
+def device_values() -> models.DeviceIndicatorsValues:
+    return models.DeviceIndicatorsValues(
+        ammeter=models.AmmeterValue(value=decimal.Decimal("1.25")),
+        frequency=models.Frequency(value=decimal.Decimal("50")),
+        status=models.DeviceStatus.TURNED_ON,
+        updated_at=datetime.datetime.now(),
+    )
+
+
+def main() -> None:
+    print(f"{'model':<26}{'codec':<10}{'bytes/key':>10}{'encode, us':>12}{'decode, us':>12}")
+    for value in (tech_nest_values(), device_values()):
+        model = type(value)
+        for codec in codecs.CODECS.values():
+            encoded = codec.encode(value)
+            encode_time = timeit.timeit(lambda: codec.encode(value), number=NUMBER) / NUMBER * 1e6
+            decode_time = timeit.timeit(lambda: codec.decode(encoded, model), number=NUMBER) / NUMBER * 1e6
+            print(f"{model.__name__:<26}{codec.name:<10}{len(encoded):>10}{encode_time:>12.2f}{decode_time:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Зоны нечувствительности (deadband) показателей индикаторов.
+
+Новое значение считается значимым, если хотя бы один показатель вышел за зону
+нечувствительности относительно сохраненного значения, изменилось любое дискретное
+значение (режим, статус, контроль фазы, питание на входе) или с момента сохраненного
+значения прошло больше ``max_silence``.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import decimal
+
+from domain import models
+
+ZERO = decimal.Decimal(0)
+
+
+@dataclasses.dataclass(frozen=True)
+class Threshold:
+    """
+    Зона нечувствительности показателя.
+
+    Изменение значимо, если превышает и абсолютный порог, и относительный порог
+    (доля от предыдущего значения). Нулевые пороги означают, что значимо любое изменение.
+    """
+
+    absolute: decimal.Decimal = ZERO
+    relative: decimal.Decimal = ZERO
+
+    def exceeded(self, previous: decimal.Decimal, current: decimal.Decimal) -> bool:
+        return abs(current - previous) > max(self.absolute, self.relative * abs(previous))
+
+
+@dataclasses.dataclass(frozen=True)
+class IndicatorsDeadband:
+    enabled: bool = True
+    voltage: Threshold = Threshold()
+    ammeter: Threshold = Threshold()
+    frequency: Threshold = Threshold()
+    power: Threshold = Threshold()
+    water_cumulative: Threshold = Threshold()
+    water_instantaneous: Threshold = Threshold()
+    max_silence: datetime.timedelta = datetime.timedelta(minutes=1)
+
+    def _silence_exceeded(self, previous: datetime.datetime, current: datetime.datetime) -> bool:
+        if (previous.tzinfo is None) != (current.tzinfo is None):
+            return True
+        return current - previous >= self.max_silence
+
+    def tech_nest_changed(
+        self,
+        previous: models.TechNestIndicatorsValues | None,
+        current: models.TechNestIndicatorsValues,
+    ) -> bool:
+        """Проверяет, является ли новое значение показателей узла значимым"""
+        if previous is None or self._silence_exceeded(previous.updated_at, current.updated_at):
+            return True
+        if previous.input_power.phase_control != current.input_power.phase_control:
+            return True
+        if len(previous.input_power.inputs) != len(current.input_power.inputs):
+            return True
+        for previous_input, current_input in zip(previous.input_power.inputs, current.input_power.inputs):
+            if previous_input.input_number != current_input.input_number:
+                return True
+            if previous_input.supply != current_input.supply:
+                return True
+            if self.voltage.exceeded(previous_input.voltage.value, current_input.voltage.value):
+                return True
+        previous_water, current_water = previous.consumption.water, current.consumption.water
+        if self.power.exceeded(previous.consumption.power.value, current.consumption.power.value):
+            return True
+        if self.water_cumulative.exceeded(previous_water.cumulative.value, current_water.cumulative.value):
+            return True
+        return self.water_instantaneous.exceeded(previous_water.instantaneous.value, current_water.instantaneous.value)
+
+    def device_changed(
+        self,
+        previous: models.DeviceIndicatorsValues | None,
+        current: models.DeviceIndicatorsValues,
+    ) -> bool:
+        """Проверяет, является ли новое значение показателей устройства значимым"""
+        if previous is None or self._silence_exceeded(previous.updated_at, current.updated_at):
+            return True
+        if previous.mode != current.mode or previous.status != current.status:
+            return True
+        if self.ammeter.exceeded(previous.ammeter.value, current.ammeter.value):
+            return True
+        return self.frequency.exceeded(previous.frequency.value, current.frequency.value)
@@ -0,0 +1,122 @@
+"""
+Геометрия поиска узлов по местоположению.
+
+Местоположения индексируются geohash: строкой, каждый следующий символ которой уточняет
+ячейку предыдущего. Область поиска покрывается небольшим числом ячеек, и кандидаты
+выбираются по префиксам geohash, после чего проверяются точные координаты.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 12
+# Средний радиус Земли, м
+EARTH_RADIUS = 6_371_008.8
+
+
+@dataclasses.dataclass(frozen=True)
+class Point:
+    latitude: float
+    longitude: float
+
+
+@dataclasses.dataclass(frozen=True)
+class BoundingBox:
+    """Прямоугольная область. Если west > east, область пересекает 180-й меридиан"""
+
+    south: float
+    west: float
+    north: float
+    east: float
+
+    def split(self) -> list[BoundingBox]:
+        """Разбивает область, пересекающую 180-й меридиан, на две"""
+        if self.west <= self.east:
+            return [self]
+        return [
+            BoundingBox(self.south, self.west, self.north, 180.0),
+            BoundingBox(self.south, -180.0, self.north, self.east),
+        ]
+
+
+def encode(latitude: float, longitude: float, precision: int = PRECISION) -> str:
+    """Возвращает geohash точки заданной длины"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    result, bits, value, even = [], 0, 0, True
+    while len(result) < precision:
+        # Биты долготы и широты чередуются, начиная с долготы
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            result.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(result)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """Возвращает высоту и ширину ячейки geohash заданной длины в градусах"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def _steps(start: float, stop: float, step: float) -> list[float]:
+    count = int((stop - start) // step)
+    return [start + step * index for index in range(count + 1)] + [stop]
+
+
+def cover(box: BoundingBox, max_cells: int) -> list[str]:
+    """
+    Возвращает ячейки geohash наибольшей точности, покрывающие область, не более max_cells.
+
+    Пустой список означает, что область нельзя покрыть таким числом ячеек.
+    """
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if (box.north - box.south) // height * ((box.east - box.west) // width) > max_cells:
+            continue
+        cells = {
+            encode(latitude, longitude, precision)
+            for latitude in _steps(box.south, box.north, height)
+            for longitude in _steps(box.west, box.east, width)
+        }
+        if len(cells) <= max_cells:
+            return sorted(cells)
+    return []
+
+
+def distance(a: Point, b: Point) -> float:
+    """Расстояние между точками по поверхности Земли (формула гаверсинусов), м"""
+    lat_a, lat_b = math.radians(a.latitude), math.radians(b.latitude)
+    d_lat = lat_b - lat_a
+    d_lon = math.radians(b.longitude - a.longitude)
+    h = math.sin(d_lat / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(h)))
+
+
+def around(point: Point, radius: float) -> BoundingBox:
+    """Возвращает область, содержащую круг радиусом radius метров с центром в точке"""
+    angle = radius / EARTH_RADIUS
+    d_lat = math.degrees(angle)
+    south, north = max(-90.0, point.latitude - d_lat), min(90.0, point.latitude + d_lat)
+    cos_lat = math.cos(math.radians(point.latitude))
+    if south == -90.0 or north == 90.0 or math.sin(angle) >= cos_lat:
+        return BoundingBox(south, -180.0, north, 180.0)
+    d_lon = math.degrees(math.asin(math.sin(angle) / cos_lat))
+    west, east = point.longitude - d_lon, point.longitude + d_lon
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return BoundingBox(south, west, north, east)
@@ -275,6 +275,20 @@ class TechNestIndicators(pydantic.BaseModel):
     values: TechNestIndicatorsValues = pydantic.Field(description="Значения на индикаторах")
 
 
+IndicatorsChangesField = functools.partial(
+    pydantic.Field,
+    description="Изменившиеся поля значений: путь поля -> значение",
+    examples=[{"consumption.power": "12.5", "input_power.inputs[0].voltage": "231"}],
+)
+
+
+class TechNestIndicatorsChanges(pydantic.BaseModel):
+    """Изменения показателей на узле"""
+
+    nest: int = pydantic.Field(description="Идентификатор технического узла")
+    changes: dict[str, typing.Any] = IndicatorsChangesField()
+
+
 class AmmeterValue(IndicatorValue[decimal.Decimal]):
     """Показатель силы тока"""
 
@@ -303,3 +317,54 @@ class DeviceIndicators(pydantic.BaseModel):
     nest: int | None = pydantic.Field(description="Идентификатор технического узла")
     device: int | None = pydantic.Field(description="Идентификатор устройства")
     values: DeviceIndicatorsValues = pydantic.Field(description="Значения на индикаторах")
+
+
+class DeviceIndicatorsChanges(pydantic.BaseModel):
+    """Изменения показателей на устройстве"""
+
+    nest: int = pydantic.Field(description="Идентификатор технического узла")
+    device: int = pydantic.Field(description="Идентификатор устройства")
+    changes: dict[str, typing.Any] = IndicatorsChangesField()
+
+
+class DeviceLastSeen(pydantic.BaseModel):
+    """Время последней активности устройства"""
+
+    nest: int = pydantic.Field(description="Идентификатор технического узла")
+    device: int = pydantic.Field(description="Идентификатор устройства")
+    last_seen: datetime.datetime = pydantic.Field(description="Время последнего приема показателей")
+
+
+class TopologyChange(pydantic.BaseModel):
+    """Изменение топологии владельца"""
+
+    holder: int = pydantic.Field(description="Идентификатор владельца")
+    nest: int | None = pydantic.Field(description="Идентификатор добавленного технического узла", default=None)
+    device: int | None = pydantic.Field(description="Идентификатор добавленного устройства", default=None)
+
+
+class TopologyImportState(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class TopologyImportRowError(pydantic.BaseModel):
+    """Ошибка строки импорта топологии"""
+
+    row: int = pydantic.Field(description="Номер строки файла, начиная с 1")
+    message: str = pydantic.Field(description="Описание ошибки")
+
+
+class TopologyImport(pydantic.BaseModel):
+    """Задача импорта топологии"""
+
+    id: str = pydantic.Field(description="Идентификатор задачи")
+    format: typing.Literal["ndjson", "csv"] = pydantic.Field(description="Формат файла")
+    state: TopologyImportState = pydantic.Field(description="Состояние", default=TopologyImportState.PENDING)
+    rows: int = pydantic.Field(description="Обработано строк", default=0)
+    failed: int = pydantic.Field(description="Строк с ошибками", default=0)
+    error: str | None = pydantic.Field(description="Причина прерывания импорта", default=None)
+    created_at: datetime.datetime = pydantic.Field(description="Время создания", default_factory=datetime.datetime.now)
+    finished_at: datetime.datetime | None = pydantic.Field(description="Время завершения", default=None)
@@ -0,0 +1,129 @@
+"""
+Пополевое представление значений индикаторов.
+
+Значения раскладываются в плоский набор полей с путями вида ``consumption.power``,
+``input_power.inputs[2].voltage`` (индекс - позиция в списке). Для показателей
+(``IndicatorValue``) поле содержит только значение, единица измерения определяется моделью.
+Значения полей - JSON совместимые (Decimal - строкой, время - в ISO формате).
+"""
+
+import datetime
+import re
+import typing
+
+import pydantic
+import pydantic_core
+
+from domain import exceptions, models
+
+V = typing.TypeVar("V", bound=pydantic.BaseModel)
+
+_PATH_TOKEN = re.compile(r"\.?([a-z_]+)|\[(\d+)\]")
+
+UPDATED_AT = "updated_at"
+
+
+def parse_path(path: str) -> list[str | int]:
+    """Разбирает путь поля на имена полей и индексы списков"""
+    tokens: list[str | int] = []
+    position = 0
+    for match in _PATH_TOKEN.finditer(path):
+        name, index = match.groups()
+        # Имена полей после первого отделяются точкой, индексы - без точки
+        dotted = match.group(0).startswith(".")
+        if match.start() != position or dotted != (bool(tokens) and name is not None):
+            break
+        tokens.append(name if name is not None else int(index))
+        position = match.end()
+    if not tokens or position != len(path):
+        raise ValueError(f"Invalid field path {path!r}")
+    return tokens
+
+
+def validate_path(path: str, model: typing.Type[pydantic.BaseModel]) -> str:
+    """Проверяет, что путь указывает на поле-показатель модели"""
+    annotation: typing.Any = model
+    for token in parse_path(path):
+        if isinstance(token, int):
+            if typing.get_origin(annotation) is not list:
+                raise ValueError(f"Field path {path!r} indexes not a list")
+            (annotation,) = typing.get_args(annotation)
+            continue
+        if not _is_model(annotation) or _is_indicator(annotation) or token not in annotation.model_fields:
+            raise ValueError(f"Unknown field path {path!r}")
+        annotation = annotation.model_fields[token].annotation
+    if _is_model(annotation) and not _is_indicator(annotation) or typing.get_origin(annotation) is list:
+        raise ValueError(f"Field path {path!r} does not point to a single indicator")
+    return path
+
+
+def flatten(value: pydantic.BaseModel) -> dict[str, typing.Any]:
+    """Раскладывает значения в плоский набор полей"""
+    return dict(_flatten(value, ""))
+
+
+def unflatten(fields: typing.Mapping[str, typing.Any], model: typing.Type[V]) -> V:
+    """Собирает модель из плоского набора полей"""
+    tree: dict = {}
+    for path, value in fields.items():
+        *parents, leaf = parse_path(path)
+        node = tree
+        for token in parents:
+            node = node.setdefault(token, {})
+        node[leaf] = value
+    return model.model_validate(_restore(tree, model))
+
+
+def apply(value: V, changes: typing.Mapping[str, typing.Any]) -> tuple[V, dict[str, typing.Any]]:
+    """
+    Применяет изменения полей к значению.
+
+    Возвращает новое значение и фактически изменившиеся поля. Если изменилось хоть одно
+    поле, а время публикации не передано, оно обновляется текущим временем.
+    """
+    fields = flatten(value)
+    for path in changes:
+        if path not in fields:
+            raise exceptions.NotFound(f"Field {path} not found in indicator values")
+    updated = unflatten({**fields, **changes}, type(value))
+    updated_fields = flatten(updated)
+    changed = {path: field for path, field in updated_fields.items() if fields[path] != field}
+    if changed and UPDATED_AT not in changes and UPDATED_AT in fields:
+        updated = updated.model_copy(update={UPDATED_AT: datetime.datetime.now()})
+        changed[UPDATED_AT] = pydantic_core.to_jsonable_python(getattr(updated, UPDATED_AT))
+    return updated, changed
+
+
+def _is_model(annotation: typing.Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, pydantic.BaseModel)
+
+
+def _is_indicator(annotation: typing.Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, models.IndicatorValue)
+
+
+def _flatten(value: typing.Any, prefix: str) -> typing.Iterator[tuple[str, typing.Any]]:
+    if isinstance(value, models.IndicatorValue):
+        yield prefix, pydantic_core.to_jsonable_python(value.value)
+    elif isinstance(value, pydantic.BaseModel):
+        for name in type(value).model_fields:
+            yield from _flatten(getattr(value, name), f"{prefix}.{name}" if prefix else name)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _flatten(item, f"{prefix}[{index}]")
+    else:
+        yield prefix, pydantic_core.to_jsonable_python(value)
+
+
+def _restore(node: typing.Any, annotation: typing.Any) -> typing.Any:
+    if _is_indicator(annotation):
+        return {"value": node}
+    if _is_model(annotation) and isinstance(node, dict):
+        return {
+            name: _restore(item, annotation.model_fields[name].annotation) if name in annotation.model_fields else item
+            for name, item in node.items()
+        }
+    if typing.get_origin(annotation) is list and isinstance(node, dict):
+        (item_annotation,) = typing.get_args(annotation)
+        return [_restore(node[index], item_annotation) for index in sorted(node)]
+    return node
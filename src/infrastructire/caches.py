@@ -0,0 +1,161 @@
+"""
+In-process кэш последних значений индикаторов.
+
+Кэш ограничен по размеру (LRU) и по времени жизни записи. Согласованность между процессами
+поддерживается инвалидацией по событиям ``TechNestIndicatorsUpdated``/``DeviceIndicatorsUpdated``,
+собственные записи процесса инвалидируют кэш сразу.
+"""
+
+import collections
+import functools
+import time
+import typing
+
+import pydantic
+
+from domain import models
+from infrastructire import codecs, metrics, settings, storages
+
+K = typing.TypeVar("K")
+T = typing.TypeVar("T")
+V = typing.TypeVar("V", bound=pydantic.BaseModel)
+
+
+class LRUCache(typing.Generic[K, T]):
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl: float,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._items: collections.OrderedDict[K, tuple[float, T]] = collections.OrderedDict()
+        self.hits = metrics.registry.counter(f"{name}_cache_hits", f"Попадания в кэш {name}")
+        self.misses = metrics.registry.counter(f"{name}_cache_misses", f"Промахи кэша {name}")
+        metrics.registry.gauge(f"{name}_cache_size", f"Размер кэша {name}", callback=lambda: len(self._items))
+
+    def get(self, key: K) -> T | None:
+        item = self._items.get(key)
+        if item is None:
+            self.misses.inc()
+            return None
+        expires_at, value = item
+        if expires_at < self._clock():
+            del self._items[key]
+            self.misses.inc()
+            return None
+        self._items.move_to_end(key)
+        self.hits.inc()
+        return value
+
+    def set(self, key: K, value: T) -> None:
+        self._items[key] = (self._clock() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, *keys: K) -> None:
+        for key in keys:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def _create_cache(name: str) -> LRUCache[int, bytes]:
+    return LRUCache(
+        name,
+        max_size=settings.indicators_settings.CACHE_MAX_SIZE,
+        ttl=settings.indicators_settings.CACHE_TTL,
+    )
+
+
+@functools.lru_cache
+def get_tech_nest_values_cache() -> LRUCache[int, bytes]:
+    return _create_cache("tech_nest_indicators")
+
+
+@functools.lru_cache
+def get_device_values_cache() -> LRUCache[int, bytes]:
+    return _create_cache("device_indicators")
+
+
+class CachedIndicatorValuesStorage(storages.IndicatorValuesStorage[V]):
+    """Хранилище-обертка, отдающее значения из кэша. В кэше хранятся JSON документы значений"""
+
+    MODEL: typing.ClassVar[typing.Type[pydantic.BaseModel]]
+
+    def __init__(self, storage: storages.IndicatorValuesStorage[V], cache: LRUCache[int, bytes]):
+        self.storage = storage
+        self.cache = cache
+
+    def _load(self, value: bytes | None) -> V | None:
+        if value is None:
+            return None
+        return codecs.decode(value, self.MODEL)
+
+    async def set_value(self, id: int, value: V) -> None:
+        await self.storage.set_value(id, value)
+        self.cache.invalidate(id)
+
+    async def set_values(self, values: typing.Mapping[int, V]) -> dict[int, Exception]:
+        errors = await self.storage.set_values(values)
+        self.cache.invalidate(*values)
+        return errors
+
+    async def patch_value(self, id: int, changes: typing.Mapping[str, typing.Any]) -> tuple[V, dict] | None:
+        result = await self.storage.patch_value(id, changes)
+        self.cache.invalidate(id)
+        return result
+
+    async def get_value(self, id: int) -> V | None:
+        return self._load(await self.get_raw_value(id))
+
+    async def get_values(self, *id: int) -> list[V | None]:
+        return list(map(self._load, await self.get_raw_values(*id)))
+
+    async def get_raw_value(self, id: int) -> bytes | None:
+        value = self.cache.get(id)
+        if value is not None:
+            return value
+        value = await self.storage.get_raw_value(id)
+        if value is not None:
+            self.cache.set(id, value)
+        return value
+
+    async def get_raw_values(self, *id: int) -> list[bytes | None]:
+        values = {key: self.cache.get(key) for key in id}
+        missed = [key for key, value in values.items() if value is None]
+        if missed:
+            for key, value in zip(missed, await self.storage.get_raw_values(*missed)):
+                if value is not None:
+                    self.cache.set(key, value)
+                values[key] = value
+        return [values[key] for key in id]
+
+
+class CachedTechNestIndicatorValuesStorage(
+    CachedIndicatorValuesStorage[models.TechNestIndicatorsValues],
+    storages.TechNestIndicatorValuesStorage,
+):
+    MODEL = models.TechNestIndicatorsValues
+
+    def __init__(self, storage: storages.RedisTechNestIndicatorValuesStorage):
+        super().__init__(storage, get_tech_nest_values_cache())
+
+
+class CachedDeviceIndicatorValuesStorage(
+    CachedIndicatorValuesStorage[models.DeviceIndicatorsValues],
+    storages.DeviceIndicatorValuesStorage,
+):
+    MODEL = models.DeviceIndicatorsValues
+
+    def __init__(self, storage: storages.RedisDeviceIndicatorValuesStorage):
+        super().__init__(storage, get_device_values_cache())
@@ -0,0 +1,209 @@
+"""
+Кодеки для хранения значений индикаторов.
+
+Поддерживаются два формата:
+
+* ``json`` - исходный формат, документ pydantic модели целиком;
+* ``msgpack`` - компактный позиционный формат. Запись начинается с заголовка
+  ``MAGIC + версия схемы``, поля хранятся массивом в порядке схемы, единицы измерения
+  не хранятся (определяются схемой), перечисления хранятся индексом,
+  время - микросекундами от эпохи.
+
+Чтение автоматически определяет формат по первому байту, поэтому оба формата
+могут храниться одновременно на время миграции.
+"""
+
+import abc
+import datetime
+import typing
+
+import msgpack
+import pydantic
+from orjson import orjson
+
+from domain import models
+from infrastructire import settings
+
+__all__ = (
+    "IndicatorValuesCodec",
+    "JSONCodec",
+    "MsgpackCodec",
+    "decode",
+    "as_json",
+    "get_codec",
+)
+
+V = typing.TypeVar("V", bound=pydantic.BaseModel)
+
+Schema: typing.TypeAlias = dict[
+    typing.Type[pydantic.BaseModel],
+    tuple[typing.Callable[[typing.Any], list], typing.Callable[[list], typing.Any]],
+]
+
+MAGIC = b"\xc1"
+JSON_MARKER = b"{"
+
+
+class IndicatorValuesCodec(abc.ABC):
+    name: typing.ClassVar[str]
+
+    @abc.abstractmethod
+    def encode(self, value: pydantic.BaseModel) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def decode(self, data: bytes, model: typing.Type[V]) -> V:
+        pass
+
+    @abc.abstractmethod
+    def can_decode(self, data: bytes) -> bool:
+        pass
+
+
+class JSONCodec(IndicatorValuesCodec):
+    name = "json"
+
+    def encode(self, value: pydantic.BaseModel) -> bytes:
+        return orjson.dumps(value.model_dump(mode="json"))
+
+    def decode(self, data: bytes, model: typing.Type[V]) -> V:
+        return model.model_validate(orjson.loads(data), context={"assume_validated": True})
+
+    def can_decode(self, data: bytes) -> bool:
+        return data[:1] == JSON_MARKER
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _pack_datetime(value: datetime.datetime) -> list[int | None]:
+    offset = value.utcoffset()
+    if offset is None:
+        return [(value - _EPOCH) // _MICROSECOND, None]
+    return [(value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND, int(offset.total_seconds())]
+
+
+def _unpack_datetime(value: list[int | None]) -> datetime.datetime:
+    micros, offset = value
+    result = _EPOCH + datetime.timedelta(microseconds=micros)
+    if offset is None:
+        return result
+    return result.replace(tzinfo=datetime.timezone(datetime.timedelta(seconds=offset)))
+
+
+# Порядок значений перечислений зафиксирован версией схемы: добавление новых значений - только в конец
+_PHASE_CONTROLS = (models.PhaseControl.NORMAL, models.PhaseControl.ACCIDENT)
+_MODES = (models.ModeEnum.AUTO, models.ModeEnum.MANUAL, models.ModeEnum.ACCIDENT)
+_STATUSES = (models.DeviceStatus.TURNED_ON, models.DeviceStatus.TURNED_OFF)
+
+
+def _pack_tech_nest_values(value: models.TechNestIndicatorsValues) -> list:
+    return [
+        [[item.input_number, item.supply, str(item.voltage.value)] for item in value.input_power.inputs],
+        _PHASE_CONTROLS.index(value.input_power.phase_control),
+        str(value.consumption.power.value),
+        str(value.consumption.water.cumulative.value),
+        str(value.consumption.water.instantaneous.value),
+        _pack_datetime(value.updated_at),
+    ]
+
+
+def _unpack_tech_nest_values(fields: list) -> models.TechNestIndicatorsValues:
+    inputs, phase_control, power, cumulative, instantaneous, updated_at = fields
+    return models.TechNestIndicatorsValues.model_validate(
+        {
+            "input_power": {
+                "inputs": [
+                    {"input_number": input_number, "supply": supply, "voltage": {"value": voltage}}
+                    for input_number, supply, voltage in inputs
+                ],
+                "phase_control": _PHASE_CONTROLS[phase_control],
+            },
+            "consumption": {
+                "power": {"value": power},
+                "water": {
+                    "cumulative": {"value": cumulative},
+                    "instantaneous": {"value": instantaneous},
+                },
+            },
+            "updated_at": _unpack_datetime(updated_at),
+        },
+        context={"assume_validated": True},
+    )
+
+
+def _pack_device_values(value: models.DeviceIndicatorsValues) -> list:
+    return [
+        str(value.ammeter.value),
+        _MODES.index(value.mode),
+        str(value.frequency.value),
+        _STATUSES.index(value.status),
+        _pack_datetime(value.updated_at),
+    ]
+
+
+def _unpack_device_values(fields: list) -> models.DeviceIndicatorsValues:
+    ammeter, mode, frequency, status, updated_at = fields
+    return models.DeviceIndicatorsValues.model_validate(
+        {
+            "ammeter": {"value": ammeter},
+            "mode": _MODES[mode],
+            "frequency": {"value": frequency},
+            "status": _STATUSES[status],
+            "updated_at": _unpack_datetime(updated_at),
+        },
+        context={"assume_validated": True},
+    )
+
+
+class MsgpackCodec(IndicatorValuesCodec):
+    name = "msgpack"
+    VERSION: typing.ClassVar[int] = 1
+
+    # Схемы по версиям: модель -> (упаковка, распаковка)
+    SCHEMAS: typing.ClassVar[dict[int, Schema]] = {
+        1: {
+            models.TechNestIndicatorsValues: (_pack_tech_nest_values, _unpack_tech_nest_values),
+            models.DeviceIndicatorsValues: (_pack_device_values, _unpack_device_values),
+        },
+    }
+
+    def encode(self, value: pydantic.BaseModel) -> bytes:
+        pack, _ = self.SCHEMAS[self.VERSION][type(value)]
+        return MAGIC + bytes((self.VERSION,)) + msgpack.packb(pack(value))
+
+    def decode(self, data: bytes, model: typing.Type[V]) -> V:
+        if not self.can_decode(data):
+            raise ValueError("Value is not encoded with msgpack codec")
+        schema = self.SCHEMAS.get(data[1])
+        if schema is None:
+            raise ValueError(f"Unsupported msgpack schema version {data[1]}")
+        _, unpack = schema[model]
+        return unpack(msgpack.unpackb(data[2:]))
+
+    def can_decode(self, data: bytes) -> bool:
+        return data[:1] == MAGIC and len(data) > 2
+
+
+CODECS: dict[str, IndicatorValuesCodec] = {codec.name: codec for codec in (JSONCodec(), MsgpackCodec())}
+
+
+def decode(data: bytes, model: typing.Type[V]) -> V:
+    """Декодирует значение, определяя формат по заголовку записи"""
+    for codec in CODECS.values():
+        if codec.can_decode(data):
+            return codec.decode(data, model)
+    raise ValueError("Unknown indicator values encoding")
+
+
+def as_json(data: bytes, model: typing.Type[V]) -> bytes:
+    """Возвращает значение в виде JSON документа. JSON записи возвращаются без разбора"""
+    if data[:1] == JSON_MARKER:
+        return data
+    return CODECS[JSONCodec.name].encode(decode(data, model))
+
+
+def get_codec() -> IndicatorValuesCodec:
+    """Возвращает кодек для записи значений, выбранный в настройках"""
+    return CODECS[settings.indicators_settings.CODEC]
@@ -1,12 +1,23 @@
+import datetime
+import functools
+import math
+import time
 import typing
 
 import aio_pika
 import redis.asyncio as redis
 from aio_pika import abc, pool
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.asyncio import session as sql_session
 
-from infrastructire import repository, settings
+from domain import deadband
+from infrastructire import logging, metrics, repository, settings
+
+replica_fallbacks = metrics.registry.counter(
+    "sql_replica_fallbacks",
+    "Неудачные подключения к репликам БД, после которых выбиралась другая реплика или основная БД",
+)
 
 S = typing.TypeVar("S")
 
@@ -21,19 +32,196 @@ class RepositoryFactory(typing.Protocol[S]):
         ...
 
 
+def _create_sql_engine(url: str) -> AsyncEngine:
+    db_settings = settings.get_mysql_settings()
+    return create_async_engine(
+        url,
+        isolation_level=db_settings.ISOLATION_LEVEL,
+        pool_size=db_settings.POOL_SIZE,
+        max_overflow=db_settings.MAX_OVERFLOW,
+        pool_timeout=db_settings.POOL_TIMEOUT,
+        pool_recycle=db_settings.POOL_RECYCLE,
+        pool_pre_ping=db_settings.POOL_PRE_PING,
+    )
+
+
+@functools.lru_cache
+def get_sql_engine() -> AsyncEngine:
+    """Возвращает общий для всего приложения движок SQLAlchemy со своим пулом соединений"""
+    return _create_sql_engine(settings.get_mysql_url())
+
+
+@functools.lru_cache
+def get_sql_sessionmaker() -> async_sessionmaker[sql_session.AsyncSession]:
+    return async_sessionmaker(get_sql_engine())
+
+
+class ReplicaSet:
+    """
+    Реплики БД для запросов на чтение.
+
+    Реплики выбираются по кругу. Реплика, к которой не удалось подключиться, исключается
+    из выбора на retry_after секунд. В течение stickiness секунд после фиксации записи
+    в этом процессе чтение идет с основной БД, чтобы ответ не отставал от записанного.
+    """
+
+    def __init__(self, engines: typing.Sequence[AsyncEngine], retry_after: float, stickiness: float):
+        self.engines = tuple(engines)
+        self.sessionmakers = tuple(async_sessionmaker(engine, info={"replica": True}) for engine in self.engines)
+        self.retry_after = retry_after
+        self.stickiness = stickiness
+        self._next = 0
+        self._unavailable_until = [0.0] * len(self.engines)
+        self._written_at = -math.inf
+
+    def candidates(self) -> list[int]:
+        """Возвращает номера доступных реплик в порядке обращения"""
+        now = time.monotonic()
+        if not self.engines or now - self._written_at < self.stickiness:
+            return []
+        start, self._next = self._next, (self._next + 1) % len(self.engines)
+        order = [(start + shift) % len(self.engines) for shift in range(len(self.engines))]
+        return [index for index in order if self._unavailable_until[index] <= now]
+
+    def mark_unavailable(self, index: int) -> None:
+        self._unavailable_until[index] = time.monotonic() + self.retry_after
+
+    def mark_written(self) -> None:
+        self._written_at = time.monotonic()
+
+
+@functools.lru_cache
+def get_sql_replica_set() -> ReplicaSet:
+    """Возвращает общий для всего приложения набор реплик БД"""
+    db_settings = settings.get_mysql_settings()
+    return ReplicaSet(
+        [_create_sql_engine(url) for url in settings.get_mysql_replica_urls()],
+        retry_after=db_settings.REPLICA_RETRY_AFTER,
+        stickiness=db_settings.REPLICA_STICKINESS,
+    )
+
+
+async def init_sql_engine() -> None:
+    get_sql_sessionmaker()
+    get_sql_replica_set()
+
+
+async def dispose_sql_engine() -> None:
+    get_sql_sessionmaker.cache_clear()
+    if get_sql_replica_set.cache_info().currsize:
+        for engine in get_sql_replica_set().engines:
+            await engine.dispose()
+        get_sql_replica_set.cache_clear()
+    if not get_sql_engine.cache_info().currsize:
+        return
+    await get_sql_engine().dispose()
+    get_sql_engine.cache_clear()
+
+
 class SQLAlchemySessionFactory(SessionFactory):
     def __call__(self) -> sql_session.AsyncSession:
-        return async_sessionmaker(
-            create_async_engine(
-                settings.get_mysql_url(),
-                isolation_level="REPEATABLE READ",
-            )
-        )()
+        return get_sql_sessionmaker()()
+
+
+class SQLAlchemyReplicaSessionFactory:
+    """Открывает сессии реплик БД для запросов на чтение"""
+
+    def __init__(self):
+        self.replicas = get_sql_replica_set()
+
+    async def __call__(self) -> sql_session.AsyncSession | None:
+        """Возвращает сессию с подключением к доступной реплике или None, если доступных реплик нет"""
+        for index in self.replicas.candidates():
+            session = self.replicas.sessionmakers[index]()
+            try:
+                await session.connection()
+            except (exc.OperationalError, exc.InterfaceError) as error:
+                await session.close()
+                self.replicas.mark_unavailable(index)
+                replica_fallbacks.inc()
+                logging.logger.warning(f"Database replica {index} is unavailable: {error}")
+                continue
+            return session
+        return None
+
+    def mark_written(self) -> None:
+        self.replicas.mark_written()
+
+
+class InstrumentedRedisConnectionPool(redis.BlockingConnectionPool):
+    """Пул соединений Redis, публикующий метрики занятости и времени ожидания соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_time = metrics.registry.summary(
+            "redis_pool_wait_seconds",
+            "Время ожидания свободного соединения из пула Redis",
+        )
+        metrics.registry.gauge(
+            "redis_pool_in_use_connections",
+            "Количество занятых соединений пула Redis",
+            callback=lambda: len(self._in_use_connections),
+        )
+        metrics.registry.gauge(
+            "redis_pool_idle_connections",
+            "Количество свободных соединений пула Redis",
+            callback=lambda: len(self._available_connections),
+        )
+        metrics.registry.gauge(
+            "redis_pool_max_connections",
+            "Максимальный размер пула Redis",
+            callback=lambda: self.max_connections,
+        )
+
+    async def get_connection(self, command_name, *keys, **options):
+        started_at = time.perf_counter()
+        try:
+            return await super().get_connection(command_name, *keys, **options)
+        finally:
+            self._wait_time.observe(time.perf_counter() - started_at)
+
+
+@functools.lru_cache
+def get_redis_connection_pool() -> redis.ConnectionPool:
+    """Возвращает общий для всего приложения пул соединений Redis"""
+    redis_settings = settings.get_redis_settings()
+    return InstrumentedRedisConnectionPool.from_url(
+        settings.get_redis_url(),
+        max_connections=redis_settings.MAX_CONNECTIONS,
+        timeout=redis_settings.POOL_TIMEOUT,
+        health_check_interval=redis_settings.HEALTH_CHECK_INTERVAL,
+        socket_timeout=redis_settings.SOCKET_TIMEOUT,
+        socket_connect_timeout=redis_settings.SOCKET_CONNECT_TIMEOUT,
+    )
+
+
+async def init_redis_connection_pool() -> None:
+    get_redis_connection_pool()
+
+
+async def close_redis_connection_pool() -> None:
+    if not get_redis_connection_pool.cache_info().currsize:
+        return
+    await get_redis_connection_pool().disconnect()
+    get_redis_connection_pool.cache_clear()
 
 
 class RedisClientFactory:
+    """
+    Возвращает клиент Redis поверх пула соединений.
+
+    Клиент без выделенного соединения берет соединение из пула на каждую команду,
+    поэтому создается один раз на фабрику и разделяется между хранилищами.
+    """
+
+    def __init__(self, connection_pool: redis.ConnectionPool):
+        self.connection_pool = connection_pool
+        self._client: redis.Redis | None = None
+
     def __call__(self) -> redis.Redis:
-        return redis.Redis.from_url(settings.get_redis_url())
+        if self._client is None:
+            self._client = redis.Redis(connection_pool=self.connection_pool)
+        return self._client
 
 
 class SQLAlchemyRepositoryFactory(RepositoryFactory):
@@ -47,4 +235,24 @@ async def amqp_connection_pool_factory(url: str) -> abc.AbstractRobustConnection
 
 async def amqp_channel_pool_factory(connection_pool: pool.Pool) -> aio_pika.Channel:
     async with connection_pool.acquire() as connection:
-        return await connection.channel()
+        # Публикация завершается после подтверждения брокером, на этом основана доставка из outbox
+        return await connection.channel(publisher_confirms=True)
+
+
+@functools.lru_cache
+def get_indicators_deadband() -> deadband.IndicatorsDeadband:
+    """Возвращает зоны нечувствительности показателей из настроек"""
+    config = settings.deadband_settings
+    return deadband.IndicatorsDeadband(
+        enabled=config.ENABLED,
+        voltage=deadband.Threshold(config.VOLTAGE_ABSOLUTE, config.VOLTAGE_RELATIVE),
+        ammeter=deadband.Threshold(config.AMMETER_ABSOLUTE, config.AMMETER_RELATIVE),
+        frequency=deadband.Threshold(config.FREQUENCY_ABSOLUTE, config.FREQUENCY_RELATIVE),
+        power=deadband.Threshold(config.POWER_ABSOLUTE, config.POWER_RELATIVE),
+        water_cumulative=deadband.Threshold(config.WATER_CUMULATIVE_ABSOLUTE, config.WATER_CUMULATIVE_RELATIVE),
+        water_instantaneous=deadband.Threshold(
+            config.WATER_INSTANTANEOUS_ABSOLUTE,
+            config.WATER_INSTANTANEOUS_RELATIVE,
+        ),
+        max_silence=datetime.timedelta(seconds=config.MAX_SILENCE),
+    )
@@ -0,0 +1,158 @@
+"""
+История значений индикаторов.
+
+Каждое принятое значение добавляется в Redis Stream сущности (``history:nest@{id}``,
+``history:device@{id}``). Идентификатор записи потока назначается Redis при добавлении,
+поэтому временная шкала истории - время приема значения. Хранение ограничено по времени
+через ``MINID``, чтение выполняется порциями через ``XRANGE ... COUNT``, поэтому весь ряд
+никогда не загружается в память.
+"""
+
+import abc
+import dataclasses
+import datetime
+import time
+import typing
+
+import pydantic
+
+from domain import models
+from infrastructire import codecs, factories, settings
+
+V = typing.TypeVar("V", bound=pydantic.BaseModel)
+
+# Максимальная последовательность внутри миллисекунды в идентификаторе записи потока
+_MAX_SEQUENCE = 2**64 - 1
+
+
+@dataclasses.dataclass(frozen=True)
+class HistoryPage(typing.Generic[V]):
+    points: list[tuple[datetime.datetime, V]]
+    next: str | None = None
+
+
+class IndicatorsHistoryStorage(typing.Generic[V], abc.ABC):
+    @abc.abstractmethod
+    async def append(self, id: int, value: V) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def append_many(self, values: typing.Mapping[int, V]) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def get_range(
+        self,
+        id: int,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        step: datetime.timedelta | None = None,
+        after: str | None = None,
+        limit: int = 100,
+    ) -> HistoryPage[V]:
+        """
+        Возвращает страницу истории в диапазоне [start, end].
+
+        При заданном step возвращается не более одной точки на интервал.
+        after - курсор из предыдущей страницы, чтение продолжается строго после него.
+        """
+
+
+class TechNestIndicatorsHistoryStorage(IndicatorsHistoryStorage[models.TechNestIndicatorsValues], abc.ABC):
+    pass
+
+
+class DeviceIndicatorsHistoryStorage(IndicatorsHistoryStorage[models.DeviceIndicatorsValues], abc.ABC):
+    pass
+
+
+def _to_stream_id(value: datetime.datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+class RedisStreamIndicatorsHistoryStorage(IndicatorsHistoryStorage[V]):
+    PREFIX: typing.ClassVar[str]
+    MODEL: typing.ClassVar[typing.Type[pydantic.BaseModel]]
+    FIELD: typing.ClassVar[bytes] = b"v"
+
+    def __init__(self, client_factory: factories.RedisClientFactory, codec: codecs.IndicatorValuesCodec):
+        self.client = client_factory()
+        self.codec = codec
+        self.retention = settings.indicators_settings.HISTORY_RETENTION
+        self.chunk_size = settings.indicators_settings.HISTORY_CHUNK_SIZE
+
+    def _min_id(self) -> str:
+        return str(int((time.time() - self.retention) * 1000))
+
+    async def append(self, id: int, value: V) -> None:
+        await self.client.xadd(
+            self.PREFIX.format(id),
+            {self.FIELD: self.codec.encode(value)},
+            minid=self._min_id(),
+            approximate=True,
+        )
+
+    async def append_many(self, values: typing.Mapping[int, V]) -> None:
+        if not values:
+            return
+        min_id = self._min_id()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for id, value in values.items():
+                pipe.xadd(
+                    self.PREFIX.format(id), {self.FIELD: self.codec.encode(value)}, minid=min_id, approximate=True
+                )
+            await pipe.execute()
+
+    async def get_range(
+        self,
+        id: int,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        step: datetime.timedelta | None = None,
+        after: str | None = None,
+        limit: int = 100,
+    ) -> HistoryPage[V]:
+        key = self.PREFIX.format(id)
+        min_id = f"({after}" if after else (str(_to_stream_id(start)) if start else "-")
+        max_id = str(_to_stream_id(end)) if end else "+"
+        step_ms = int(step.total_seconds() * 1000) if step else 0
+        last_bucket = None
+        points: list[tuple[datetime.datetime, V]] = []
+
+        while True:
+            entries = await self.client.xrange(key, min=min_id, max=max_id, count=self.chunk_size)
+            for entry_id, fields in entries:
+                entry_id = entry_id.decode()
+                timestamp_ms = int(entry_id.split("-")[0])
+                if step_ms:
+                    bucket = timestamp_ms // step_ms
+                    if bucket == last_bucket:
+                        continue
+                    last_bucket = bucket
+                timestamp = datetime.datetime.fromtimestamp(timestamp_ms / 1000)
+                points.append((timestamp, codecs.decode(fields[self.FIELD], self.MODEL)))
+                if len(points) < limit:
+                    continue
+                if step_ms:
+                    # Следующая страница начинается со следующего интервала
+                    return HistoryPage(points=points, next=f"{(bucket + 1) * step_ms - 1}-{_MAX_SEQUENCE}")
+                return HistoryPage(points=points, next=entry_id)
+            if len(entries) < self.chunk_size:
+                return HistoryPage(points=points)
+            min_id = f"({entries[-1][0].decode()}"
+
+
+class RedisStreamTechNestIndicatorsHistoryStorage(
+    RedisStreamIndicatorsHistoryStorage[models.TechNestIndicatorsValues],
+    TechNestIndicatorsHistoryStorage,
+):
+    PREFIX = "history:nest@{}"
+    MODEL = models.TechNestIndicatorsValues
+
+
+class RedisStreamDeviceIndicatorsHistoryStorage(
+    RedisStreamIndicatorsHistoryStorage[models.DeviceIndicatorsValues],
+    DeviceIndicatorsHistoryStorage,
+):
+    PREFIX = "history:device@{}"
+    MODEL = models.DeviceIndicatorsValues
@@ -0,0 +1,150 @@
+"""
+Импорт топологии (владельцы, узлы, устройства) из файлов NDJSON и CSV.
+
+Загруженный файл сохраняется на диск по мере получения и читается фоновой задачей
+порциями, не загружаясь в память целиком. Состояние задачи и ошибки строк хранятся в Redis:
+
+* ``topology_import@{job}`` - hash с состоянием задачи;
+* ``topology_import:errors@{job}`` - список ошибок строк в JSON.
+"""
+
+import abc
+import asyncio
+import csv
+import datetime
+import itertools
+import os
+import tempfile
+import typing
+
+import orjson
+
+from domain import models
+from infrastructire import factories, settings
+
+Format = typing.Literal["ndjson", "csv"]
+Record = tuple[int, dict[str, typing.Any] | ValueError]
+
+
+class UploadTooLarge(Exception):
+    """Размер загружаемого файла превышает допустимый"""
+
+
+async def save_upload(chunks: typing.AsyncIterator[bytes], max_size: int, directory: str | None = None) -> str:
+    """Сохраняет загружаемый файл на диск по мере получения и возвращает путь к нему"""
+    file = tempfile.NamedTemporaryFile(prefix="topology-import-", dir=directory, delete=False)
+    size = 0
+    try:
+        with file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                await asyncio.to_thread(file.write, chunk)
+    except BaseException:
+        remove_upload(file.name)
+        raise
+    return file.name
+
+
+def remove_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _records(file: typing.TextIO, format: Format) -> typing.Iterator[Record]:
+    """Возвращает записи файла с номерами строк. Нечитаемые строки возвращаются как ошибки"""
+    if format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            # Пустые ячейки - отсутствующие значения, лишние ячейки без заголовка отбрасываются
+            yield reader.line_num, {name: value for name, value in row.items() if name is not None and value != ""}
+        return
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, orjson.loads(line)
+        except orjson.JSONDecodeError as error:
+            yield number, ValueError(f"Invalid JSON: {error}")
+
+
+async def read_records(path: str, format: Format, chunk_size: int) -> typing.AsyncIterator[list[Record]]:
+    """Читает файл порциями по chunk_size записей"""
+    file = await asyncio.to_thread(open, path, encoding="utf-8-sig", newline="")
+    try:
+        records = _records(file, format)
+        while chunk := await asyncio.to_thread(list, itertools.islice(records, chunk_size)):
+            yield chunk
+    finally:
+        file.close()
+
+
+class TopologyImportsStorage(abc.ABC):
+    @abc.abstractmethod
+    async def create(self, job: models.TopologyImport) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def get(self, job: str) -> models.TopologyImport | None:
+        pass
+
+    @abc.abstractmethod
+    async def set_state(self, job: str, state: models.TopologyImportState, error: str | None = None) -> None:
+        """Изменяет состояние задачи. Для завершенных задач сохраняется время завершения"""
+
+    @abc.abstractmethod
+    async def add_progress(self, job: str, rows: int, errors: typing.Sequence[models.TopologyImportRowError]) -> None:
+        """Учитывает обработанные строки и сохраняет ошибки строк"""
+
+    @abc.abstractmethod
+    async def get_errors(self, job: str, offset: int, limit: int) -> list[models.TopologyImportRowError]:
+        pass
+
+
+class RedisTopologyImportsStorage(TopologyImportsStorage):
+    JOB_KEY: typing.ClassVar[str] = "topology_import@{}"
+    ERRORS_KEY: typing.ClassVar[str] = "topology_import:errors@{}"
+
+    def __init__(self, client_factory: factories.RedisClientFactory):
+        self.client = client_factory()
+        self.ttl = settings.topology_settings.IMPORT_JOB_TTL
+        self.max_errors = settings.topology_settings.IMPORT_MAX_ERRORS
+
+    async def create(self, job: models.TopologyImport) -> None:
+        fields = {name: value for name, value in job.model_dump(mode="json").items() if value is not None}
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.JOB_KEY.format(job.id), mapping=fields)
+            pipe.expire(self.JOB_KEY.format(job.id), self.ttl)
+            await pipe.execute()
+
+    async def get(self, job: str) -> models.TopologyImport | None:
+        fields = await self.client.hgetall(self.JOB_KEY.format(job))
+        if not fields:
+            return None
+        return models.TopologyImport.model_validate({name.decode(): value.decode() for name, value in fields.items()})
+
+    async def set_state(self, job: str, state: models.TopologyImportState, error: str | None = None) -> None:
+        fields = {"state": state.value}
+        if error is not None:
+            fields["error"] = error
+        if state in (models.TopologyImportState.COMPLETED, models.TopologyImportState.FAILED):
+            fields["finished_at"] = datetime.datetime.now().isoformat()
+        await self.client.hset(self.JOB_KEY.format(job), mapping=fields)
+
+    async def add_progress(self, job: str, rows: int, errors: typing.Sequence[models.TopologyImportRowError]) -> None:
+        key, errors_key = self.JOB_KEY.format(job), self.ERRORS_KEY.format(job)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "rows", rows)
+            pipe.hincrby(key, "failed", len(errors))
+            if errors:
+                pipe.rpush(errors_key, *(error.model_dump_json() for error in errors))
+                pipe.ltrim(errors_key, 0, self.max_errors - 1)
+                pipe.expire(errors_key, self.ttl)
+            await pipe.execute()
+
+    async def get_errors(self, job: str, offset: int, limit: int) -> list[models.TopologyImportRowError]:
+        errors = await self.client.lrange(self.ERRORS_KEY.format(job), offset, offset + limit - 1)
+        return [models.TopologyImportRowError.model_validate_json(error) for error in errors]
@@ -0,0 +1,149 @@
+"""
+In-process индекс принадлежности устройств узлам и узлов владельцам для проверки входящих показателей.
+
+Индекс хранится в двух массивах, индексированных идентификатором: устройство -> узел и
+узел -> владелец, 0 - сущность неизвестна. Идентификаторы выдаются автоинкрементом подряд,
+поэтому массивы компактны, а проверка выполняется за O(1) без обращения к БД.
+
+Индекс загружается при старте приложения и пополняется событиями о добавлении узлов и устройств.
+Сущности, добавленные другими процессами, при первом обращении дочитываются из БД одним запросом,
+неизвестные идентификаторы запоминаются на ``TOPOLOGY_INDEX_NEGATIVE_TTL``.
+"""
+
+import abc
+import array
+import functools
+import typing
+
+import sqlalchemy
+
+from infrastructire import caches, factories, logging, metrics, orm, settings
+
+misses = metrics.registry.counter("topology_index_misses", "Обращения к БД при промахе индекса топологии")
+
+
+class TopologyIndex(abc.ABC):
+    @abc.abstractmethod
+    async def unknown_nests(self, nests: typing.Iterable[int]) -> set[int]:
+        """Возвращает несуществующие узлы"""
+
+    @abc.abstractmethod
+    async def mismatched_devices(self, devices: typing.Mapping[int, int]) -> set[int]:
+        """Возвращает устройства из пар устройство -> узел, которые не существуют или принадлежат другому узлу"""
+
+
+class DisabledTopologyIndex(TopologyIndex):
+    async def unknown_nests(self, nests: typing.Iterable[int]) -> set[int]:
+        return set()
+
+    async def mismatched_devices(self, devices: typing.Mapping[int, int]) -> set[int]:
+        return set()
+
+
+class InProcessTopologyIndex(TopologyIndex):
+    # Максимальное количество запоминаемых неизвестных идентификаторов
+    NEGATIVE_MAX_SIZE: typing.ClassVar[int] = 100_000
+
+    def __init__(self, negative_ttl: float):
+        self._device_nests = array.array("q")
+        self._nest_holders = array.array("q")
+        self._unknown_devices = caches.LRUCache[int, bool](
+            "topology_index_unknown_devices",
+            max_size=self.NEGATIVE_MAX_SIZE,
+            ttl=negative_ttl,
+        )
+        self._unknown_nests = caches.LRUCache[int, bool](
+            "topology_index_unknown_nests",
+            max_size=self.NEGATIVE_MAX_SIZE,
+            ttl=negative_ttl,
+        )
+        metrics.registry.gauge(
+            "topology_index_bytes",
+            "Размер индекса топологии, байт",
+            callback=lambda: (len(self._device_nests) + len(self._nest_holders)) * self._device_nests.itemsize,
+        )
+
+    @staticmethod
+    def _get(links: array.array, key: int) -> int | None:
+        return (links[key] or None) if 0 < key < len(links) else None
+
+    @staticmethod
+    def _set(links: array.array, key: int, value: int) -> None:
+        if key >= len(links):
+            # Рост с запасом, чтобы добавление подряд идущих идентификаторов не копировало массив каждый раз
+            links.frombytes(bytes(links.itemsize * (max(key + 1, len(links) * 3 // 2) - len(links))))
+        links[key] = value
+
+    def nest_of(self, device: int) -> int | None:
+        return self._get(self._device_nests, device)
+
+    def holder_of(self, nest: int) -> int | None:
+        return self._get(self._nest_holders, nest)
+
+    def add_nests(self, links: typing.Iterable[tuple[int, int]]) -> None:
+        """Добавляет пары узел -> владелец"""
+        for nest, holder in links:
+            self._set(self._nest_holders, nest, holder)
+
+    def add_devices(self, links: typing.Iterable[tuple[int, int]]) -> None:
+        """Добавляет пары устройство -> узел"""
+        for device, nest in links:
+            self._set(self._device_nests, device, nest)
+
+    async def unknown_nests(self, nests: typing.Iterable[int]) -> set[int]:
+        nests = set(nests)
+        missed = {nest for nest in nests if self.holder_of(nest) is None}
+        missed = {nest for nest in missed if self._unknown_nests.get(nest) is None}
+        if missed:
+            misses.inc()
+            async with factories.get_sql_sessionmaker()() as session:
+                result = await session.execute(
+                    sqlalchemy.select(orm.TechNest.id, orm.TechNest.holder_id).where(orm.TechNest.id.in_(missed)),
+                )
+                self.add_nests(result.tuples())
+            for nest in missed:
+                if self.holder_of(nest) is None:
+                    self._unknown_nests.set(nest, True)
+        return {nest for nest in nests if self.holder_of(nest) is None}
+
+    async def mismatched_devices(self, devices: typing.Mapping[int, int]) -> set[int]:
+        missed = {device for device in devices if self.nest_of(device) is None}
+        missed = {device for device in missed if self._unknown_devices.get(device) is None}
+        if missed:
+            misses.inc()
+            async with factories.get_sql_sessionmaker()() as session:
+                result = await session.execute(
+                    sqlalchemy.select(orm.Devices.id, orm.Devices.nest_id).where(orm.Devices.id.in_(missed)),
+                )
+                self.add_devices(result.tuples())
+            for device in missed:
+                if self.nest_of(device) is None:
+                    self._unknown_devices.set(device, True)
+        return {device for device, nest in devices.items() if self.nest_of(device) != nest}
+
+    async def load(self, chunk_size: int = 10_000) -> None:
+        """Загружает все узлы и устройства из БД порциями"""
+        async with factories.get_sql_sessionmaker()() as session:
+            for query, add in (
+                (sqlalchemy.select(orm.TechNest.id, orm.TechNest.holder_id), self.add_nests),
+                (sqlalchemy.select(orm.Devices.id, orm.Devices.nest_id), self.add_devices),
+            ):
+                result = await session.stream(query.execution_options(yield_per=chunk_size))
+                async for links in result.partitions():
+                    add(links)
+
+
+@functools.lru_cache
+def get_topology_index() -> InProcessTopologyIndex:
+    """Возвращает общий для процесса индекс топологии"""
+    return InProcessTopologyIndex(negative_ttl=settings.topology_settings.INDEX_NEGATIVE_TTL)
+
+
+async def load_topology_index() -> None:
+    try:
+        await get_topology_index().load()
+    except Exception as error:
+        # Без загрузки индекс пополняется из БД при обращениях
+        logging.logger.error(f"Failed to load topology index: {error}")
+        return
+    logging.logger.info("Topology index loaded")
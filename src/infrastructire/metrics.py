@@ -0,0 +1,132 @@
+"""
+Простейшие in-process метрики приложения: счетчики, измерители и сводки по длительностям.
+"""
+
+import threading
+import typing
+
+__all__ = (
+    "Counter",
+    "Gauge",
+    "Summary",
+    "MetricsRegistry",
+    "registry",
+)
+
+
+class Counter:
+    """Монотонно возрастающий счетчик"""
+
+    def __init__(self, name: str, description: str = "") -> None:
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Gauge:
+    """Измеритель текущего значения. Значение либо устанавливается явно, либо вычисляется через callback"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        callback: typing.Callable[[], float] | None = None,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self._value: float = 0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self.callback is not None:
+            return self.callback()
+        return self._value
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Summary:
+    """Сводка по наблюдаемым величинам (количество, сумма, максимум)"""
+
+    def __init__(self, name: str, description: str = "") -> None:
+        self.name = name
+        self.description = description
+        self.count = 0
+        self.total: float = 0
+        self.max: float = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "avg": self.total / self.count if self.count else 0,
+        }
+
+
+M = typing.TypeVar("M", Counter, Gauge, Summary)
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Summary] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_type: typing.Type[M], name: str, **kwargs) -> M:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_type(name, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_type):
+                raise TypeError(f"Metric {name} already registered as {type(metric).__name__}")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description=description)
+
+    def gauge(
+        self,
+        name: str,
+        description: str = "",
+        callback: typing.Callable[[], float] | None = None,
+    ) -> Gauge:
+        gauge = self._get_or_create(Gauge, name, description=description)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def summary(self, name: str, description: str = "") -> Summary:
+        return self._get_or_create(Summary, name, description=description)
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+
+registry = MetricsRegistry()
@@ -4,6 +4,8 @@ import sqlalchemy
 from sqlalchemy import orm
 from sqlalchemy.orm import registry
 
+from domain import geo
+
 mapper_registry = registry()
 Base = mapper_registry.generate_base()
 
@@ -71,9 +73,20 @@ class Locations(Base):
         nullable=True,
         comment="Адрес",
     )
+    geohash = sqlalchemy.Column(
+        sqlalchemy.String(geo.PRECISION),
+        nullable=True,
+        index=True,
+        default=lambda context: _location_geohash(context.get_current_parameters()),
+        comment="Geohash местоположения для поиска по области",
+    )
     nest = orm.relationship("TechNest", back_populates="location")
 
 
+def _location_geohash(parameters: dict) -> str:
+    return geo.encode(float(parameters["latitude"]), float(parameters["longitude"]))
+
+
 class Devices(Base):
     __tablename__ = "devices"
     __table_args__ = (
@@ -83,6 +96,8 @@ class Devices(Base):
             name="nest_id_device_name_unique_index",
             comment="Уникальный индекс Идентификатор узла + название устройства",
         ),
+        # Постраничная выборка устройств узла по возрастанию идентификатора
+        sqlalchemy.Index("nest_id_id_index", "nest_id", "id"),
     )
     id = sqlalchemy.Column(
         sqlalchemy.Integer,
@@ -116,6 +131,8 @@ class TechNest(Base):
             name="holder_id_device_name_unique_index",
             comment="Уникальный индекс владелец + название узла",
         ),
+        # Постраничная выборка узлов владельца по возрастанию идентификатора
+        sqlalchemy.Index("holder_id_id_index", "holder_id", "id"),
     )
     id = sqlalchemy.Column(
         sqlalchemy.Integer,
@@ -140,3 +157,25 @@ class TechNest(Base):
     location = orm.relationship("Locations", back_populates="nest")
     devices = orm.relationship("Devices", back_populates="nest")
     holder = orm.relationship("Company", back_populates="nests")
+
+
+class OutboxMessages(Base):
+    __tablename__ = "outbox_messages"
+
+    id = sqlalchemy.Column(
+        sqlalchemy.Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment="Порядковый номер сообщения",
+    )
+    body = sqlalchemy.Column(
+        sqlalchemy.LargeBinary,
+        nullable=False,
+        comment="Тело сообщения брокера",
+    )
+    created_at = sqlalchemy.Column(
+        sqlalchemy.DateTime,
+        nullable=False,
+        server_default=sqlalchemy.func.now(),
+        comment="Время записи сообщения",
+    )
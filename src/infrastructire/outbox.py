@@ -0,0 +1,185 @@
+"""
+Outbox сообщений брокера и его отправка в брокер фоновой задачей.
+
+Сообщения записываются в outbox при обработке команды, а публикуются relay пачками.
+Сообщение удаляется из outbox только после подтверждения публикации брокером, поэтому
+доставка выполняется не менее одного раза: после сбоя пачка может быть опубликована повторно.
+
+* ``outbox_messages`` - таблица БД. Сообщения команд топологии записываются в ней в той же
+  транзакции, что и изменения (см. ``SQLAlchemyUoW.publish``). Relay выбирает пачку
+  ``FOR UPDATE SKIP LOCKED`` и удаляет ее в той же транзакции после публикации, поэтому
+  несколько процессов разбирают outbox, не мешая друг другу;
+* ``outbox:events`` - stream в Redis для событий индикаторов, показатели которых хранятся в Redis.
+  Relay читает stream через группу потребителей. Сообщения, не подтвержденные relay за
+  ``OUTBOX_CLAIM_AFTER`` (например, процесс завершился при публикации), забираются повторно.
+"""
+
+import abc
+import asyncio
+import functools
+import os
+import socket
+import typing
+
+import aio_pika
+import redis.asyncio as redis
+import sqlalchemy
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import session as sql_session
+
+from infrastructire import factories, logging, metrics, orm, publishers, settings
+
+Publish = typing.Callable[[list[bytes]], typing.Awaitable[None]]
+
+published = metrics.registry.counter("outbox_published", "Сообщения, опубликованные из outbox")
+relay_failures = metrics.registry.counter("outbox_relay_failures", "Неудачные попытки публикации пачки из outbox")
+
+
+class Outbox(abc.ABC):
+    @abc.abstractmethod
+    async def put(self, bodies: typing.Sequence[bytes]) -> None:
+        """Записывает сообщения в outbox"""
+
+    @abc.abstractmethod
+    async def relay(self, publish: Publish, limit: int) -> int:
+        """Публикует до limit сообщений и удаляет их из outbox. Возвращает количество опубликованных сообщений"""
+
+
+class SQLAlchemyOutbox(Outbox):
+    def __init__(self, sessionmaker: async_sessionmaker[sql_session.AsyncSession]):
+        self.sessionmaker = sessionmaker
+
+    async def put(self, bodies: typing.Sequence[bytes]) -> None:
+        async with self.sessionmaker() as session, session.begin():
+            session.add_all(orm.OutboxMessages(body=body) for body in bodies)
+
+    async def relay(self, publish: Publish, limit: int) -> int:
+        async with self.sessionmaker() as session, session.begin():
+            query = (
+                sqlalchemy.select(orm.OutboxMessages.id, orm.OutboxMessages.body)
+                .order_by(orm.OutboxMessages.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            rows = (await session.execute(query)).all()
+            if not rows:
+                return 0
+            await publish([row.body for row in rows])
+            await session.execute(
+                sqlalchemy.delete(orm.OutboxMessages).where(orm.OutboxMessages.id.in_([row.id for row in rows]))
+            )
+        return len(rows)
+
+
+class RedisOutbox(Outbox):
+    STREAM: typing.ClassVar[str] = "outbox:events"
+    GROUP: typing.ClassVar[str] = "relay"
+
+    def __init__(self, client: redis.Redis, claim_after: float):
+        self.client = client
+        self.claim_after = int(claim_after * 1000)
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_created = False
+
+    async def put(self, bodies: typing.Sequence[bytes]) -> None:
+        if not bodies:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for body in bodies:
+                pipe.xadd(self.STREAM, {"body": body})
+            await pipe.execute()
+
+    async def _create_group(self) -> None:
+        if self._group_created:
+            return
+        try:
+            await self.client.xgroup_create(self.STREAM, self.GROUP, id="0", mkstream=True)
+        except redis.ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+        self._group_created = True
+
+    async def relay(self, publish: Publish, limit: int) -> int:
+        await self._create_group()
+        # Сначала забираются сообщения, не подтвержденные вовремя этим или другим процессом
+        _, entries, *_ = await self.client.xautoclaim(
+            self.STREAM,
+            self.GROUP,
+            self.consumer,
+            min_idle_time=self.claim_after,
+            count=limit,
+        )
+        if not entries:
+            response = await self.client.xreadgroup(self.GROUP, self.consumer, {self.STREAM: ">"}, count=limit)
+            entries = response[0][1] if response else []
+        # Удаленные из stream сообщения возвращаются без полей
+        ids = [id for id, _ in entries]
+        bodies = [fields[b"body"] for _, fields in entries if fields]
+        if bodies:
+            await publish(bodies)
+        if ids:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.xack(self.STREAM, self.GROUP, *ids)
+                pipe.xdel(self.STREAM, *ids)
+                await pipe.execute()
+        return len(bodies)
+
+
+class OutboxRelay:
+    """Публикует сообщения из outbox в брокер пачками, пока они есть, затем опрашивает outbox с интервалом"""
+
+    def __init__(
+        self,
+        outboxes: typing.Sequence[Outbox],
+        publisher: publishers.AMQPPublisher,
+        batch_size: int,
+        poll_interval: float,
+    ):
+        self.outboxes = outboxes
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    async def _publish(self, bodies: list[bytes]) -> None:
+        await self.publisher.publish_many([aio_pika.Message(body=body) for body in bodies])
+        published.inc(len(bodies))
+
+    async def relay(self) -> bool:
+        """Публикует по пачке из каждого outbox. Возвращает True, если хотя бы одна пачка была полной"""
+        full = False
+        for outbox in self.outboxes:
+            try:
+                full |= await outbox.relay(self._publish, self.batch_size) == self.batch_size
+            except Exception as error:
+                relay_failures.inc()
+                logging.logger.error(f"Failed to relay {type(outbox).__name__} messages: {error}")
+        return full
+
+    async def run(self) -> None:
+        while True:
+            if not await self.relay():
+                await asyncio.sleep(self.poll_interval)
+
+
+@functools.lru_cache
+def get_redis_outbox() -> RedisOutbox:
+    client = factories.RedisClientFactory(factories.get_redis_connection_pool())()
+    return RedisOutbox(client, claim_after=settings.outbox_settings.CLAIM_AFTER)
+
+
+async def run_outbox_relay() -> None:
+    amqp_settings = settings.Amqp()
+    outboxes: list[Outbox] = [SQLAlchemyOutbox(factories.get_sql_sessionmaker())]
+    if settings.outbox_settings.INDICATORS_ENABLED:
+        outboxes.append(get_redis_outbox())
+    relay = OutboxRelay(
+        outboxes,
+        publishers.AMQPPublisher(
+            url=settings.get_amqp_url(),
+            routing_key=amqp_settings.EVENTS_ROUTEING_KEY,
+            exchange_name=amqp_settings.EVENTS_EXCHANGE,
+        ),
+        batch_size=settings.outbox_settings.BATCH_SIZE,
+        poll_interval=settings.outbox_settings.POLL_INTERVAL,
+    )
+    await relay.run()
@@ -0,0 +1,94 @@
+"""
+Индекс времени последней активности устройств.
+
+Время приема показателей устройства записывается в sorted set, где score - время в миллисекундах:
+
+* ``last_seen:nest@{nest}`` - устройства узла, используется для выборки offline устройств
+  владельца через ``ZRANGEBYSCORE`` по его узлам;
+* ``last_seen:devices`` - все устройства (``{nest}:{device}``), используется фоновым поиском
+  offline устройств. Найденные устройства атомарно удаляются из индекса, чтобы событие
+  отправлялось один раз, и возвращаются в него при следующем приеме показателей.
+"""
+
+import abc
+import datetime
+import time
+import typing
+
+from domain import models
+from infrastructire import factories
+
+_POP_OFFLINE_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #members, 2 do
+    redis.call('ZREM', KEYS[1], members[i])
+end
+return members
+"""
+
+
+def _to_score(value: datetime.datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def _from_score(score: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(score / 1000)
+
+
+class DevicesLastSeenIndex(abc.ABC):
+    @abc.abstractmethod
+    async def touch(self, devices: typing.Mapping[int, int]) -> None:
+        """Отмечает устройства (идентификатор устройства -> идентификатор узла) активными в текущий момент"""
+
+    @abc.abstractmethod
+    async def get_offline(self, nests: typing.Sequence[int], since: datetime.datetime) -> list[models.DeviceLastSeen]:
+        """Возвращает устройства узлов, не активные с момента since"""
+
+    @abc.abstractmethod
+    async def pop_offline(self, before: datetime.datetime, limit: int) -> list[models.DeviceLastSeen]:
+        """Извлекает из индекса до limit устройств, не активных с момента before"""
+
+
+class RedisDevicesLastSeenIndex(DevicesLastSeenIndex):
+    NEST_PREFIX: typing.ClassVar[str] = "last_seen:nest@{}"
+    DEVICES_KEY: typing.ClassVar[str] = "last_seen:devices"
+
+    def __init__(self, client_factory: factories.RedisClientFactory):
+        self.client = client_factory()
+        self._pop_offline = self.client.register_script(_POP_OFFLINE_SCRIPT)
+
+    async def touch(self, devices: typing.Mapping[int, int]) -> None:
+        if not devices:
+            return
+        score = int(time.time() * 1000)
+        nests: dict[int, dict[int, int]] = {}
+        for device, nest in devices.items():
+            nests.setdefault(nest, {})[device] = score
+        async with self.client.pipeline(transaction=False) as pipe:
+            for nest, members in nests.items():
+                pipe.zadd(self.NEST_PREFIX.format(nest), members)
+            pipe.zadd(self.DEVICES_KEY, {f"{nest}:{device}": score for device, nest in devices.items()})
+            await pipe.execute()
+
+    async def get_offline(self, nests: typing.Sequence[int], since: datetime.datetime) -> list[models.DeviceLastSeen]:
+        if not nests:
+            return []
+        async with self.client.pipeline(transaction=False) as pipe:
+            for nest in nests:
+                pipe.zrangebyscore(self.NEST_PREFIX.format(nest), "-inf", f"({_to_score(since)}", withscores=True)
+            results = await pipe.execute()
+        return [
+            models.DeviceLastSeen(nest=nest, device=int(device), last_seen=_from_score(score))
+            for nest, members in zip(nests, results)
+            for device, score in members
+        ]
+
+    async def pop_offline(self, before: datetime.datetime, limit: int) -> list[models.DeviceLastSeen]:
+        members = await self._pop_offline(keys=[self.DEVICES_KEY], args=[_to_score(before), limit])
+        result = []
+        for member, score in zip(members[::2], members[1::2]):
+            nest, device = member.decode().split(":")
+            result.append(
+                models.DeviceLastSeen(nest=int(nest), device=int(device), last_seen=_from_score(float(score)))
+            )
+        return result
@@ -0,0 +1,108 @@
+"""
+Модели чтения топологии, поддерживаемые обработчиками доменных событий.
+
+Узлы владельца вместе с местоположением и устройствами хранятся в hash
+``topology:projection:holder_nests@{holder}``: поле на каждый узел, значение - узел в JSON.
+Поле ``built`` отмечает, что модель заполнена целиком. Пока его нет, модель считается
+не построенной и чтение идет в БД, после чего модель достраивается.
+
+События записывают узлы поверх имеющихся, а достройка по данным БД заполняет только
+отсутствующие поля, поэтому прочитанные раньше события данные не перетирают более новые.
+Модель хранится ``TOPOLOGY_PROJECTION_TTL``, что ограничивает время жизни возможных расхождений.
+"""
+
+import abc
+import typing
+
+import redis.asyncio as redis
+
+from domain import models
+from infrastructire import factories, logging, settings
+
+
+class HolderNestsProjection(abc.ABC):
+    @abc.abstractmethod
+    async def get(self, holder: int) -> list[models.TechNest] | None:
+        """Возвращает узлы владельца в порядке идентификаторов или None, если модель не построена"""
+
+    @abc.abstractmethod
+    async def build(self, holder: int, nests: typing.Sequence[models.TechNest]) -> None:
+        """Достраивает модель по данным БД: добавляет отсутствующие узлы и отмечает модель заполненной"""
+
+    @abc.abstractmethod
+    async def put(self, nest: models.TechNest) -> None:
+        """Записывает узел поверх имеющегося"""
+
+    @abc.abstractmethod
+    async def drop(self, holders: typing.Iterable[int]) -> None:
+        """Удаляет модели владельцев, они будут построены заново при следующем чтении"""
+
+
+class DisabledHolderNestsProjection(HolderNestsProjection):
+    async def get(self, holder: int) -> list[models.TechNest] | None:
+        return None
+
+    async def build(self, holder: int, nests: typing.Sequence[models.TechNest]) -> None:
+        pass
+
+    async def put(self, nest: models.TechNest) -> None:
+        pass
+
+    async def drop(self, holders: typing.Iterable[int]) -> None:
+        pass
+
+
+class RedisHolderNestsProjection(HolderNestsProjection):
+    KEY: typing.ClassVar[str] = "topology:projection:holder_nests@{}"
+    BUILT_FIELD: typing.ClassVar[str] = "built"
+
+    def __init__(self, client_factory: factories.RedisClientFactory):
+        self.client = client_factory()
+        self.ttl = settings.topology_settings.PROJECTION_TTL
+
+    async def get(self, holder: int) -> list[models.TechNest] | None:
+        try:
+            fields = await self.client.hgetall(self.KEY.format(holder))
+        except redis.RedisError as error:
+            logging.logger.warning(f"Topology projection is unavailable: {error}")
+            return None
+        if self.BUILT_FIELD.encode() not in fields:
+            return None
+        nests = [
+            models.TechNest.model_validate_json(value)
+            for field, value in fields.items()
+            if field != self.BUILT_FIELD.encode()
+        ]
+        return sorted(nests, key=lambda nest: nest.id)
+
+    async def build(self, holder: int, nests: typing.Sequence[models.TechNest]) -> None:
+        key = self.KEY.format(holder)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                for nest in nests:
+                    pipe.hsetnx(key, str(nest.id), nest.model_dump_json())
+                pipe.hset(key, self.BUILT_FIELD, 1)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except redis.RedisError as error:
+            logging.logger.warning(f"Failed to build topology projection of holder {holder}: {error}")
+
+    async def put(self, nest: models.TechNest) -> None:
+        key = self.KEY.format(nest.holder_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, str(nest.id), nest.model_dump_json())
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except redis.RedisError as error:
+            # Модель не узнает об узле до истечения TOPOLOGY_PROJECTION_TTL
+            logging.logger.error(f"Failed to project nest {nest.id}: {error}")
+
+    async def drop(self, holders: typing.Iterable[int]) -> None:
+        keys = [self.KEY.format(holder) for holder in holders]
+        if not keys:
+            return
+        try:
+            await self.client.delete(*keys)
+        except redis.RedisError as error:
+            logging.logger.error(f"Failed to drop topology projections: {error}")
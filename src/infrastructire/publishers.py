@@ -52,6 +52,16 @@ class AMQPPublisher(EventPublisher[abc.AbstractExchange]):
             )
             await exchange.publish(message=message, routing_key=self.routing_key)
 
+    async def publish_many(self, messages: typing.Sequence[abc.AbstractMessage]) -> None:
+        """Публикует пачку сообщений через один канал"""
+        async with self.channel_pool.acquire() as channel:
+            exchange: aio_pika.Exchange = await channel.declare_exchange(
+                self.exchange_name, type="topic", auto_delete=False
+            )
+            await asyncio.gather(
+                *(exchange.publish(message=message, routing_key=self.routing_key) for message in messages)
+            )
+
 
 class AbstractFromAmqpToWebsocketPublisher(EventPublisher[fastapi.WebSocket], abc.ABC):
     channel: fastapi.WebSocket
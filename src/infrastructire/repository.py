@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import abc
 import functools
+import heapq
 import re
 import typing
 
 import sqlalchemy
 from sqlalchemy import exc
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.asyncio import session as sql_session
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, noload, selectinload
 
-from domain import exceptions, models
+from domain import exceptions, geo, models
 from infrastructire import orm
 
 N = typing.TypeVar("N", bound=models.TechNest, contravariant=True)
@@ -19,6 +21,11 @@ H = typing.TypeVar("H", bound=models.Holder, contravariant=True)
 D = typing.TypeVar("D", bound=models.Device, contravariant=True)
 
 
+def _collation_key(value: typing.Any) -> typing.Any:
+    """Приводит строку к виду, в котором ее сравнивает БД: без учета регистра и завершающих пробелов"""
+    return value.rstrip(" ").casefold() if isinstance(value, str) else value
+
+
 class Repository(abc.ABC):
     @abc.abstractmethod
     async def add_holder(self, item: H) -> int:
@@ -29,33 +36,113 @@ class Repository(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def get_nest(self, nest_id: int) -> N | None:
-        pass
+    async def merge_holders(self, items: typing.Sequence[H]) -> list[int]:
+        """
+        Создает пачкой отсутствующих владельцев, существующие (по ИНН и КПП) не изменяются.
+
+        Возвращает идентификаторы владельцев в порядке items.
+        """
+
+    @abc.abstractmethod
+    async def merge_nests(self, items: typing.Sequence[N]) -> list[int]:
+        """
+        Создает пачкой отсутствующие узлы (по владельцу и названию) и их локации (по адресу).
+
+        Существующие узлы не изменяются. Возвращает идентификаторы узлов в порядке items.
+        """
+
+    @abc.abstractmethod
+    async def merge_devices(self, items: typing.Sequence[D]) -> list[int]:
+        """
+        Создает пачкой отсутствующие устройства (по узлу и названию), существующие не изменяются.
+
+        Возвращает идентификаторы устройств в порядке items.
+        """
+
+    @abc.abstractmethod
+    async def get_nest(self, nest_id: int, with_devices: bool = False) -> N | None:
+        """Возвращает узел. При with_devices узел возвращается вместе с устройствами"""
 
     @abc.abstractmethod
     async def add_device(self, item: D) -> int:
         pass
 
     @abc.abstractmethod
-    async def get_holder(self, holder: int) -> H | None:
-        pass
+    async def get_holder(self, holder: int, with_nests: bool = False) -> H | None:
+        """Возвращает владельца. При with_nests вместе с владельцем загружаются его узлы с устройствами"""
 
     @abc.abstractmethod
-    async def get_nests_by_holder(self, holder: int) -> list[N]:
-        pass
+    async def get_nests_by_holder(self, holder: int, after: int | None = None, limit: int | None = None) -> list[N]:
+        """
+        Возвращает узлы владельца вместе с устройствами.
+
+        При after/limit возвращает страницу узлов с идентификатором больше after по возрастанию идентификатора.
+        """
+
+    @abc.abstractmethod
+    def stream_nests_by_holder(
+        self,
+        holder: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> typing.AsyncIterator[N]:
+        """Отдает страницу узлов владельца с устройствами потоком, не загружая узлы в память целиком"""
+
+    @abc.abstractmethod
+    async def get_nests(self, nest_ids: typing.Sequence[int]) -> list[N]:
+        """Возвращает узлы вместе с устройствами и локацией одним запросом"""
 
     @abc.abstractmethod
     async def get_nests_by_location(self, location: int) -> list[N]:
-        pass
+        """Возвращает узлы с устройствами, расположенные в локации"""
 
     @abc.abstractmethod
-    async def get_devices(self, nest: int) -> list[D]:
-        pass
+    async def get_nests_in_area(self, area: geo.BoundingBox, limit: int) -> list[N]:
+        """Возвращает до limit узлов с устройствами, расположенных в области, по возрастанию идентификатора"""
+
+    @abc.abstractmethod
+    async def get_nests_near(self, point: geo.Point, radius: float, limit: int) -> list[tuple[N, float]]:
+        """Возвращает до limit ближайших к точке узлов в радиусе radius метров вместе с расстоянием до них"""
+
+    @abc.abstractmethod
+    async def get_devices(self, nest: int, after: int | None = None, limit: int | None = None) -> list[D]:
+        """Возвращает устройства узла. При after/limit - страницу устройств по возрастанию идентификатора"""
+
+    @abc.abstractmethod
+    def stream_devices(
+        self,
+        nest: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> typing.AsyncIterator[D]:
+        """Отдает страницу устройств узла потоком, не загружая устройства в память целиком"""
+
+    async def on_commit(self) -> None:
+        """Вызывается единицей работы после успешной фиксации транзакции"""
 
 
 class SQLAlchemyRepository(Repository):
+    """
+    Репозиторий поверх сессии SQLAlchemy.
+
+    Репозиторий создается на транзакцию и хранит карту идентичности загруженных владельцев,
+    узлов и устройств, поэтому повторные обращения к одним и тем же сущностям внутри
+    транзакции не выполняют запросов. Связанные коллекции загружаются через ``selectinload`` -
+    одним запросом на тип сущности.
+    """
+
+    # Количество строк, получаемых из курсора БД за раз при потоковой выборке
+    STREAM_CHUNK_SIZE: typing.ClassVar[int] = 500
+    # Максимальное количество ячеек geohash, покрывающих область поиска
+    GEO_MAX_CELLS: typing.ClassVar[int] = 16
+
     def __init__(self, session: sql_session.AsyncSession):
         self.session = session
+        self._holders: dict[int, models.Holder | None] = {}
+        self._nests: dict[int, models.TechNest | None] = {}
+        # Узлы, для которых загружены устройства
+        self._nests_with_devices: set[int] = set()
+        self._holders_nests: dict[int, list[int]] = {}
 
     @staticmethod
     def duplicate_entity_handler(func):
@@ -67,6 +154,7 @@ class SQLAlchemyRepository(Repository):
                 err_msg = err.args[0]
                 if re.match("(.*)Duplicate entry(.*)for key", err_msg):
                     raise exceptions.AlreadyExists(message="Entity already exists", path=list(err.params))
+                raise
 
         return async_wrapper
 
@@ -75,27 +163,54 @@ class SQLAlchemyRepository(Repository):
         holder_orm = orm.Company(**item.model_dump(mode="json"))
         self.session.add(holder_orm)
         await self.session.flush()
+        self._holders.pop(holder_orm.id, None)
         return holder_orm.id
 
-    async def _get_location_id(self, location: L) -> int | None:
-        result = await self.session.execute(sqlalchemy.select(orm.Locations).filter_by(address=location.address))
-        location = result.scalar()
-        return location.id if location else None
+    async def _upsert_location(self, location: L) -> int:
+        """
+        Возвращает идентификатор местоположения с адресом location, добавляя его при отсутствии.
+
+        Один запрос: при совпадении адреса LAST_INSERT_ID(id) возвращает идентификатор существующей записи.
+        """
+        query = mysql.insert(orm.Locations).values(**location.model_dump(mode="json", exclude={"id"}))
+        query = query.on_duplicate_key_update(id=sqlalchemy.func.last_insert_id(orm.Locations.id))
+        result = await self.session.execute(query)
+        return result.lastrowid
+
+    async def _upsert_locations(self, locations: typing.Sequence[L]) -> list[int]:
+        """
+        Пакетный вариант _upsert_location: одна вставка всех местоположений и одна выборка идентификаторов.
+
+        Выборка блокирующая, поэтому видит записи, добавленные конкурирующими транзакциями
+        после начала текущей, - обычное чтение в REPEATABLE READ их бы не вернуло. Адреса, совпавшие
+        с существующими только с точностью до сравнения в БД (регистр, пробелы), уточняются по одному.
+        """
+        # Одинаковый порядок вставки снижает вероятность взаимной блокировки конкурирующих пачек
+        values = {
+            location.address: location.model_dump(mode="json", exclude={"id"})
+            for location in sorted(locations, key=lambda location: location.address)
+        }
+        query = mysql.insert(orm.Locations)
+        await self.session.execute(query.on_duplicate_key_update(id=orm.Locations.id), list(values.values()))
+        result = await self.session.execute(
+            sqlalchemy.select(orm.Locations.id, orm.Locations.address)
+            .where(orm.Locations.address.in_(values))
+            .with_for_update(read=True),
+        )
+        ids = {row.address: row.id for row in result}
+        for location in locations:
+            if location.address not in ids:
+                ids[location.address] = await self._upsert_location(location)
+        return [ids[location.address] for location in locations]
 
     @duplicate_entity_handler
     async def add_nest(self, item: N) -> int:
-        item_dict = item.model_dump(mode="json")
-        item_dict.pop("location")
-        item_dict.pop("devices")
-        exists_location: int | None = await self._get_location_id(item.location)
-        if exists_location is None:
-            location_orm = orm.Locations(**item.location.model_dump(mode="json"))
-            item_dict["location"] = location_orm
-        else:
-            item_dict["location_id"] = exists_location
-        nest_orm = orm.TechNest(**item_dict)
+        location_id = await self._upsert_location(item.location)
+        nest_orm = orm.TechNest(name=item.name, holder_id=item.holder_id, location_id=location_id)
         self.session.add(nest_orm)
         await self.session.flush()
+        self._nests.pop(nest_orm.id, None)
+        self._holders_nests.pop(item.holder_id, None)
         return nest_orm.id
 
     @duplicate_entity_handler
@@ -103,31 +218,272 @@ class SQLAlchemyRepository(Repository):
         orm_device = orm.Devices(**item.model_dump(mode="json"))
         self.session.add(orm_device)
         await self.session.flush()
+        self._nests_with_devices.discard(item.nest_id)
         return orm_device.id
 
-    async def get_holder(self, holder_id: int) -> H | None:
-        result = await self.session.execute(sqlalchemy.select(orm.Company).filter_by(id=holder_id))
-        holder = result.scalar()
-        return models.Holder.model_validate(holder) if holder else None
+    async def _merge(
+        self,
+        model: typing.Type[orm.Base],
+        items: typing.Sequence[dict[str, typing.Any]],
+        key: tuple[str, ...],
+        where: sqlalchemy.ColumnElement[bool],
+    ) -> list[int]:
+        """
+        Вставляет отсутствующие записи одним запросом и возвращает идентификаторы записей в порядке items.
 
-    async def get_nests_by_holder(self, holder: int) -> list[N]:
-        nests_result = await self.session.execute(
-            sqlalchemy.select(orm.TechNest).filter_by(holder_id=holder).options(joinedload("*"))
+        key - имена колонок естественного ключа, where - условие выборки существующих записей по ключам items.
+        Строковые ключи сравниваются так же, как в БД (см. _collation_key).
+        """
+        table = model.__table__
+        query = sqlalchemy.select(table.c.id, *(table.c[name] for name in key)).where(where)
+
+        def natural_key(row: typing.Mapping[str, typing.Any]) -> tuple:
+            return tuple(_collation_key(row[name]) for name in key)
+
+        ids = {natural_key(row._mapping): row.id for row in await self.session.execute(query)}
+        missing = {natural_key(item): item for item in items if natural_key(item) not in ids}
+        if missing:
+            await self.session.execute(sqlalchemy.insert(table), list(missing.values()))
+            ids.update((natural_key(row._mapping), row.id) for row in await self.session.execute(query))
+        return [ids[natural_key(item)] for item in items]
+
+    @duplicate_entity_handler
+    async def merge_holders(self, items: typing.Sequence[H]) -> list[int]:
+        if not items:
+            return []
+        holders = [item.model_dump(mode="json", exclude={"id"}) for item in items]
+        ids = await self._merge(
+            orm.Company,
+            holders,
+            key=("inn", "kpp"),
+            where=orm.Company.inn.in_({holder["inn"] for holder in holders}),
+        )
+        for holder_id in ids:
+            self._holders.pop(holder_id, None)
+        return ids
+
+    @duplicate_entity_handler
+    async def merge_nests(self, items: typing.Sequence[N]) -> list[int]:
+        if not items:
+            return []
+        location_ids = await self._upsert_locations([item.location for item in items])
+        nests = [
+            {"name": item.name, "holder_id": item.holder_id, "location_id": location_id}
+            for item, location_id in zip(items, location_ids)
+        ]
+        ids = await self._merge(
+            orm.TechNest,
+            nests,
+            key=("holder_id", "name"),
+            where=sqlalchemy.and_(
+                orm.TechNest.holder_id.in_({nest["holder_id"] for nest in nests}),
+                orm.TechNest.name.in_({nest["name"] for nest in nests}),
+            ),
+        )
+        for item, nest_id in zip(items, ids):
+            self._nests.pop(nest_id, None)
+            self._holders_nests.pop(item.holder_id, None)
+        return ids
+
+    @duplicate_entity_handler
+    async def merge_devices(self, items: typing.Sequence[D]) -> list[int]:
+        if not items:
+            return []
+        devices = [item.model_dump(mode="json", exclude={"id"}) for item in items]
+        ids = await self._merge(
+            orm.Devices,
+            devices,
+            key=("nest_id", "name"),
+            where=sqlalchemy.and_(
+                orm.Devices.nest_id.in_({device["nest_id"] for device in devices}),
+                orm.Devices.name.in_({device["name"] for device in devices}),
+            ),
+        )
+        for item in items:
+            self._nests_with_devices.discard(item.nest_id)
+        return ids
+
+    @staticmethod
+    def _nest_options(with_devices: bool) -> list:
+        return [
+            joinedload(orm.TechNest.location),
+            selectinload(orm.TechNest.devices) if with_devices else noload(orm.TechNest.devices),
+        ]
+
+    def _remember_nests(self, nests: typing.Iterable[orm.TechNest], with_devices: bool) -> list[models.TechNest]:
+        result = []
+        for nest_orm in nests:
+            nest = models.TechNest.model_validate(nest_orm)
+            self._nests[nest.id] = nest
+            if with_devices:
+                self._nests_with_devices.add(nest.id)
+            result.append(nest)
+        return result
+
+    @staticmethod
+    def _keyset(query: sqlalchemy.Select, column, after: int | None, limit: int | None) -> sqlalchemy.Select:
+        """Ограничивает запрос страницей записей со значением column больше after по возрастанию"""
+        if after is not None:
+            query = query.where(column > after)
+        return query.order_by(column).limit(limit)
+
+    async def _load_nests(
+        self,
+        *where,
+        with_devices: bool,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[models.TechNest]:
+        query = (
+            sqlalchemy.select(orm.TechNest)
+            .where(*where)
+            .options(*self._nest_options(with_devices))
+            # Узлы, ранее загруженные в сессию без устройств, перезаполняются
+            .execution_options(populate_existing=True)
         )
-        nests = nests_result.unique().scalars().all()
-        return list(map(models.TechNest.model_validate, nests))
+        nests_result = await self.session.execute(self._keyset(query, orm.TechNest.id, after, limit))
+        return self._remember_nests(nests_result.unique().scalars().all(), with_devices)
+
+    async def _load_devices(self, nests: list[models.TechNest]) -> None:
+        nests = [nest for nest in nests if nest.id not in self._nests_with_devices]
+        if not nests:
+            return
+        devices: dict[int, list[models.Device]] = {nest.id: [] for nest in nests}
+        result = await self.session.execute(sqlalchemy.select(orm.Devices).where(orm.Devices.nest_id.in_(devices)))
+        for device in result.scalars().all():
+            devices[device.nest_id].append(models.Device.model_validate(device))
+        for nest in nests:
+            nest.devices = devices[nest.id]
+            self._nests_with_devices.add(nest.id)
+
+    async def get_holder(self, holder: int, with_nests: bool = False) -> H | None:
+        if holder in self._holders and (not with_nests or holder in self._holders_nests):
+            return self._holders[holder]
+        query = sqlalchemy.select(orm.Company).filter_by(id=holder)
+        if with_nests:
+            query = query.options(
+                selectinload(orm.Company.nests).options(*self._nest_options(with_devices=True)),
+            ).execution_options(populate_existing=True)
+        result = await self.session.execute(query)
+        holder_orm = result.scalar()
+        self._holders[holder] = models.Holder.model_validate(holder_orm) if holder_orm else None
+        if with_nests:
+            nests = self._remember_nests(holder_orm.nests if holder_orm else [], with_devices=True)
+            self._holders_nests[holder] = [nest.id for nest in nests]
+        return self._holders[holder]
+
+    async def get_nests_by_holder(self, holder: int, after: int | None = None, limit: int | None = None) -> list[N]:
+        if after is not None or limit is not None:
+            return await self._load_nests(orm.TechNest.holder_id == holder, with_devices=True, after=after, limit=limit)
+        if holder not in self._holders_nests:
+            nests = await self._load_nests(orm.TechNest.holder_id == holder, with_devices=True)
+            self._holders_nests[holder] = [nest.id for nest in nests]
+        return [self._nests[nest_id] for nest_id in self._holders_nests[holder]]
+
+    async def stream_nests_by_holder(
+        self,
+        holder: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> typing.AsyncIterator[N]:
+        query = (
+            sqlalchemy.select(orm.TechNest).where(orm.TechNest.holder_id == holder).options(*self._nest_options(True))
+        )
+        result = await self.session.stream_scalars(
+            self._keyset(query, orm.TechNest.id, after, limit).execution_options(yield_per=self.STREAM_CHUNK_SIZE),
+        )
+        async for nest_orm in result:
+            yield models.TechNest.model_validate(nest_orm)
+
+    async def get_nests(self, nest_ids: typing.Sequence[int]) -> list[N]:
+        missed = [nest_id for nest_id in nest_ids if nest_id not in self._nests]
+        if missed:
+            await self._load_nests(orm.TechNest.id.in_(missed), with_devices=True)
+            for nest_id in missed:
+                self._nests.setdefault(nest_id, None)
+        nests = [self._nests[nest_id] for nest_id in nest_ids if self._nests.get(nest_id) is not None]
+        await self._load_devices(nests)
+        return nests
 
     async def get_nests_by_location(self, location: int) -> list[N]:
-        pass
+        return await self._load_nests(orm.TechNest.location_id == location, with_devices=True)
+
+    def _area_condition(self, area: geo.BoundingBox) -> sqlalchemy.ColumnElement[bool]:
+        """
+        Условие попадания локации в область: префиксы geohash по индексу, затем точные координаты.
 
-    async def get_nest(self, nest_id: int) -> N | None:
-        result = await self.session.execute(sqlalchemy.select(orm.TechNest).filter_by(id=nest_id))
-        return result.scalar()
+        Локации, созданные до появления geohash (geohash IS NULL), проверяются только по координатам.
+        """
+        conditions = []
+        for box in area.split():
+            condition = sqlalchemy.and_(
+                orm.Locations.latitude.between(box.south, box.north),
+                orm.Locations.longitude.between(box.west, box.east),
+            )
+            cells = geo.cover(box, self.GEO_MAX_CELLS)
+            if cells:
+                prefixes = (orm.Locations.geohash.like(f"{cell}%") for cell in cells)
+                condition = sqlalchemy.and_(sqlalchemy.or_(orm.Locations.geohash.is_(None), *prefixes), condition)
+            conditions.append(condition)
+        return sqlalchemy.or_(*conditions)
 
-    async def get_devices(self, nest: int) -> list[D]:
-        existed_nest = await self.get_nest(nest_id=nest)
+    async def get_nests_in_area(self, area: geo.BoundingBox, limit: int) -> list[N]:
+        result = await self.session.execute(
+            sqlalchemy.select(orm.TechNest.id)
+            .join(orm.TechNest.location)
+            .where(self._area_condition(area))
+            .order_by(orm.TechNest.id)
+            .limit(limit)
+        )
+        return await self.get_nests(result.scalars().all())
+
+    async def get_nests_near(self, point: geo.Point, radius: float, limit: int) -> list[tuple[N, float]]:
+        # Кандидаты выбираются без загрузки узлов, полностью загружаются только ближайшие
+        result = await self.session.execute(
+            sqlalchemy.select(orm.TechNest.id, orm.Locations.latitude, orm.Locations.longitude)
+            .join(orm.TechNest.location)
+            .where(self._area_condition(geo.around(point, radius)))
+        )
+        distances = {
+            nest_id: geo.distance(point, geo.Point(float(latitude), float(longitude)))
+            for nest_id, latitude, longitude in result.all()
+        }
+        nearest = heapq.nsmallest(
+            limit,
+            (nest_id for nest_id, distance in distances.items() if distance <= radius),
+            key=distances.__getitem__,
+        )
+        return [(nest, distances[nest.id]) for nest in await self.get_nests(nearest)]
+
+    async def get_nest(self, nest_id: int, with_devices: bool = False) -> N | None:
+        if nest_id not in self._nests:
+            nests = await self._load_nests(orm.TechNest.id == nest_id, with_devices=with_devices)
+            if not nests:
+                self._nests[nest_id] = None
+        nest = self._nests[nest_id]
+        if nest is not None and with_devices:
+            await self._load_devices([nest])
+        return nest
+
+    async def get_devices(self, nest: int, after: int | None = None, limit: int | None = None) -> list[D]:
+        existed_nest = await self.get_nest(nest_id=nest, with_devices=after is None and limit is None)
         if existed_nest is None:
             raise exceptions.NotFound(f"Nest with nest_id {nest} not found")
-        result = await self.session.execute(sqlalchemy.select(orm.Devices).filter_by(nest_id=nest))
-        devices = result.scalars().all()
-        return list(map(models.Device.model_validate, devices))
+        if after is None and limit is None:
+            return existed_nest.devices
+        query = sqlalchemy.select(orm.Devices).where(orm.Devices.nest_id == nest)
+        result = await self.session.execute(self._keyset(query, orm.Devices.id, after, limit))
+        return [models.Device.model_validate(device) for device in result.scalars().all()]
+
+    async def stream_devices(
+        self,
+        nest: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> typing.AsyncIterator[D]:
+        query = sqlalchemy.select(orm.Devices).where(orm.Devices.nest_id == nest)
+        result = await self.session.stream_scalars(
+            self._keyset(query, orm.Devices.id, after, limit).execution_options(yield_per=self.STREAM_CHUNK_SIZE),
+        )
+        async for device in result:
+            yield models.Device.model_validate(device)
@@ -1,6 +1,8 @@
+import decimal
 import functools
 import importlib.metadata
 import os
+import typing
 
 import dotenv
 import pydantic
@@ -19,10 +21,43 @@ class Db(pydantic_settings.BaseSettings, case_sensitive=True):
     USER: str
     PASSWORD: str
 
+    ISOLATION_LEVEL: str = pydantic.Field(default="REPEATABLE READ")
+    POOL_SIZE: int = pydantic.Field(default=10, gt=0)
+    MAX_OVERFLOW: int = pydantic.Field(default=20, ge=0)
+    POOL_TIMEOUT: float = pydantic.Field(default=30.0, description="Время ожидания свободного соединения, сек")
+    POOL_RECYCLE: int = pydantic.Field(default=3600, description="Время жизни соединения, сек")
+    POOL_PRE_PING: bool = pydantic.Field(default=True)
+
+    REPLICA_HOSTS: str = pydantic.Field(
+        default="",
+        description="Реплики для запросов на чтение через запятую: host или host:port. Пусто - чтение с основной БД",
+    )
+    REPLICA_RETRY_AFTER: float = pydantic.Field(
+        default=30.0,
+        gt=0,
+        description="Время, на которое недоступная реплика исключается из выбора, сек",
+    )
+    REPLICA_STICKINESS: float = pydantic.Field(
+        default=0.0,
+        ge=0,
+        description="Время после фиксации записи, в течение которого чтение идет с основной БД, сек. 0 - отключено",
+    )
+
     @property
     def dsn(self) -> pydantic.MySQLDsn:
+        return self._dsn(self.HOSTNAME, self.PORT)
+
+    @property
+    def replica_dsns(self) -> list[pydantic.MySQLDsn]:
+        result = []
+        for host in filter(None, map(str.strip, self.REPLICA_HOSTS.split(","))):
+            hostname, _, port = host.partition(":")
+            result.append(self._dsn(hostname, int(port) if port else self.PORT))
+        return result
+
+    def _dsn(self, hostname: str, port: int) -> pydantic.MySQLDsn:
         return pydantic.MySQLDsn(
-            f"mysql+asyncmy://{self.USER}:{self.PASSWORD}@{self.HOSTNAME}:{self.PORT}/{self.DATABASE}",
+            f"mysql+asyncmy://{self.USER}:{self.PASSWORD}@{hostname}:{port}/{self.DATABASE}",
         )
 
     model_config = pydantic_settings.SettingsConfigDict(env_prefix="MYSQL_")
@@ -37,6 +72,12 @@ class Redis(pydantic_settings.BaseSettings, case_sensitive=True):
     DATABASE: int
     PASSWORD: str
 
+    MAX_CONNECTIONS: int = pydantic.Field(default=50, gt=0)
+    POOL_TIMEOUT: float = pydantic.Field(default=5.0, description="Время ожидания свободного соединения, сек")
+    HEALTH_CHECK_INTERVAL: int = pydantic.Field(default=30, ge=0)
+    SOCKET_TIMEOUT: float | None = pydantic.Field(default=5.0)
+    SOCKET_CONNECT_TIMEOUT: float | None = pydantic.Field(default=5.0)
+
     @property
     def dsn(self) -> pydantic.RedisDsn:
         return pydantic.RedisDsn(f"redis://{self.USER}:{self.PASSWORD}@{self.HOSTNAME}:{self.PORT}/")
@@ -60,6 +101,153 @@ class Amqp(pydantic_settings.BaseSettings, case_sensitive=True):
     model_config = pydantic_settings.SettingsConfigDict(env_prefix="AMQP_")
 
 
+class Indicators(pydantic_settings.BaseSettings, case_sensitive=True):
+    """Indicator values storage config"""
+
+    CODEC: typing.Literal["json", "msgpack"] = pydantic.Field(
+        default="json",
+        description="Формат записи значений индикаторов. Чтение поддерживает все форматы",
+    )
+    LAYOUT: typing.Literal["document", "hash"] = pydantic.Field(
+        default="document",
+        description="Раскладка значений: документом в строке или hash с полем на каждый показатель. "
+        "При переходе на hash значения документов переносятся при первом обращении",
+    )
+    HISTORY_RETENTION: int = pydantic.Field(default=7 * 24 * 60 * 60, gt=0, description="Глубина истории, сек")
+    HISTORY_CHUNK_SIZE: int = pydantic.Field(default=500, gt=0, description="Размер порции чтения истории")
+    CACHE_ENABLED: bool = pydantic.Field(default=False, description="Включает in-process кэш последних значений")
+    CACHE_MAX_SIZE: int = pydantic.Field(default=10_000, gt=0, description="Максимальное количество записей кэша")
+    CACHE_TTL: float = pydantic.Field(default=5.0, gt=0, description="Время жизни записи кэша, сек")
+    NEST_VALUES_TTL: int = pydantic.Field(
+        default=0,
+        ge=0,
+        description="Время жизни значений узла с момента записи, сек. 0 - без ограничения",
+    )
+    DEVICE_VALUES_TTL: int = pydantic.Field(
+        default=0,
+        ge=0,
+        description="Время жизни значений устройства с момента записи, сек. 0 - без ограничения. "
+        "При включенной зоне нечувствительности должно превышать DEADBAND_MAX_SILENCE",
+    )
+    OFFLINE_AFTER: int = pydantic.Field(default=300, gt=0, description="Устройство считается offline после, сек")
+    OFFLINE_SWEEP_ENABLED: bool = pydantic.Field(default=False, description="Включает фоновый поиск offline устройств")
+    OFFLINE_SWEEP_INTERVAL: float = pydantic.Field(default=30.0, gt=0, description="Интервал поиска offline, сек")
+    OFFLINE_SWEEP_BATCH: int = pydantic.Field(default=1000, gt=0, description="Размер пачки offline событий")
+
+    model_config = pydantic_settings.SettingsConfigDict(env_prefix="INDICATORS_")
+
+
+class Deadband(pydantic_settings.BaseSettings, case_sensitive=True):
+    """Indicator deadbands config. Relative thresholds are fractions of the previous value"""
+
+    ENABLED: bool = pydantic.Field(default=False)
+    MAX_SILENCE: int = pydantic.Field(default=60, ge=0, description="Интервал принудительного обновления, сек")
+
+    VOLTAGE_ABSOLUTE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    VOLTAGE_RELATIVE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    AMMETER_ABSOLUTE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    AMMETER_RELATIVE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    FREQUENCY_ABSOLUTE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    FREQUENCY_RELATIVE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    POWER_ABSOLUTE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    POWER_RELATIVE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    WATER_CUMULATIVE_ABSOLUTE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    WATER_CUMULATIVE_RELATIVE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    WATER_INSTANTANEOUS_ABSOLUTE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+    WATER_INSTANTANEOUS_RELATIVE: decimal.Decimal = pydantic.Field(default=decimal.Decimal(0), ge=0)
+
+    model_config = pydantic_settings.SettingsConfigDict(env_prefix="DEADBAND_")
+
+
+class Topology(pydantic_settings.BaseSettings, case_sensitive=True):
+    """Holders, nests and devices cache, read model, ingest index and bulk import config"""
+
+    CACHE_ENABLED: bool = pydantic.Field(default=False, description="Включает кэш топологии в Redis")
+    CACHE_TTL: int = pydantic.Field(default=60 * 60, gt=0, description="Время жизни записи кэша, сек")
+    CACHE_NEGATIVE_TTL: int = pydantic.Field(
+        default=30,
+        gt=0,
+        description="Время жизни записи об отсутствующей сущности, сек",
+    )
+    CACHE_REPLICA_TTL: int = pydantic.Field(
+        default=30,
+        gt=0,
+        description="Время жизни записи, прочитанной с реплики БД, сек. Ограничивает время жизни отстающих записей",
+    )
+    PROJECTION_ENABLED: bool = pydantic.Field(
+        default=False,
+        description="Включает модель чтения узлов владельца в Redis, поддерживаемую событиями",
+    )
+    PROJECTION_TTL: int = pydantic.Field(default=24 * 60 * 60, gt=0, description="Время жизни модели чтения, сек")
+    INDEX_ENABLED: bool = pydantic.Field(
+        default=False,
+        description="Включает проверку узлов и устройств входящих показателей по in-process индексу",
+    )
+    INDEX_NEGATIVE_TTL: float = pydantic.Field(
+        default=30.0,
+        gt=0,
+        description="Время, в течение которого неизвестный идентификатор не проверяется в БД повторно, сек",
+    )
+    IMPORT_DIR: str | None = pydantic.Field(
+        default=None,
+        description="Каталог загруженных файлов импорта. По умолчанию - системный временный каталог",
+    )
+    IMPORT_MAX_SIZE: int = pydantic.Field(
+        default=512 * 1024 * 1024, gt=0, description="Максимальный размер файла, байт"
+    )
+    IMPORT_CHUNK_SIZE: int = pydantic.Field(default=500, gt=0, description="Количество строк в одной транзакции")
+    IMPORT_JOB_TTL: int = pydantic.Field(default=24 * 60 * 60, gt=0, description="Время хранения статуса импорта, сек")
+    IMPORT_MAX_ERRORS: int = pydantic.Field(default=10_000, gt=0, description="Максимальное число сохраняемых ошибок")
+
+    model_config = pydantic_settings.SettingsConfigDict(env_prefix="TOPOLOGY_")
+
+
+class Events(pydantic_settings.BaseSettings, case_sensitive=True):
+    """Domain events handling config"""
+
+    MAX_CONCURRENCY: int = pydantic.Field(
+        default=8,
+        gt=0,
+        description="Максимальное число обработчиков событий одной команды, выполняемых одновременно",
+    )
+    HANDLER_TIMEOUT: float = pydantic.Field(
+        default=5.0,
+        gt=0,
+        description="Время выполнения обработчика события, после которого он прерывается, сек",
+    )
+
+    model_config = pydantic_settings.SettingsConfigDict(env_prefix="EVENTS_")
+
+
+class Outbox(pydantic_settings.BaseSettings, case_sensitive=True):
+    """Transactional outbox and its relay to the message broker config"""
+
+    INDICATORS_ENABLED: bool = pydantic.Field(
+        default=False,
+        description="Записывает события индикаторов в outbox в Redis вместо публикации в брокер при обработке команды",
+    )
+    BATCH_SIZE: int = pydantic.Field(default=500, gt=0, description="Количество сообщений в одной публикации")
+    POLL_INTERVAL: float = pydantic.Field(default=1.0, gt=0, description="Интервал опроса пустого outbox, сек")
+    CLAIM_AFTER: float = pydantic.Field(
+        default=60.0,
+        gt=0,
+        description="Время, после которого неподтвержденные сообщения outbox в Redis отправляются повторно, сек",
+    )
+
+    model_config = pydantic_settings.SettingsConfigDict(env_prefix="OUTBOX_")
+
+
+class Queries(pydantic_settings.BaseSettings, case_sensitive=True):
+    """Queries handling config"""
+
+    COALESCE_ENABLED: bool = pydantic.Field(
+        default=False,
+        description="Объединяет одновременные одинаковые запросы на чтение в одно выполнение",
+    )
+
+    model_config = pydantic_settings.SettingsConfigDict(env_prefix="QUERIES_")
+
+
 class Logging(pydantic_settings.BaseSettings, case_sensitive=True):
     """Logging config"""
 
@@ -80,12 +268,33 @@ def get_mysql_url() -> str:
     return str(Db().dsn)
 
 
+@functools.lru_cache
+def get_mysql_replica_urls() -> list[str]:
+    return [str(dsn) for dsn in Db().replica_dsns]
+
+
+@functools.lru_cache
+def get_mysql_settings() -> Db:
+    return Db()
+
+
 @functools.lru_cache
 def get_redis_url() -> str:
     return str(Redis().dsn)
 
 
+@functools.lru_cache
+def get_redis_settings() -> Redis:
+    return Redis()
+
+
 debug = os.getenv("DEBUG", False)
 app_name = "scada-api"
 version = importlib.metadata.version(app_name)
 logging_settings = Logging()
+indicators_settings = Indicators()
+deadband_settings = Deadband()
+topology_settings = Topology()
+events_settings = Events()
+outbox_settings = Outbox()
+queries_settings = Queries()
@@ -1,10 +1,12 @@
 import abc
 import typing
 
+import pydantic
+import redis.asyncio as redis
 from orjson import orjson
 
-from domain import models
-from infrastructire import factories
+from domain import models, patches
+from infrastructire import codecs, factories, settings
 
 V = typing.TypeVar("V", covariant=True)
 
@@ -14,13 +16,41 @@ class IndicatorValuesStorage(typing.Generic[V], abc.ABC):
     async def set_value(self, id: int, value: V) -> None:
         pass
 
+    @abc.abstractmethod
+    async def set_values(self, values: typing.Mapping[int, V]) -> dict[int, Exception]:
+        """Сохраняет значения пачкой. Возвращает ошибки сохранения по идентификаторам"""
+
+    async def patch_value(self, id: int, changes: typing.Mapping[str, typing.Any]) -> tuple[V, dict] | None:
+        """
+        Применяет к значению изменения полей changes (пути полей см. domain.patches).
+
+        Возвращает новое значение и фактически изменившиеся поля, None - если значения нет.
+        По умолчанию значение читается и перезаписывается без защиты от конкурирующих записей,
+        хранилища Redis применяют изменения атомарно.
+        """
+        previous = await self.get_value(id)
+        if previous is None:
+            return None
+        value, applied = patches.apply(previous, changes)
+        if applied:
+            await self.set_value(id, value)
+        return value, applied
+
     @abc.abstractmethod
     async def get_value(self, id: int) -> V | None:
         pass
 
     @abc.abstractmethod
-    async def get_values(self, *id: int) -> list[V]:
-        pass
+    async def get_values(self, *id: int) -> list[V | None]:
+        """Возвращает значения в порядке идентификаторов, None - для отсутствующих"""
+
+    @abc.abstractmethod
+    async def get_raw_value(self, id: int) -> bytes | None:
+        """Возвращает значение как JSON документ без построения моделей"""
+
+    @abc.abstractmethod
+    async def get_raw_values(self, *id: int) -> list[bytes | None]:
+        """Возвращает значения как JSON документы в порядке идентификаторов, None - для отсутствующих"""
 
 
 class TechNestIndicatorValuesStorage(IndicatorValuesStorage[models.TechNestIndicatorsValues], abc.ABC):
@@ -31,63 +61,252 @@ class DeviceIndicatorValuesStorage(IndicatorValuesStorage[models.DeviceIndicator
     pass
 
 
-class RedisTechNestIndicatorValuesStorage(TechNestIndicatorValuesStorage):
-    PREFIX = "nest@{}"
+class RedisIndicatorValuesStorage(IndicatorValuesStorage[V]):
+    PREFIX: typing.ClassVar[str]
+    MODEL: typing.ClassVar[typing.Type[pydantic.BaseModel]]
+    # Имя настройки со временем жизни значений
+    TTL_SETTING: typing.ClassVar[str]
 
-    def __init__(self, client_factory: factories.RedisClientFactory):
+    def __init__(self, client_factory: factories.RedisClientFactory, codec: codecs.IndicatorValuesCodec):
         self.client = client_factory()
+        self.codec = codec
+        self.ttl: int | None = getattr(settings.indicators_settings, self.TTL_SETTING) or None
+
+    def _dump(self, value: V) -> bytes:
+        return self.codec.encode(value)
+
+    def _load(self, value: bytes) -> V:
+        return codecs.decode(value, self.MODEL)
 
-    async def set_value(self, id: int, value: models.TechNestIndicatorsValues):
+    def _load_raw(self, value: bytes | None) -> bytes | None:
+        if not value:
+            return None
+        return codecs.as_json(value, self.MODEL)
+
+    async def set_value(self, id: int, value: V) -> None:
         key = self.PREFIX.format(id)
-        await self.client.set(key, orjson.dumps(value.model_dump(mode="json")))
+        await self.client.set(key, self._dump(value), ex=self.ttl)
 
-    async def get_value(self, id: int) -> models.TechNestIndicatorsValues | None:
+    async def set_values(self, values: typing.Mapping[int, V]) -> dict[int, Exception]:
+        if not values:
+            return {}
+        async with self.client.pipeline(transaction=False) as pipe:
+            for id, value in values.items():
+                pipe.set(self.PREFIX.format(id), self._dump(value), ex=self.ttl)
+            results = await pipe.execute(raise_on_error=False)
+        return {id: result for id, result in zip(values, results) if isinstance(result, Exception)}
+
+    async def _read_watched(self, pipe: redis.client.Pipeline, id: int) -> V | None:
+        value = await pipe.get(self.PREFIX.format(id))
+        return self._load(value) if value else None
+
+    def _write_patch(self, pipe: redis.client.Pipeline, id: int, value: V, changes: dict[str, typing.Any]) -> None:
+        pipe.set(self.PREFIX.format(id), self._dump(value), ex=self.ttl)
+
+    async def patch_value(self, id: int, changes: typing.Mapping[str, typing.Any]) -> tuple[V, dict] | None:
+        # Значение читается под WATCH: если до фиксации его изменила другая запись, изменения применяются заново
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(self.PREFIX.format(id))
+                    previous = await self._read_watched(pipe, id)
+                    if previous is None:
+                        return None
+                    value, applied = patches.apply(previous, changes)
+                    if applied:
+                        pipe.multi()
+                        self._write_patch(pipe, id, value, applied)
+                        await pipe.execute()
+                    return value, applied
+                except redis.WatchError:
+                    continue
+
+    async def get_value(self, id: int) -> V | None:
         key = self.PREFIX.format(id)
         value = await self.client.get(key)
         if not value:
             return
-        return models.TechNestIndicatorsValues.model_validate(orjson.loads(value), context={"assume_validated": True})
+        return self._load(value)
 
-    async def get_values(self, *id: int) -> list[V]:
+    async def get_values(self, *id: int) -> list[V | None]:
+        if not id:
+            return []
         keys = list(map(self.PREFIX.format, id))
         values = await self.client.mget(keys)
-        filtered_values = filter(lambda item: item is not None, values)
-        return list(
-            map(
-                lambda v: models.TechNestIndicatorsValues.model_validate(
-                    orjson.loads(v), context={"assume_validated": True}
-                ),
-                filtered_values,
-            )
-        )
-
-
-class RedisDeviceIndicatorValuesStorage(TechNestIndicatorValuesStorage):
+        return [self._load(value) if value else None for value in values]
+
+    async def get_raw_value(self, id: int) -> bytes | None:
+        return self._load_raw(await self.client.get(self.PREFIX.format(id)))
+
+    async def get_raw_values(self, *id: int) -> list[bytes | None]:
+        if not id:
+            return []
+        values = await self.client.mget(list(map(self.PREFIX.format, id)))
+        return list(map(self._load_raw, values))
+
+
+class RedisTechNestIndicatorValuesStorage(
+    RedisIndicatorValuesStorage[models.TechNestIndicatorsValues],
+    TechNestIndicatorValuesStorage,
+):
+    PREFIX = "nest@{}"
+    MODEL = models.TechNestIndicatorsValues
+    TTL_SETTING = "NEST_VALUES_TTL"
+
+
+class RedisDeviceIndicatorValuesStorage(
+    RedisIndicatorValuesStorage[models.DeviceIndicatorsValues],
+    DeviceIndicatorValuesStorage,
+):
     PREFIX = "device@{}"
+    MODEL = models.DeviceIndicatorsValues
+    TTL_SETTING = "DEVICE_VALUES_TTL"
 
-    def __init__(self, client_factory: factories.RedisClientFactory):
-        self.client = client_factory()
 
-    async def set_value(self, id: int, value: models.DeviceIndicatorsValues):
-        key = self.PREFIX.format(id)
-        await self.client.set(key, orjson.dumps(value.model_dump(mode="json")))
+class RedisHashIndicatorValuesStorage(RedisIndicatorValuesStorage[V]):
+    """
+    Хранит значения в hash с отдельным полем на каждый показатель (пути полей см. domain.patches).
 
-    async def get_value(self, id: int) -> models.DeviceIndicatorsValues | None:
+    Частичное обновление записывает только изменившиеся поля. Значения полей хранятся
+    JSON скалярами, выбранный кодек не используется.
+
+    Значения, записанные до перехода на эту раскладку документом под ключом LEGACY_PREFIX,
+    переносятся в hash при первом обращении.
+    """
+
+    # Префикс ключей документной раскладки
+    LEGACY_PREFIX: typing.ClassVar[str]
+
+    @staticmethod
+    def _dump_fields(fields: typing.Mapping[str, typing.Any]) -> dict[str, bytes]:
+        return {path: orjson.dumps(value) for path, value in fields.items()}
+
+    def _load_fields(self, fields: dict[bytes, bytes]) -> V | None:
+        if not fields:
+            return None
+        return patches.unflatten({path.decode(): orjson.loads(value) for path, value in fields.items()}, self.MODEL)
+
+    @staticmethod
+    def _dump_raw(value: V | None) -> bytes | None:
+        if value is None:
+            return None
+        return codecs.CODECS[codecs.JSONCodec.name].encode(value)
+
+    async def _get_all(self, *id: int) -> list[dict[bytes, bytes]]:
+        if not id:
+            return []
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in map(self.PREFIX.format, id):
+                pipe.hgetall(key)
+            return await pipe.execute()
+
+    def _write(self, pipe: redis.client.Pipeline, id: int, fields: typing.Mapping[str, typing.Any]) -> None:
         key = self.PREFIX.format(id)
-        value = await self.client.get(key)
-        if not value:
-            return
-        return models.DeviceIndicatorsValues.model_validate(orjson.loads(value), context={"assume_validated": True})
+        pipe.hset(key, mapping=self._dump_fields(fields))
+        if self.ttl is not None:
+            pipe.expire(key, self.ttl)
 
-    async def get_values(self, *id: int) -> list[V]:
-        keys = list(map(self.PREFIX.format, id))
-        values = await self.client.mget(keys)
-        filtered_values = filter(lambda item: item is not None, values)
-        return list(
-            map(
-                lambda v: models.DeviceIndicatorsValues.model_validate(
-                    orjson.loads(v), context={"assume_validated": True}
-                ),
-                filtered_values,
-            )
-        )
+    async def _convert_legacy(self, id: int) -> V | None:
+        """Переносит значение документной раскладки в hash"""
+        key, legacy_key = self.PREFIX.format(id), self.LEGACY_PREFIX.format(id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key, legacy_key)
+                    fields = await pipe.hgetall(key)
+                    if fields:
+                        # Значение уже записано в hash конкурирующим запросом
+                        return self._load_fields(fields)
+                    data = await pipe.get(legacy_key)
+                    if not data:
+                        return None
+                    value = self._load(data)
+                    pipe.multi()
+                    self._write(pipe, id, patches.flatten(value))
+                    pipe.delete(legacy_key)
+                    await pipe.execute()
+                    return value
+                except redis.WatchError:
+                    continue
+
+    async def _load_missing(self, id: list[int]) -> dict[int, V]:
+        """Загружает значения, отсутствующие в hash, с переносом из документной раскладки"""
+        if not id:
+            return {}
+        legacy = await self.client.mget(list(map(self.LEGACY_PREFIX.format, id)))
+        values = {}
+        for value_id in (value_id for value_id, data in zip(id, legacy) if data):
+            value = await self._convert_legacy(value_id)
+            if value is not None:
+                values[value_id] = value
+        return values
+
+    async def set_value(self, id: int, value: V) -> None:
+        # Набор полей может измениться (например, количество входов), поэтому hash пересоздается.
+        # Документ прежней раскладки удаляется, чтобы не появиться снова после истечения hash
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self.PREFIX.format(id), self.LEGACY_PREFIX.format(id))
+            self._write(pipe, id, patches.flatten(value))
+            await pipe.execute()
+
+    async def set_values(self, values: typing.Mapping[int, V]) -> dict[int, Exception]:
+        if not values:
+            return {}
+        async with self.client.pipeline(transaction=True) as pipe:
+            for id, value in values.items():
+                pipe.delete(self.PREFIX.format(id), self.LEGACY_PREFIX.format(id))
+                self._write(pipe, id, patches.flatten(value))
+            results = await pipe.execute(raise_on_error=False)
+        # DEL, HSET и, при заданном времени жизни, EXPIRE на каждое значение
+        commands_count = len(results) // len(values)
+        errors = {}
+        for index, id in enumerate(values):
+            start, stop = index * commands_count, (index + 1) * commands_count
+            for result in results[start:stop]:
+                if isinstance(result, Exception):
+                    errors[id] = result
+                    break
+        return errors
+
+    async def _read_watched(self, pipe: redis.client.Pipeline, id: int) -> V | None:
+        return self._load_fields(await pipe.hgetall(self.PREFIX.format(id)))
+
+    def _write_patch(self, pipe: redis.client.Pipeline, id: int, value: V, changes: dict[str, typing.Any]) -> None:
+        self._write(pipe, id, changes)
+
+    async def patch_value(self, id: int, changes: typing.Mapping[str, typing.Any]) -> tuple[V, dict] | None:
+        patched = await super().patch_value(id, changes)
+        if patched is None and await self._load_missing([id]):
+            patched = await super().patch_value(id, changes)
+        return patched
+
+    async def get_value(self, id: int) -> V | None:
+        [value] = await self.get_values(id)
+        return value
+
+    async def get_values(self, *id: int) -> list[V | None]:
+        values = dict(zip(id, map(self._load_fields, await self._get_all(*id))))
+        values.update(await self._load_missing([value_id for value_id, value in values.items() if value is None]))
+        return [values[value_id] for value_id in id]
+
+    async def get_raw_value(self, id: int) -> bytes | None:
+        return self._dump_raw(await self.get_value(id))
+
+    async def get_raw_values(self, *id: int) -> list[bytes | None]:
+        return list(map(self._dump_raw, await self.get_values(*id)))
+
+
+class RedisHashTechNestIndicatorValuesStorage(
+    RedisHashIndicatorValuesStorage[models.TechNestIndicatorsValues],
+    RedisTechNestIndicatorValuesStorage,
+):
+    PREFIX = "nest:fields@{}"
+    LEGACY_PREFIX = RedisTechNestIndicatorValuesStorage.PREFIX
+
+
+class RedisHashDeviceIndicatorValuesStorage(
+    RedisHashIndicatorValuesStorage[models.DeviceIndicatorsValues],
+    RedisDeviceIndicatorValuesStorage,
+):
+    PREFIX = "device:fields@{}"
+    LEGACY_PREFIX = RedisDeviceIndicatorValuesStorage.PREFIX
@@ -0,0 +1,280 @@
+"""
+Кэш топологии (владельцы, узлы, устройства) в Redis.
+
+Топология меняется редко, поэтому ``CachedRepository`` отдает владельцев и узлы из Redis,
+а в БД обращается только при промахе. Записи хранятся в конверте ``{"v": версия, "d": данные}``:
+
+* ``topology:v1:holder@{holder}`` - владелец;
+* ``topology:v1:holder_nests@{holder}`` - узлы владельца с устройствами;
+* ``topology:v1:nest@{nest}`` - узел с устройствами.
+
+Текущая версия сущности хранится в ``topology:v1:version:holder@{holder}`` и
+``topology:v1:version:nest@{nest}`` и читается одним ``MGET`` вместе с записью. Запись действительна,
+только если ее версия совпадает с текущей, поэтому данные, прочитанные из БД до фиксации
+конкурирующей транзакции, в выдачу не попадут. После фиксации транзакции, добавившей владельца,
+узел или устройство, версии затронутых владельцев и узлов увеличиваются.
+
+Отсутствующие сущности кэшируются (``"d": null``) на меньшее время, чтобы перебор
+несуществующих идентификаторов не нагружал БД. При недоступности Redis чтение идет в БД.
+Записи, прочитанные с реплики БД, могут отставать от основной БД и хранятся не дольше
+``TOPOLOGY_CACHE_REPLICA_TTL``.
+"""
+
+import typing
+
+import orjson
+import pydantic
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import session as sql_session
+
+from domain import exceptions, geo, models
+from infrastructire import factories, logging, metrics, repository, settings
+
+hits = metrics.registry.counter("topology_cache_hits", "Попадания в кэш топологии")
+misses = metrics.registry.counter("topology_cache_misses", "Промахи кэша топологии")
+
+
+class _Cached(typing.NamedTuple):
+    hit: bool
+    data: typing.Any
+    # Версия, с которой можно записать загруженные из БД данные. None - запись невозможна
+    version: int | None
+
+
+def _dump(value: pydantic.BaseModel | None) -> typing.Any:
+    return value.model_dump(mode="json") if value is not None else None
+
+
+class CachedRepository(repository.Repository):
+    """Репозиторий-обертка, отдающий топологию из Redis"""
+
+    HOLDER_KEY: typing.ClassVar[str] = "topology:v1:holder@{}"
+    HOLDER_NESTS_KEY: typing.ClassVar[str] = "topology:v1:holder_nests@{}"
+    NEST_KEY: typing.ClassVar[str] = "topology:v1:nest@{}"
+    HOLDER_VERSION_KEY: typing.ClassVar[str] = "topology:v1:version:holder@{}"
+    NEST_VERSION_KEY: typing.ClassVar[str] = "topology:v1:version:nest@{}"
+
+    def __init__(self, repository: repository.Repository, client: redis.Redis, ttl: int, negative_ttl: int):
+        self.repository = repository
+        self.client = client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # Сущности, измененные в текущей транзакции: читаются в обход кэша и инвалидируются после фиксации
+        self._changed_holders: set[int] = set()
+        self._changed_nests: set[int] = set()
+
+    async def _read(self, *keys: tuple[str, str]) -> list[_Cached]:
+        """Читает записи вместе с текущими версиями. keys - пары (ключ записи, ключ версии)"""
+        try:
+            raw = await self.client.mget([key for pair in keys for key in pair])
+        except redis.RedisError as error:
+            logging.logger.warning(f"Topology cache is unavailable: {error}")
+            return [_Cached(hit=False, data=None, version=None) for _ in keys]
+        result = []
+        for entry, version in zip(raw[::2], raw[1::2]):
+            version = int(version or 0)
+            envelope = orjson.loads(entry) if entry is not None else None
+            if envelope is not None and envelope["v"] == version:
+                hits.inc()
+                result.append(_Cached(hit=True, data=envelope["d"], version=version))
+            else:
+                misses.inc()
+                result.append(_Cached(hit=False, data=None, version=version))
+        return result
+
+    async def _write(self, *entries: tuple[str, int | None, typing.Any]) -> None:
+        """Записывает данные с версией, прочитанной до обращения к БД"""
+        entries = tuple((key, version, data) for key, version, data in entries if version is not None)
+        if not entries:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, version, data in entries:
+                    ttl = self.ttl if data is not None else self.negative_ttl
+                    pipe.set(key, orjson.dumps({"v": version, "d": data}), ex=ttl)
+                await pipe.execute()
+        except redis.RedisError as error:
+            logging.logger.warning(f"Topology cache is unavailable: {error}")
+
+    def _holder_keys(self, holder: int) -> tuple[str, str]:
+        return self.HOLDER_KEY.format(holder), self.HOLDER_VERSION_KEY.format(holder)
+
+    def _holder_nests_keys(self, holder: int) -> tuple[str, str]:
+        return self.HOLDER_NESTS_KEY.format(holder), self.HOLDER_VERSION_KEY.format(holder)
+
+    def _nest_keys(self, nest: int) -> tuple[str, str]:
+        return self.NEST_KEY.format(nest), self.NEST_VERSION_KEY.format(nest)
+
+    async def add_holder(self, item: models.Holder) -> int:
+        holder_id = await self.repository.add_holder(item)
+        self._changed_holders.add(holder_id)
+        return holder_id
+
+    async def add_nest(self, item: models.TechNest) -> int:
+        nest_id = await self.repository.add_nest(item)
+        self._changed_nests.add(nest_id)
+        self._changed_holders.add(item.holder_id)
+        return nest_id
+
+    async def add_device(self, item: models.Device) -> int:
+        nest = await self.get_nest(item.nest_id)
+        device_id = await self.repository.add_device(item)
+        self._changed_nests.add(item.nest_id)
+        if nest is not None:
+            self._changed_holders.add(nest.holder_id)
+        return device_id
+
+    async def merge_holders(self, items: typing.Sequence[models.Holder]) -> list[int]:
+        ids = await self.repository.merge_holders(items)
+        self._changed_holders.update(ids)
+        return ids
+
+    async def merge_nests(self, items: typing.Sequence[models.TechNest]) -> list[int]:
+        ids = await self.repository.merge_nests(items)
+        self._changed_nests.update(ids)
+        self._changed_holders.update(item.holder_id for item in items)
+        return ids
+
+    async def merge_devices(self, items: typing.Sequence[models.Device]) -> list[int]:
+        nests = await self.get_nests(list({item.nest_id for item in items}))
+        ids = await self.repository.merge_devices(items)
+        self._changed_nests.update(item.nest_id for item in items)
+        self._changed_holders.update(nest.holder_id for nest in nests)
+        return ids
+
+    async def get_holder(self, holder: int, with_nests: bool = False) -> models.Holder | None:
+        if holder in self._changed_holders:
+            return await self.repository.get_holder(holder, with_nests=with_nests)
+        keys = [self._holder_keys(holder)]
+        if with_nests:
+            keys.append(self._holder_nests_keys(holder))
+        cached_holder, *cached_nests = await self._read(*keys)
+        if cached_holder.hit and (cached_holder.data is None or all(item.hit for item in cached_nests)):
+            return models.Holder.model_validate(cached_holder.data) if cached_holder.data is not None else None
+        value = await self.repository.get_holder(holder, with_nests=with_nests)
+        entries = [(keys[0][0], cached_holder.version, _dump(value))]
+        if with_nests and value is not None:
+            # Узлы уже загружены вместе с владельцем, повторного запроса нет
+            nests = await self.repository.get_nests_by_holder(holder)
+            entries.append((keys[1][0], cached_nests[0].version, [_dump(nest) for nest in nests]))
+        await self._write(*entries)
+        return value
+
+    async def get_nests_by_holder(
+        self,
+        holder: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[models.TechNest]:
+        # Страницы выбираются из БД по индексу, чтобы не загружать из кэша все узлы владельца
+        if holder in self._changed_holders or after is not None or limit is not None:
+            return await self.repository.get_nests_by_holder(holder, after=after, limit=limit)
+        key, version_key = self._holder_nests_keys(holder)
+        [cached] = await self._read((key, version_key))
+        if cached.hit:
+            return [models.TechNest.model_validate(nest) for nest in cached.data]
+        nests = await self.repository.get_nests_by_holder(holder)
+        await self._write((key, cached.version, [_dump(nest) for nest in nests]))
+        return nests
+
+    async def get_nest(self, nest_id: int, with_devices: bool = False) -> models.TechNest | None:
+        # Узлы кэшируются вместе с устройствами и отдаются с ними независимо от with_devices
+        [nest] = await self._get_nests([nest_id])
+        return nest
+
+    async def get_nests(self, nest_ids: typing.Sequence[int]) -> list[models.TechNest]:
+        return [nest for nest in await self._get_nests(nest_ids) if nest is not None]
+
+    async def _get_nests(self, nest_ids: typing.Sequence[int]) -> list[models.TechNest | None]:
+        nests: dict[int, models.TechNest | None] = {}
+        cacheable = [nest_id for nest_id in dict.fromkeys(nest_ids) if nest_id not in self._changed_nests]
+        versions: dict[int, int | None] = {}
+        if cacheable:
+            for nest_id, cached in zip(cacheable, await self._read(*map(self._nest_keys, cacheable))):
+                if cached.hit:
+                    nests[nest_id] = models.TechNest.model_validate(cached.data) if cached.data is not None else None
+                else:
+                    versions[nest_id] = cached.version
+        missed = [nest_id for nest_id in dict.fromkeys(nest_ids) if nest_id not in nests]
+        if missed:
+            loaded = {nest.id: nest for nest in await self.repository.get_nests(missed)}
+            for nest_id in missed:
+                nests[nest_id] = loaded.get(nest_id)
+            await self._write(
+                *(
+                    (self.NEST_KEY.format(nest_id), version, _dump(nests[nest_id]))
+                    for nest_id, version in versions.items()
+                )
+            )
+        return [nests[nest_id] for nest_id in nest_ids]
+
+    async def get_nests_by_location(self, location: int) -> list[models.TechNest]:
+        return await self.repository.get_nests_by_location(location)
+
+    async def get_nests_in_area(self, area: geo.BoundingBox, limit: int) -> list[models.TechNest]:
+        return await self.repository.get_nests_in_area(area, limit)
+
+    async def get_nests_near(self, point: geo.Point, radius: float, limit: int) -> list[tuple[models.TechNest, float]]:
+        return await self.repository.get_nests_near(point, radius, limit)
+
+    def stream_nests_by_holder(
+        self,
+        holder: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> typing.AsyncIterator[models.TechNest]:
+        return self.repository.stream_nests_by_holder(holder, after=after, limit=limit)
+
+    async def get_devices(self, nest: int, after: int | None = None, limit: int | None = None) -> list[models.Device]:
+        if after is not None or limit is not None:
+            return await self.repository.get_devices(nest, after=after, limit=limit)
+        existed_nest = await self.get_nest(nest_id=nest, with_devices=True)
+        if existed_nest is None:
+            raise exceptions.NotFound(f"Nest with nest_id {nest} not found")
+        return existed_nest.devices
+
+    def stream_devices(
+        self,
+        nest: int,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> typing.AsyncIterator[models.Device]:
+        return self.repository.stream_devices(nest, after=after, limit=limit)
+
+    async def on_commit(self) -> None:
+        await self.repository.on_commit()
+        if not self._changed_holders and not self._changed_nests:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for holder in self._changed_holders:
+                    key, version_key = self._holder_keys(holder)
+                    pipe.incr(version_key)
+                    pipe.delete(key, self.HOLDER_NESTS_KEY.format(holder))
+                for nest in self._changed_nests:
+                    key, version_key = self._nest_keys(nest)
+                    pipe.incr(version_key)
+                    pipe.delete(key)
+                await pipe.execute()
+        except redis.RedisError as error:
+            # Транзакция уже зафиксирована, устаревшие записи истекут по TOPOLOGY_CACHE_TTL
+            logging.logger.error(f"Failed to invalidate topology cache: {error}")
+        self._changed_holders.clear()
+        self._changed_nests.clear()
+
+
+class CachedRepositoryFactory(factories.RepositoryFactory):
+    def __init__(self, client_factory: factories.RedisClientFactory):
+        self.client = client_factory()
+
+    def __call__(self, session: sql_session.AsyncSession):
+        config = settings.topology_settings
+        ttl, negative_ttl = config.CACHE_TTL, config.CACHE_NEGATIVE_TTL
+        if session.info.get("replica"):
+            ttl, negative_ttl = min(ttl, config.CACHE_REPLICA_TTL), min(negative_ttl, config.CACHE_REPLICA_TTL)
+        return CachedRepository(
+            repository.SQLAlchemyRepository(session=session),
+            self.client,
+            ttl=ttl,
+            negative_ttl=negative_ttl,
+        )
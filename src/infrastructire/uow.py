@@ -4,7 +4,7 @@ import typing
 
 from sqlalchemy.ext.asyncio import session as sql_session
 
-from infrastructire import factories, repository
+from infrastructire import factories, orm, repository
 
 R = typing.TypeVar("R", bound=repository.Repository, contravariant=True)
 S = typing.TypeVar("S", contravariant=True)
@@ -24,14 +24,18 @@ class UoW(typing.Generic[R, S], abc.ABC):
         self.session_factory = session_factory
 
     @contextlib.asynccontextmanager
-    async def transaction(self) -> typing.Self:
-        self.session = self.session_factory()
+    async def transaction(self, read_only: bool = False) -> typing.Self:
+        """Открывает транзакцию. Транзакции только для чтения могут обслуживаться репликами"""
+        self.session = await self._open(read_only)
         try:
             self.repository = self.repository_factory(self.session)
             yield self
         finally:
             await self._close()
 
+    async def _open(self, read_only: bool) -> S:
+        return self.session_factory()
+
     @abc.abstractmethod
     async def commit(self):
         ...
@@ -40,22 +44,46 @@ class UoW(typing.Generic[R, S], abc.ABC):
     async def rollback(self):
         ...
 
+    @abc.abstractmethod
+    async def publish(self, bodies: typing.Sequence[bytes]) -> None:
+        """Записывает сообщения брокера в outbox в текущей транзакции. Они будут опубликованы после ее фиксации"""
+
     @abc.abstractmethod
     async def _close(self):
         ...
 
 
 class SQLAlchemyUoW(UoW[repository.SQLAlchemyRepository, sql_session.AsyncSession]):
+    def __init__(
+        self,
+        repository_factory: factories.RepositoryFactory[S],
+        session_factory: factories.SessionFactory[S],
+        replica_session_factory: factories.SQLAlchemyReplicaSessionFactory,
+    ):
+        super().__init__(repository_factory, session_factory)
+        self.replica_session_factory = replica_session_factory
+
+    async def _open(self, read_only: bool) -> sql_session.AsyncSession:
+        # Без доступных реплик чтение идет с основной БД
+        if read_only and (session := await self.replica_session_factory()) is not None:
+            return session
+        return self.session_factory()
+
     async def commit(self):
         try:
             await self.session.commit()
         except Exception:
             await self.rollback()
             raise
+        self.replica_session_factory.mark_written()
+        await self.repository.on_commit()
 
     async def rollback(self):
         await self.session.rollback()
 
+    async def publish(self, bodies: typing.Sequence[bytes]) -> None:
+        self.session.add_all(orm.OutboxMessages(body=body) for body in bodies)
+
     async def _close(self):
         session = getattr(self, "session", None)
         if session:
@@ -1,17 +1,25 @@
 import fastapi
 
-from infrastructire import settings
-from presentation import application
+from infrastructire import factories, indexes, outbox, settings
+from presentation import application, dependencies
 from presentation.routes import commands, queries, subscriptions
 
+startup_tasks = [factories.init_sql_engine, factories.init_redis_connection_pool, outbox.run_outbox_relay]
+if settings.indicators_settings.CACHE_ENABLED:
+    startup_tasks.append(dependencies.consume_indicators_cache_invalidations)
+if settings.indicators_settings.OFFLINE_SWEEP_ENABLED:
+    startup_tasks.append(dependencies.sweep_offline_devices)
+if settings.topology_settings.INDEX_ENABLED:
+    startup_tasks.append(indexes.load_topology_index)
+
 app: fastapi.FastAPI = application.create(
     debug=settings.debug,
     command_routers=(commands.router,),
     query_routers=(queries.router,),
     subscription_routers=(subscriptions.router,),
     middlewares=[],
-    startup_tasks=[],
-    shutdown_tasks=[],
+    startup_tasks=startup_tasks,
+    shutdown_tasks=[dependencies.close_mediator, factories.dispose_sql_engine, factories.close_redis_connection_pool],
     global_dependencies=[],
     title=settings.app_name,
     version=settings.version,
@@ -1,11 +1,13 @@
+import asyncio
 import functools
 import uuid
 
 import fastapi
 
-from infrastructire import consumers, settings
+from infrastructire import consumers, imports, logging, settings
 from service_layer import bootstrap, cqrs
 from service_layer.handlers import subscriptions
+from service_layer.models import commands
 
 
 @functools.lru_cache
@@ -13,6 +15,13 @@ def inject_mediator() -> cqrs.Mediator:
     return bootstrap.bootstrap()
 
 
+async def close_mediator() -> None:
+    if not inject_mediator.cache_info().currsize:
+        return
+    await inject_mediator().close()
+    inject_mediator.cache_clear()
+
+
 def inject_publisher(mediator: cqrs.Mediator = fastapi.Depends(inject_mediator)):
     return subscriptions.NestIndicatorValuesPublisher(mediator=mediator)
 
@@ -27,3 +36,41 @@ def inject_consumer() -> consumers.EventConsumer:
         routing_key=amqp_settings.EVENTS_ROUTEING_KEY,
         queue_name=queue_name,
     )
+
+
+async def consume_indicators_cache_invalidations() -> None:
+    consumer = inject_consumer()
+    await consumer.consume(subscriptions.IndicatorsCacheInvalidator())
+
+
+async def sweep_offline_devices() -> None:
+    mediator = inject_mediator()
+    command = commands.SweepOfflineDevices(
+        offline_after=settings.indicators_settings.OFFLINE_AFTER,
+        batch_size=settings.indicators_settings.OFFLINE_SWEEP_BATCH,
+    )
+    while True:
+        try:
+            await mediator.send(command)
+        except Exception as error:
+            logging.logger.error(f"Offline devices sweep failed: {error}")
+        await asyncio.sleep(settings.indicators_settings.OFFLINE_SWEEP_INTERVAL)
+
+
+async def save_topology_upload(request: fastapi.Request) -> str:
+    """Сохраняет тело запроса импорта топологии на диск, не загружая его в память"""
+    try:
+        return await imports.save_upload(
+            request.stream(),
+            max_size=settings.topology_settings.IMPORT_MAX_SIZE,
+            directory=settings.topology_settings.IMPORT_DIR,
+        )
+    except imports.UploadTooLarge as error:
+        raise fastapi.HTTPException(status_code=fastapi.status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(error))
+
+
+async def import_topology(command: commands.ImportTopology) -> None:
+    try:
+        await inject_mediator().send(command)
+    except Exception as error:
+        logging.logger.error(f"Topology import {command.job} failed: {error}")
@@ -0,0 +1,29 @@
+import functools
+import typing
+
+import fastapi
+
+from service_layer.models import validation
+
+ListingFormat = typing.Literal["json", "ndjson"]
+
+AfterQuery = functools.partial(fastapi.Query, gt=0)
+
+LimitQuery = functools.partial(
+    fastapi.Query,
+    gt=0,
+    le=validation.PAGE_MAX_LIMIT,
+    description="Размер страницы. Если не задан, возвращаются все записи после after",
+)
+
+CursorQuery = functools.partial(
+    fastapi.Query,
+    pattern=validation.STREAM_ID_PATTERN,
+    description="Курсор следующей страницы",
+)
+
+FormatQuery = functools.partial(
+    fastapi.Query,
+    alias="format",
+    description="json - страница в конверте Response, ndjson - поток записей, по одной JSON записи на строку",
+)
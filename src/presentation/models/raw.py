@@ -0,0 +1,98 @@
+"""
+Сборка JSON ответов из уже сериализованных документов без построения pydantic моделей.
+"""
+
+import typing
+
+import fastapi
+import pydantic
+import pydantic_core
+from fastapi import responses as fastapi_responses
+from orjson import orjson
+
+from service_layer.models import responses
+
+__all__ = (
+    "RawJSONResponse",
+    "RawJSONStreamingResponse",
+    "NDJSONStreamingResponse",
+    "tech_nest_indicators",
+    "devices_indicators",
+    "fleet_snapshot",
+    "ndjson",
+)
+
+NULL = b"null"
+TRUE = b"true"
+FALSE = b"false"
+
+
+class RawJSONResponse(fastapi.Response):
+    media_type = "application/json"
+
+
+class RawJSONStreamingResponse(fastapi_responses.StreamingResponse):
+    media_type = "application/json"
+
+
+class NDJSONStreamingResponse(fastapi_responses.StreamingResponse):
+    media_type = "application/x-ndjson"
+
+
+def _object(fields: typing.Iterable[tuple[str, bytes]]) -> bytes:
+    return b"{" + b",".join(b'"%s":%s' % (name.encode(), value) for name, value in fields) + b"}"
+
+
+def tech_nest_indicators(result: responses.RawTechNestIndicators) -> RawJSONResponse:
+    """Оборачивает показатели узла в конверт ``Response``"""
+    body = _object((("nest", str(result.nest).encode()), ("values", result.values)))
+    return RawJSONResponse(content=_object((("result", body),)))
+
+
+def devices_indicators(result: responses.RawDeviceIndicators) -> RawJSONResponse:
+    """Оборачивает показатели устройств узла в конверт ``ResponseMulti``"""
+    nest = str(result.nest).encode()
+    items = (
+        _object((("nest", nest), ("device", str(device).encode()), ("values", values)))
+        for device, values in result.devices.items()
+    )
+    return RawJSONResponse(content=_object((("result", b"[" + b",".join(items) + b"]"),)))
+
+
+def _snapshot_item(id_name: str, id: int, name: str, values: bytes | None) -> list[tuple[str, bytes]]:
+    return [
+        (id_name, str(id).encode()),
+        ("name", orjson.dumps(name)),
+        ("missing", FALSE if values else TRUE),
+        ("values", values or NULL),
+    ]
+
+
+def _fleet_snapshot_chunks(result: responses.RawFleetSnapshot) -> typing.Iterator[bytes]:
+    holder = NULL if result.holder is None else str(result.holder).encode()
+    yield b'{"result":{"holder":%s,"nests":[' % holder
+    for index, (nest, values) in enumerate(zip(result.nests, result.nest_values)):
+        devices = (
+            _object(_snapshot_item("device", device.id, device.name, result.device_values.get(device.id)))
+            for device in nest.devices
+        )
+        item = _object(
+            [*_snapshot_item("nest", nest.id, nest.name, values), ("devices", b"[" + b",".join(devices) + b"]")]
+        )
+        yield item if index == 0 else b"," + item
+    yield b"]}}"
+
+
+def fleet_snapshot(result: responses.RawFleetSnapshot) -> RawJSONStreamingResponse:
+    """Отдает снимок показателей в конверте ``Response`` потоком, по одному узлу на порцию"""
+    return RawJSONStreamingResponse(content=_fleet_snapshot_chunks(result))
+
+
+async def _ndjson_lines(items: typing.AsyncIterator[pydantic.BaseModel]) -> typing.AsyncIterator[bytes]:
+    async for item in items:
+        yield pydantic_core.to_json(item) + b"\n"
+
+
+def ndjson(items: typing.AsyncIterator[pydantic.BaseModel]) -> NDJSONStreamingResponse:
+    """Отдает записи потоком по мере чтения, по одному JSON документу на строку"""
+    return NDJSONStreamingResponse(content=_ndjson_lines(items))
@@ -1,6 +1,6 @@
 import fastapi
 
-from presentation.routes.commands import holders, indicators, tech_nests
+from presentation.routes.commands import holders, imports, indicators, tech_nests
 
 __all__ = ("router",)
 
@@ -9,3 +9,4 @@ router = fastapi.APIRouter(tags=["Commands"])
 router.include_router(holders.router)
 router.include_router(tech_nests.router)
 router.include_router(indicators.router)
+router.include_router(imports.router)
@@ -0,0 +1,55 @@
+import typing
+
+import fastapi
+from starlette import status
+
+from infrastructire import settings
+from presentation import dependencies
+from presentation.models import responses as pres_responses
+from service_layer import cqrs
+from service_layer.models import commands
+from service_layer.models import responses as service_responses
+
+router = fastapi.APIRouter(
+    prefix="/topology/imports",
+    tags=["Импорт топологии"],
+)
+
+
+@router.post(
+    "",
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"description": "Размер файла превышает допустимый"}},
+)
+async def start_topology_import(
+    request: fastapi.Request,
+    background_tasks: fastapi.BackgroundTasks,
+    import_format: typing.Annotated[
+        typing.Literal["ndjson", "csv"],
+        fastapi.Query(alias="format", description="ndjson - JSON объект на строку, csv - CSV с заголовком"),
+    ] = "ndjson",
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[service_responses.TopologyImportStarted]:
+    """
+    Загружает файл топологии и запускает его импорт в фоне.
+
+    Тело запроса - файл, строка которого описывает владельца и, при наличии, его узел и устройство узла:
+    `holder_name`, `holder_inn`, `holder_kpp`, `nest_name`, `latitude`, `longitude`, `address`,
+    `device_name`, `device_model`. Существующие владельцы, узлы и устройства не изменяются.
+
+    Состояние импорта - `GET /topology/imports/{job}`, ошибки строк - `GET /topology/imports/{job}/errors`.
+    """
+    path = await dependencies.save_topology_upload(request)
+    result: service_responses.TopologyImportStarted = await mediator.send(
+        commands.StartTopologyImport(format=import_format),
+    )
+    background_tasks.add_task(
+        dependencies.import_topology,
+        commands.ImportTopology(
+            job=result.job,
+            path=path,
+            format=import_format,
+            chunk_size=settings.topology_settings.IMPORT_CHUNK_SIZE,
+        ),
+    )
+    return pres_responses.Response(result=result)
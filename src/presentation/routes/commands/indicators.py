@@ -7,8 +7,10 @@ from domain import exceptions, models
 from presentation import dependencies
 from presentation.errors import registry
 from presentation.models import paths, requests
+from presentation.models import responses as pres_responses
 from service_layer import cqrs
 from service_layer.models import commands
+from service_layer.models import responses as service_responses
 
 router = fastapi.APIRouter(
     prefix="/indicators",
@@ -19,6 +21,16 @@ router = fastapi.APIRouter(
 )
 
 
+@router.put("/batch", status_code=status.HTTP_200_OK)
+async def publish_indicators_batch(
+    command: requests.CommandRequest[commands.UpdateIndicatorsBatch],
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[service_responses.IndicatorsBatchUpdated]:
+    """Публикует пачку значений на индикаторах технических узлов и устройств"""
+    result = await mediator.send(command.body)
+    return pres_responses.Response(result=result)
+
+
 @router.put("/nest/{nest}", status_code=status.HTTP_204_NO_CONTENT)
 async def publish_tech_nest_indicators(
     nest: typing.Annotated[int, paths.IdPath()],
@@ -38,3 +50,33 @@ async def publish_device_indicators(
 ) -> None:
     """Публикует значения на индикаторах устройства"""
     await mediator.send(commands.UpdateDeviceIndicators(nest=nest, device=device, values=command.body))
+
+
+@router.patch("/nest/{nest}", status_code=status.HTTP_204_NO_CONTENT)
+async def patch_tech_nest_indicators(
+    nest: typing.Annotated[int, paths.IdPath()],
+    command: requests.CommandRequest[dict[str, typing.Any]],
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> None:
+    """
+    Обновляет отдельные поля значений на индикаторах технического узла.
+
+    Ключи - пути полей (например, `consumption.power`, `input_power.inputs[0].voltage`),
+    значения - новые значения показателей без единиц измерения.
+    """
+    await mediator.send(commands.PatchTechNestIndicators(nest=nest, changes=command.body))
+
+
+@router.patch("/nest/{nest}/device/{device}", status_code=status.HTTP_204_NO_CONTENT)
+async def patch_device_indicators(
+    nest: typing.Annotated[int, paths.IdPath()],
+    device: typing.Annotated[int, paths.IdPath()],
+    command: requests.CommandRequest[dict[str, typing.Any]],
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> None:
+    """
+    Обновляет отдельные поля значений на индикаторах устройства.
+
+    Ключи - пути полей (например, `ammeter`, `status`), значения - новые значения показателей.
+    """
+    await mediator.send(commands.PatchDeviceIndicators(nest=nest, device=device, changes=command.body))
@@ -1,6 +1,6 @@
 import fastapi
 
-from presentation.routes.queries import holders, indicators, tech_nests
+from presentation.routes.queries import holders, imports, indicators, metrics, tech_nests
 
 __all__ = ("router",)
 
@@ -10,3 +10,5 @@ router = fastapi.APIRouter(tags=["Queries"])
 router.include_router(holders.router)
 router.include_router(tech_nests.router)
 router.include_router(indicators.router)
+router.include_router(imports.router)
+router.include_router(metrics.router)
@@ -1,3 +1,4 @@
+import datetime
 import typing
 
 import fastapi
@@ -6,7 +7,7 @@ from starlette import status
 from domain import exceptions
 from presentation import dependencies
 from presentation.errors import registry
-from presentation.models import paths
+from presentation.models import pages, paths, raw
 from presentation.models import responses as pres_responses
 from service_layer import cqrs
 from service_layer.models import queries
@@ -21,16 +22,71 @@ router = fastapi.APIRouter(
 @router.get(
     "/{holder}/nests",
     status_code=status.HTTP_200_OK,
+    response_model=pres_responses.Response[service_responses.TechNests],
     responses=registry.get_exception_responses(
         exceptions.NotFound,
     ),
 )
 async def get_nests(
     holder: typing.Annotated[int, paths.IdPath()],
+    after: typing.Annotated[
+        int | None,
+        pages.AfterQuery(description="Идентификатор узла, после которого начинается страница"),
+    ] = None,
+    limit: typing.Annotated[int | None, pages.LimitQuery()] = None,
+    listing_format: typing.Annotated[pages.ListingFormat, pages.FormatQuery()] = "json",
     mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
-) -> pres_responses.Response[service_responses.TechNests]:
-    """Возвращает все технические узлы владельца"""
-    result = await mediator.send(queries.TechNests(holder=holder))
+) -> pres_responses.Response[service_responses.TechNests] | raw.NDJSONStreamingResponse:
+    """
+    Возвращает технические узлы владельца по возрастанию идентификатора.
+
+    Без `limit` возвращаются все узлы после `after`. Курсор следующей страницы - `next_after`.
+    При `format=ndjson` узлы отдаются потоком, по одному на строку.
+    """
+    if listing_format == "ndjson":
+        stream: service_responses.TechNestsStream = await mediator.send(
+            queries.TechNestsStream(holder=holder, after=after, limit=limit),
+        )
+        return raw.ndjson(stream.tech_nests)
+    result = await mediator.send(queries.TechNests(holder=holder, after=after, limit=limit))
+    return pres_responses.Response(result=result)
+
+
+@router.get(
+    "/{holder}/snapshot",
+    status_code=status.HTTP_200_OK,
+    response_model=pres_responses.Response[service_responses.FleetSnapshot],
+    responses=registry.get_exception_responses(
+        exceptions.NotFound,
+    ),
+)
+async def get_holder_snapshot(
+    holder: typing.Annotated[int, paths.IdPath()],
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> raw.RawJSONStreamingResponse:
+    """
+    Возвращает актуальные показатели всех технических узлов и устройств владельца.
+
+    Для узлов и устройств без опубликованных показателей `missing` = true, `values` = null.
+    """
+    result: service_responses.RawFleetSnapshot = await mediator.send(queries.HolderSnapshot(holder=holder))
+    return raw.fleet_snapshot(result)
+
+
+@router.get(
+    "/{holder}/offline",
+    status_code=status.HTTP_200_OK,
+    responses=registry.get_exception_responses(
+        exceptions.NotFound,
+    ),
+)
+async def get_offline_devices(
+    holder: typing.Annotated[int, paths.IdPath()],
+    since: typing.Annotated[datetime.datetime, fastapi.Query(description="Устройства без показателей с этого момента")],
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[service_responses.OfflineDevices]:
+    """Возвращает устройства владельца, от которых не поступали показатели с момента `since`"""
+    result = await mediator.send(queries.OfflineDevices(holder=holder, since=since))
     return pres_responses.Response(result=result)
 
 
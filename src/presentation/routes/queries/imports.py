@@ -0,0 +1,51 @@
+import typing
+
+import fastapi
+from starlette import status
+
+from domain import exceptions
+from presentation import dependencies
+from presentation.errors import registry
+from presentation.models import pages
+from presentation.models import responses as pres_responses
+from service_layer import cqrs
+from service_layer.models import queries, responses
+
+router = fastapi.APIRouter(
+    prefix="/topology/imports",
+    tags=["Импорт топологии"],
+)
+
+
+@router.get(
+    "/{job}",
+    status_code=status.HTTP_200_OK,
+    responses=registry.get_exception_responses(
+        exceptions.NotFound,
+    ),
+)
+async def get_topology_import(
+    job: str,
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[responses.TopologyImport]:
+    """Возвращает состояние и прогресс импорта топологии"""
+    result = await mediator.send(queries.TopologyImport(job=job))
+    return pres_responses.Response(result=result)
+
+
+@router.get(
+    "/{job}/errors",
+    status_code=status.HTTP_200_OK,
+    responses=registry.get_exception_responses(
+        exceptions.NotFound,
+    ),
+)
+async def get_topology_import_errors(
+    job: str,
+    offset: typing.Annotated[int, fastapi.Query(description="Количество пропускаемых ошибок", ge=0)] = 0,
+    limit: typing.Annotated[int, pages.LimitQuery(description="Количество ошибок")] = 100,
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[responses.TopologyImportErrors]:
+    """Возвращает ошибки строк импорта топологии в порядке строк файла"""
+    result = await mediator.send(queries.TopologyImportErrors(job=job, offset=offset, limit=limit))
+    return pres_responses.Response(result=result)
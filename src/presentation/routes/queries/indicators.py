@@ -1,3 +1,4 @@
+import datetime
 import typing
 
 import fastapi
@@ -6,7 +7,7 @@ from starlette import status
 from domain import exceptions, models
 from presentation import dependencies
 from presentation.errors import registry
-from presentation.models import paths
+from presentation.models import pages, paths, raw
 from presentation.models import responses as pres_responses
 from service_layer import cqrs
 from service_layer.models import queries, responses
@@ -18,21 +19,63 @@ router = fastapi.APIRouter(
 )
 
 
-@router.get("/nest/{nest}", status_code=status.HTTP_200_OK)
+@router.get(
+    "/nest/{nest}",
+    status_code=status.HTTP_200_OK,
+    response_model=pres_responses.Response[responses.TechNestIndicators],
+)
 async def get_nest_indicators(
     nest: typing.Annotated[int, paths.IdPath()],
     mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
-) -> pres_responses.Response[responses.TechNestIndicators]:
+) -> raw.RawJSONResponse:
     """Возвращает актуальные значения на индикаторах технического узла"""
-    result = await mediator.send(queries.TechNestIndicators(nest=nest))
-    return pres_responses.Response(result=result)
+    result: responses.RawTechNestIndicators = await mediator.send(queries.RawTechNestIndicators(nest=nest))
+    return raw.tech_nest_indicators(result)
 
 
-@router.get("/nest/{nest}/devices", status_code=status.HTTP_200_OK)
+@router.get(
+    "/nest/{nest}/devices",
+    status_code=status.HTTP_200_OK,
+    response_model=pres_responses.ResponseMulti[models.DeviceIndicators],
+)
 async def get_devices_indicators(
     nest: typing.Annotated[int, paths.IdPath()],
     mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
-) -> pres_responses.ResponseMulti[models.DeviceIndicators]:
+) -> raw.RawJSONResponse:
     """Возвращает актуальные значения на индикаторах устройств узла"""
-    result: responses.DeviceIndicators = await mediator.send(queries.DevicesIndicators(nest=nest))
-    return pres_responses.ResponseMulti[models.DeviceIndicators](result=result.devices)
+    result: responses.RawDeviceIndicators = await mediator.send(queries.RawDevicesIndicators(nest=nest))
+    return raw.devices_indicators(result)
+
+
+@router.get("/nest/{nest}/history", status_code=status.HTTP_200_OK)
+async def get_nest_indicators_history(
+    nest: typing.Annotated[int, paths.IdPath()],
+    start: typing.Annotated[datetime.datetime | None, fastapi.Query(alias="from")] = None,
+    end: typing.Annotated[datetime.datetime | None, fastapi.Query(alias="to")] = None,
+    step: typing.Annotated[int | None, fastapi.Query(gt=0, description="Шаг прореживания, сек")] = None,
+    after: typing.Annotated[str | None, pages.CursorQuery()] = None,
+    limit: typing.Annotated[int, fastapi.Query(gt=0, le=10_000)] = 100,
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[responses.TechNestIndicatorsHistory]:
+    """Возвращает страницу истории значений на индикаторах технического узла"""
+    result = await mediator.send(
+        queries.TechNestIndicatorsHistory(nest=nest, start=start, end=end, step=step, after=after, limit=limit)
+    )
+    return pres_responses.Response(result=result)
+
+
+@router.get("/device/{device}/history", status_code=status.HTTP_200_OK)
+async def get_device_indicators_history(
+    device: typing.Annotated[int, paths.IdPath()],
+    start: typing.Annotated[datetime.datetime | None, fastapi.Query(alias="from")] = None,
+    end: typing.Annotated[datetime.datetime | None, fastapi.Query(alias="to")] = None,
+    step: typing.Annotated[int | None, fastapi.Query(gt=0, description="Шаг прореживания, сек")] = None,
+    after: typing.Annotated[str | None, pages.CursorQuery()] = None,
+    limit: typing.Annotated[int, fastapi.Query(gt=0, le=10_000)] = 100,
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[responses.DeviceIndicatorsHistory]:
+    """Возвращает страницу истории значений на индикаторах устройства"""
+    result = await mediator.send(
+        queries.DeviceIndicatorsHistory(device=device, start=start, end=end, step=step, after=after, limit=limit)
+    )
+    return pres_responses.Response(result=result)
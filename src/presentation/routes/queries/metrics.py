@@ -0,0 +1,17 @@
+import typing
+
+import fastapi
+from starlette import status
+
+from infrastructire import metrics
+
+router = fastapi.APIRouter(
+    prefix="/metrics",
+    tags=["Метрики"],
+)
+
+
+@router.get("", status_code=status.HTTP_200_OK)
+async def get_metrics() -> typing.Dict[str, typing.Any]:
+    """Возвращает текущие значения метрик процесса"""
+    return metrics.registry.snapshot()
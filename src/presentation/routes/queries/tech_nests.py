@@ -6,7 +6,7 @@ from starlette import status
 from domain import exceptions
 from presentation import dependencies
 from presentation.errors import registry
-from presentation.models import paths
+from presentation.models import pages, paths, raw
 from presentation.models import responses as pres_responses
 from service_layer import cqrs
 from service_layer.models import queries, responses
@@ -17,17 +17,95 @@ router = fastapi.APIRouter(
 )
 
 
+@router.get(
+    "/snapshot",
+    status_code=status.HTTP_200_OK,
+    response_model=pres_responses.Response[responses.FleetSnapshot],
+    responses=registry.get_exception_responses(
+        exceptions.NotFound,
+    ),
+)
+async def get_nests_snapshot(
+    nests: typing.Annotated[
+        list[int],
+        fastapi.Query(alias="id", description="Идентификаторы технических узлов", min_length=1, max_length=1000),
+    ],
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> raw.RawJSONStreamingResponse:
+    """
+    Возвращает актуальные показатели технических узлов и их устройств по списку идентификаторов.
+
+    Для узлов и устройств без опубликованных показателей `missing` = true, `values` = null.
+    """
+    result: responses.RawFleetSnapshot = await mediator.send(queries.NestsSnapshot(nests=nests))
+    return raw.fleet_snapshot(result)
+
+
+@router.get(
+    "/near",
+    status_code=status.HTTP_200_OK,
+)
+async def get_nests_near(
+    latitude: typing.Annotated[float, fastapi.Query(alias="lat", description="Широта", ge=-90, le=90)],
+    longitude: typing.Annotated[float, fastapi.Query(alias="lon", description="Долгота", ge=-180, le=180)],
+    radius: typing.Annotated[float, fastapi.Query(description="Радиус поиска, м", gt=0, le=1_000_000)],
+    limit: typing.Annotated[int, pages.LimitQuery(description="Максимальное количество узлов")] = 10,
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[responses.TechNestsNear]:
+    """Возвращает ближайшие к точке технические узлы в пределах радиуса по возрастанию расстояния"""
+    result = await mediator.send(queries.NestsNear(latitude=latitude, longitude=longitude, radius=radius, limit=limit))
+    return pres_responses.Response(result=result)
+
+
+@router.get(
+    "/in-bbox",
+    status_code=status.HTTP_200_OK,
+)
+async def get_nests_in_area(
+    south: typing.Annotated[float, fastapi.Query(description="Южная граница, широта", ge=-90, le=90)],
+    west: typing.Annotated[float, fastapi.Query(description="Западная граница, долгота", ge=-180, le=180)],
+    north: typing.Annotated[float, fastapi.Query(description="Северная граница, широта", ge=-90, le=90)],
+    east: typing.Annotated[float, fastapi.Query(description="Восточная граница, долгота", ge=-180, le=180)],
+    limit: typing.Annotated[int, pages.LimitQuery(description="Максимальное количество узлов")] = 100,
+    mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
+) -> pres_responses.Response[responses.TechNestsInArea]:
+    """
+    Возвращает технические узлы, расположенные в прямоугольной области, по возрастанию идентификатора.
+
+    Если `east` меньше `west`, область пересекает 180-й меридиан.
+    """
+    result = await mediator.send(queries.NestsInArea(south=south, west=west, north=north, east=east, limit=limit))
+    return pres_responses.Response(result=result)
+
+
 @router.get(
     "/{nest}/devices",
     status_code=status.HTTP_200_OK,
+    response_model=pres_responses.Response[responses.Devices],
     responses=registry.get_exception_responses(
         exceptions.NotFound,
     ),
 )
 async def get_devices(
     nest: typing.Annotated[int, paths.IdPath()],
+    after: typing.Annotated[
+        int | None,
+        pages.AfterQuery(description="Идентификатор устройства, после которого начинается страница"),
+    ] = None,
+    limit: typing.Annotated[int | None, pages.LimitQuery()] = None,
+    listing_format: typing.Annotated[pages.ListingFormat, pages.FormatQuery()] = "json",
     mediator: cqrs.Mediator = fastapi.Depends(dependencies.inject_mediator),
-) -> pres_responses.Response[responses.Devices]:
-    """Возвращает коллекцию устройств на техническом узле"""
-    result = await mediator.send(queries.Devices(nest=nest))
+) -> pres_responses.Response[responses.Devices] | raw.NDJSONStreamingResponse:
+    """
+    Возвращает устройства технического узла по возрастанию идентификатора.
+
+    Без `limit` возвращаются все устройства после `after`. Курсор следующей страницы - `next_after`.
+    При `format=ndjson` устройства отдаются потоком, по одному на строку.
+    """
+    if listing_format == "ndjson":
+        stream: responses.DevicesStream = await mediator.send(
+            queries.DevicesStream(nest=nest, after=after, limit=limit)
+        )
+        return raw.ndjson(stream.devices)
+    result = await mediator.send(queries.Devices(nest=nest, after=after, limit=limit))
     return pres_responses.Response(result=result)
@@ -2,16 +2,22 @@ import typing
 
 import di
 
-from infrastructire import settings
+from infrastructire import outbox, settings
 from service_layer import cqrs, dependencies
 from service_layer.cqrs import events, requests
 from service_layer.cqrs.container import di as ed_di_container
-from service_layer.cqrs.message_brokers import amqp, protocol
+from service_layer.cqrs.message_brokers import amqp
+from service_layer.cqrs.message_brokers import outbox as outbox_broker
+from service_layer.cqrs.message_brokers import protocol
 from service_layer.cqrs.middlewares import base as mediator_middlewares
 from service_layer.cqrs.middlewares import logging as logging_middleware
+from service_layer.cqrs.middlewares import single_flight
 from service_layer.handlers import commands as command_handlers
+from service_layer.handlers import events as event_handlers
 from service_layer.handlers import queries as query_handlers
-from service_layer.models import commands, queries
+from service_layer.models import commands
+from service_layer.models import events as domain_events
+from service_layer.models import queries
 
 
 def init_commands(mapper: requests.RequestMap):
@@ -19,21 +25,48 @@ def init_commands(mapper: requests.RequestMap):
     mapper.bind(commands.CreateHolder, command_handlers.CreateHolderHandler)
     mapper.bind(commands.UpdateTechNestIndicators, command_handlers.UpdateTechNestIndicatorsHandler)
     mapper.bind(commands.UpdateDeviceIndicators, command_handlers.UpdatedDeviceIndicatorsHandler)
+    mapper.bind(commands.UpdateIndicatorsBatch, command_handlers.UpdateIndicatorsBatchHandler)
+    mapper.bind(commands.PatchTechNestIndicators, command_handlers.PatchTechNestIndicatorsHandler)
+    mapper.bind(commands.PatchDeviceIndicators, command_handlers.PatchDeviceIndicatorsHandler)
+    mapper.bind(commands.SweepOfflineDevices, command_handlers.SweepOfflineDevicesHandler)
     mapper.bind(commands.AddTechNest, command_handlers.AddTechNestHandler)
     mapper.bind(commands.AddDevice, command_handlers.AddDeviceHandler)
+    mapper.bind(commands.StartTopologyImport, command_handlers.StartTopologyImportHandler)
+    mapper.bind(commands.ImportTopology, command_handlers.ImportTopologyHandler)
 
 
 def init_events(mapper: events.EventMap):
     """Инициализирует обработчики событий"""
+    if settings.topology_settings.PROJECTION_ENABLED:
+        mapper.bind(domain_events.HolderCreated, event_handlers.ProjectHolderCreatedHandler)
+        mapper.bind(domain_events.TechNestAdded, event_handlers.ProjectTechNestChangedHandler)
+        mapper.bind(domain_events.DeviceAdded, event_handlers.ProjectTechNestChangedHandler)
+        mapper.bind(domain_events.TopologyImported, event_handlers.ProjectTopologyImportedHandler)
+    if settings.topology_settings.INDEX_ENABLED:
+        mapper.bind(domain_events.TechNestAdded, event_handlers.IndexTechNestAddedHandler)
+        mapper.bind(domain_events.DeviceAdded, event_handlers.IndexDeviceAddedHandler)
 
 
 def init_queries(mapper: requests.RequestMap):
     """Инициализирует обработчики запросов"""
     mapper.bind(queries.Holder, query_handlers.GetHolderHandler)
     mapper.bind(queries.TechNests, query_handlers.GetTechNestsHandler)
+    mapper.bind(queries.TechNestsStream, query_handlers.StreamTechNestsHandler)
     mapper.bind(queries.Devices, query_handlers.GetDevicesHandler)
+    mapper.bind(queries.DevicesStream, query_handlers.StreamDevicesHandler)
+    mapper.bind(queries.NestsInArea, query_handlers.GetNestsInAreaHandler)
+    mapper.bind(queries.NestsNear, query_handlers.GetNestsNearHandler)
     mapper.bind(queries.TechNestIndicators, query_handlers.GetTargetNestIndicatorsHandler)
     mapper.bind(queries.DevicesIndicators, query_handlers.GetDevicesIndicatorsHandler)
+    mapper.bind(queries.RawTechNestIndicators, query_handlers.GetRawTargetNestIndicatorsHandler)
+    mapper.bind(queries.RawDevicesIndicators, query_handlers.GetRawDevicesIndicatorsHandler)
+    mapper.bind(queries.HolderSnapshot, query_handlers.GetHolderSnapshotHandler)
+    mapper.bind(queries.NestsSnapshot, query_handlers.GetNestsSnapshotHandler)
+    mapper.bind(queries.OfflineDevices, query_handlers.GetOfflineDevicesHandler)
+    mapper.bind(queries.TopologyImport, query_handlers.GetTopologyImportHandler)
+    mapper.bind(queries.TopologyImportErrors, query_handlers.GetTopologyImportErrorsHandler)
+    mapper.bind(queries.TechNestIndicatorsHistory, query_handlers.GetTechNestIndicatorsHistoryHandler)
+    mapper.bind(queries.DeviceIndicatorsHistory, query_handlers.GetDeviceIndicatorsHistoryHandler)
 
 
 def setup_mediator(
@@ -58,6 +91,8 @@ def setup_mediator(
         event_map=event_mapper,
         container=container,
         message_broker=message_broker,
+        max_concurrency=settings.events_settings.MAX_CONCURRENCY,
+        handler_timeout=settings.events_settings.HANDLER_TIMEOUT,
     )
     middleware_chain = mediator_middlewares.MiddlewareChain()
     if middlewares is None:
@@ -74,7 +109,10 @@ def setup_mediator(
     )
 
 
-DEFAULT_MESSAGE_BROKER = amqp.AMQPMessageBroker(settings.get_amqp_url())
+if settings.outbox_settings.INDICATORS_ENABLED:
+    DEFAULT_MESSAGE_BROKER = outbox_broker.OutboxMessageBroker(outbox.get_redis_outbox())
+else:
+    DEFAULT_MESSAGE_BROKER = amqp.AMQPMessageBroker(settings.get_amqp_url())
 
 
 def bootstrap(
@@ -91,10 +129,19 @@ def bootstrap(
         di_container = dependencies.container
     if middlewares is None:
         middlewares = []
+    default_middlewares = [logging_middleware.LoggingMiddleware()]
+    if settings.queries_settings.COALESCE_ENABLED:
+        # Потоковые ответы читаются один раз и не могут быть разделены между запросами
+        default_middlewares.append(
+            single_flight.SingleFlightMiddleware(
+                request_types=(queries.Query,),
+                exclude=(queries.TechNestsStream, queries.DevicesStream),
+            )
+        )
     return setup_mediator(
         message_broker,
         di_container,
-        middlewares=middlewares + [logging_middleware.LoggingMiddleware()],
+        middlewares=middlewares + default_middlewares,
         commands_mapper=commands_mapper,
         events_mapper=events_mapper,
         queries_mapper=queries_mapper,
@@ -1,3 +1,4 @@
+import contextlib
 import typing
 
 import di
@@ -9,8 +10,22 @@ T = typing.TypeVar("T")
 
 
 class DIContainer(container.Container[di.Container]):
+    """
+    Контейнер поверх di.
+
+    Граф зависимостей решается один раз на тип и переиспользуется до ``reset``. Зависимости
+    с областью ``app`` создаются один раз на контейнер и освобождаются ``close``, с областью
+    ``request`` - при каждом разрешении.
+    """
+
+    SCOPES: typing.ClassVar[tuple[str, ...]] = ("app", "request")
+
     def __init__(self) -> None:
         self._external_container: di.Container | None = None
+        self._executor = executors.AsyncExecutor()
+        self._solved: dict[type, di.SolvedDependent] = {}
+        self._app_scope: contextlib.AbstractAsyncContextManager[di.ScopeState] | None = None
+        self._app_state: di.ScopeState | None = None
 
     @property
     def external_container(self) -> di.Container:
@@ -21,9 +36,33 @@ class DIContainer(container.Container[di.Container]):
 
     def attach_external_container(self, container: di.Container) -> None:
         self._external_container = container
+        self._solved.clear()
+
+    async def reset(self) -> None:
+        """Сбрасывает решенные графы и зависимости приложения, например, после изменения привязок"""
+        self._solved.clear()
+        await self.close()
+
+    async def close(self) -> None:
+        """Освобождает зависимости приложения"""
+        app_scope, self._app_scope, self._app_state = self._app_scope, None, None
+        if app_scope is not None:
+            await app_scope.__aexit__(None, None, None)
+
+    def _solve(self, type_: typing.Type[T]) -> di.SolvedDependent[T]:
+        solved = self._solved.get(type_)
+        if solved is None:
+            solved = self._solved[type_] = self.external_container.solve(
+                dependent.Dependent(type_, scope="request"),
+                scopes=self.SCOPES,
+            )
+        return solved
 
     async def resolve(self, type_: typing.Type[T]) -> T:
-        executor = executors.AsyncExecutor()
-        solved = self.external_container.solve(dependent.Dependent(type_, scope="request"), scopes=["request"])
-        with self.external_container.enter_scope("request") as state:
-            return await solved.execute_async(executor=executor, state=state)
+        solved = self._solve(type_)
+        if self._app_scope is None:
+            # Область приложения живет до close
+            self._app_scope = self.external_container.enter_scope("app")
+            self._app_state = await self._app_scope.__aenter__()
+        with self.external_container.enter_scope("request", state=self._app_state) as state:
+            return await solved.execute_async(executor=self._executor, state=state)
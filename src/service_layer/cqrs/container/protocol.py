@@ -18,3 +18,7 @@ class Container(typing.Protocol[C]):
 
     async def resolve(self, type_: typing.Type[T]) -> T:
         ...
+
+    async def close(self) -> None:
+        """Releases the dependencies living as long as the container."""
+        ...
@@ -1,9 +1,10 @@
 from service_layer.cqrs.dispatcher.default import DefaultDispatcher
-from service_layer.cqrs.dispatcher.dispatch_result import DispatchResult
+from service_layer.cqrs.dispatcher.dispatch_result import BatchDispatchResult, DispatchResult
 from service_layer.cqrs.dispatcher.protocol import Dispatcher
 
 __all__ = (
     "DispatchResult",
+    "BatchDispatchResult",
     "DefaultDispatcher",
     "Dispatcher",
 )
@@ -1,4 +1,6 @@
-from service_layer.cqrs import container, middlewares, requests
+import typing
+
+from service_layer.cqrs import container, middlewares, requests, response
 from service_layer.cqrs.dispatcher import dispatch_result
 
 
@@ -19,3 +21,59 @@ class DefaultDispatcher:
         wrapped_handle = self._middleware_chain.wrap(handler.handle)
         response = await wrapped_handle(request)
         return dispatch_result.DispatchResult(response=response, events=handler.events)
+
+    async def dispatch_many(self, batch: typing.Sequence[requests.Request]) -> dispatch_result.BatchDispatchResult:
+        """
+        Dispatches several requests grouped by type. Groups are handled in the order of the first request.
+
+        A handler with ``handle_batch`` is resolved once and handles the whole group, other requests
+        are dispatched one by one. A failed request is represented by its exception in the result.
+        """
+        groups: dict[type, list[int]] = {}
+        for position, request in enumerate(batch):
+            groups.setdefault(type(request), []).append(position)
+
+        responses: list = [None] * len(batch)
+        events = []
+        for request_type, positions in groups.items():
+            group = [batch[position] for position in positions]
+            handler_type = self._request_map.get(request_type)
+            if hasattr(handler_type, "handle_batch"):
+                results = await self._dispatch_batch(handler_type, group, events)
+            else:
+                results = [await self._dispatch_one(request, events) for request in group]
+            for position, result in zip(positions, results):
+                responses[position] = result
+        return dispatch_result.BatchDispatchResult(responses=responses, events=events)
+
+    async def _dispatch_one(self, request: requests.Request, events: list) -> typing.Any:
+        try:
+            result = await self.dispatch(request)
+        except Exception as error:
+            return error
+        events.extend(result.events)
+        return result.response
+
+    async def _dispatch_batch(
+        self,
+        handler_type: typing.Type[requests.BatchRequestHandler],
+        group: list[requests.Request],
+        events: list,
+    ) -> list:
+        try:
+            handler = await self._container.resolve(handler_type)
+
+            async def handle(batch: requests.RequestBatch) -> response.ResponseBatch:
+                results = await handler.handle_batch(batch.requests)
+                errors = {position: result for position, result in enumerate(results) if isinstance(result, Exception)}
+                return response.ResponseBatch(
+                    responses=[None if position in errors else result for position, result in enumerate(results)],
+                    errors=errors,
+                )
+
+            wrapped_handle = self._middleware_chain.wrap(handle)
+            result = await wrapped_handle(requests.RequestBatch(requests=group))
+        except Exception as error:
+            return [error] * len(group)
+        events.extend(handler.events)
+        return [result.errors.get(position, item) for position, item in enumerate(result.responses)]
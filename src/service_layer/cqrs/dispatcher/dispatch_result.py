@@ -1,3 +1,5 @@
+import typing
+
 import pydantic
 
 from service_layer.cqrs import response as res
@@ -7,3 +9,12 @@ from service_layer.cqrs.events import event
 class DispatchResult(pydantic.BaseModel):
     response: res.Response | None = pydantic.Field(default=None)
     events: list[event.Event] = pydantic.Field(default_factory=list)
+
+
+class BatchDispatchResult(pydantic.BaseModel):
+    """Results of several requests in the order of requests: a response, None or the exception of a failed request"""
+
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+    responses: list[typing.Any] = pydantic.Field(default_factory=list)
+    events: list[event.Event] = pydantic.Field(default_factory=list)
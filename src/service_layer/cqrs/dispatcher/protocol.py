@@ -7,3 +7,6 @@ from service_layer.cqrs.dispatcher import dispatch_result
 class Dispatcher(typing.Protocol):
     async def dispatch(self, request: requests.Request) -> dispatch_result.DispatchResult:
         ...
+
+    async def dispatch_many(self, batch: typing.Sequence[requests.Request]) -> dispatch_result.BatchDispatchResult:
+        ...
@@ -1,5 +1,5 @@
 from service_layer.cqrs.events.event import DomainEvent, ECSTEvent, Event
-from service_layer.cqrs.events.event_emitter import EventEmitter
+from service_layer.cqrs.events.event_emitter import EventEmitter, build_message
 from service_layer.cqrs.events.event_handler import EventHandler
 from service_layer.cqrs.events.map import EventMap
 
@@ -10,4 +10,5 @@ __all__ = (
     "EventEmitter",
     "EventHandler",
     "EventMap",
+    "build_message",
 )
@@ -1,11 +1,19 @@
 import datetime
+import typing
 import uuid
 
 import pydantic
 
 
 class Event(pydantic.BaseModel):
-    ...
+    def ordering_key(self) -> typing.Hashable | None:
+        """
+        Returns the key of the aggregate the event belongs to.
+
+        Events with the same key are handled in the order they were emitted,
+        events with different keys or without a key may be handled concurrently.
+        """
+        return None
 
 
 class DomainEvent(Event):
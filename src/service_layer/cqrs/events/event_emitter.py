@@ -1,14 +1,26 @@
+import asyncio
 import functools
+import typing
 
-from infrastructire import logging
+from infrastructire import logging, metrics
 from service_layer.cqrs import container, message_brokers
-from service_layer.cqrs.events import event, map
+from service_layer.cqrs.events import event, event_handler, map
+
+handler_failures = metrics.registry.counter(
+    "event_handler_failures",
+    "Обработчики доменных событий, завершившиеся ошибкой или по таймауту",
+)
 
 
 class EventEmitter:
     """
     The event emitter is responsible for sending events to the according handlers or
     to the message broker abstraction.
+
+    Handlers of a domain event run concurrently. Events of the same aggregate (see
+    ``Event.ordering_key``) are handled one after another, other events concurrently.
+    At most ``max_concurrency`` handlers run at once within a single emit. A failed or
+    timed out handler is logged and does not affect the other handlers and the caller.
     """
 
     def __init__(
@@ -16,10 +28,15 @@ class EventEmitter:
         event_map: map.EventMap,
         container: container.Container,
         message_broker: message_brokers.MessageBroker | None = None,
+        *,
+        max_concurrency: int = 1,
+        handler_timeout: float | None = None,
     ) -> None:
         self._event_map = event_map
         self._container = container
         self._message_broker = message_broker
+        self._max_concurrency = max_concurrency
+        self._handler_timeout = handler_timeout
 
     @functools.singledispatchmethod
     async def emit(self, event: event.Event) -> None:
@@ -27,24 +44,54 @@ class EventEmitter:
 
     @emit.register
     async def _(self, event: event.DomainEvent) -> None:
+        await self._handle_event(event, asyncio.Semaphore(self._max_concurrency))
+
+    async def _handle_event(self, event: event.DomainEvent, semaphore: asyncio.Semaphore) -> None:
         handlers_types = self._event_map.get(type(event))
         if not handlers_types:
             logging.logger.debug(f"Handler for {type(event).__name__} not found")
-        for handler_type in handlers_types:
-            handler = await self._container.resolve(handler_type)
-            logging.logger.debug(
-                "Handling Event(%s) via event handler(%s)",
-                type(event).__name__,
-                handler_type.__name__,
-            )
-            await handler.handle(event)
+            return
+        await asyncio.gather(*(self._handle(handler_type, event, semaphore) for handler_type in handlers_types))
+
+    async def _handle_sequentially(
+        self,
+        events: typing.Sequence[event.DomainEvent],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        for item in events:
+            await self._handle_event(item, semaphore)
+
+    async def _handle(
+        self,
+        handler_type: typing.Type[event_handler.EventHandler],
+        event: event.DomainEvent,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        async with semaphore:
+            try:
+                handler = await self._container.resolve(handler_type)
+                logging.logger.debug(
+                    "Handling Event(%s) via event handler(%s)",
+                    type(event).__name__,
+                    handler_type.__name__,
+                )
+                await asyncio.wait_for(handler.handle(event), self._handler_timeout)
+            except asyncio.TimeoutError:
+                handler_failures.inc()
+                logging.logger.error(
+                    f"Event handler {handler_type.__name__} timed out on {type(event).__name__} "
+                    f"after {self._handler_timeout} s"
+                )
+            except Exception:
+                handler_failures.inc()
+                logging.logger.exception(f"Event handler {handler_type.__name__} failed on {type(event).__name__}")
 
     @emit.register
     async def _(self, event: event.NotificationEvent) -> None:
         if not self._message_broker:
             raise RuntimeError("To use NotificationEvent, message_broker argument must be specified.")
 
-        message = _build_message(event)
+        message = build_message(event)
 
         logging.logger.debug(
             "Sending Notification Event(%s) to message broker %s",
@@ -59,7 +106,7 @@ class EventEmitter:
         if not self._message_broker:
             raise RuntimeError("To use ECSTEvent, message_broker argument must be specified.")
 
-        message = _build_message(event)
+        message = build_message(event)
 
         logging.logger.debug(
             "Sending ECST event(%s) to message broker %s",
@@ -69,8 +116,48 @@ class EventEmitter:
 
         await self._message_broker.send_message(message)
 
+    async def emit_many(self, events: typing.Sequence[event.Event]) -> None:
+        """
+        Emits several events at once.
+
+        Domain events are grouped by ordering key: groups are handled concurrently,
+        events of a group in the order they were emitted. Notification and ECST events
+        are sent to the message broker as a single batch alongside the domain events.
+        """
+        broker_events: list[event.NotificationEvent | event.ECSTEvent] = []
+        groups: dict[typing.Hashable, list[event.DomainEvent]] = {}
+        for item in events:
+            if isinstance(item, (event.NotificationEvent, event.ECSTEvent)):
+                broker_events.append(item)
+                continue
+            if not isinstance(item, event.DomainEvent):
+                continue
+            key = item.ordering_key()
+            # Events without a key are not ordered relative to each other
+            groups.setdefault(object() if key is None else key, []).append(item)
+
+        if broker_events and not self._message_broker:
+            raise RuntimeError("To use NotificationEvent or ECSTEvent, message_broker argument must be specified.")
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        tasks = [self._handle_sequentially(group, semaphore) for group in groups.values()]
+        if broker_events:
+            tasks.append(self._send_batch(broker_events))
+        # Handler errors are caught in _handle, only message broker errors get here
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _send_batch(self, events: typing.Sequence[event.NotificationEvent | event.ECSTEvent]) -> None:
+        logging.logger.debug(
+            "Sending batch of %s events to message broker %s",
+            len(events),
+            type(self._message_broker).__name__,
+        )
+        await self._message_broker.send_messages([build_message(item) for item in events])
+
 
-def _build_message(event: event.NotificationEvent | event.ECSTEvent) -> message_brokers.Message:
+def build_message(event: event.NotificationEvent | event.ECSTEvent) -> message_brokers.Message:
     payload = event.model_dump(mode="json")
 
     return message_brokers.Message(
@@ -42,6 +42,7 @@ class Mediator:
         dispatcher_type: typing.Type[dispatcher.Dispatcher] = dispatcher.DefaultDispatcher,
     ) -> None:
         self._event_emitter = event_emitter
+        self._container = container
         self._dispatcher = dispatcher_type(
             request_map=request_map, container=container, middleware_chain=middleware_chain  # type: ignore
         )
@@ -54,10 +55,31 @@ class Mediator:
 
         return dispatch_result.response
 
+    async def send_many(self, requests: typing.Sequence[Req]) -> list[Resp | Exception | None]:
+        """
+        Handles several requests at once and returns results in the order of requests.
+
+        Requests are grouped by type, handlers with ``handle_batch`` handle a group with a single
+        resolution and middleware chain call. A failed request is represented by its exception,
+        other requests are not affected. Events of all requests are emitted together.
+        """
+        dispatch_result = await self._dispatcher.dispatch_many(requests)
+
+        if dispatch_result.events:
+            await self._send_events(dispatch_result.events.copy())
+
+        return dispatch_result.responses
+
+    async def close(self) -> None:
+        """Releases the dependencies of the container, should be called on application shutdown."""
+        await self._container.close()
+
     async def _send_events(self, events: list[E]) -> None:
         if not self._event_emitter:
             return
 
-        while events:
-            event = events.pop()
-            await self._event_emitter.emit(event)
+        if len(events) == 1:
+            await self._event_emitter.emit(events.pop())
+            return
+
+        await self._event_emitter.emit_many(events)
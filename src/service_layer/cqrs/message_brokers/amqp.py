@@ -1,5 +1,6 @@
+import typing
+
 import aio_pika
-import orjson
 
 from infrastructire import publishers, settings
 from service_layer.cqrs.message_brokers import protocol
@@ -19,5 +20,12 @@ class AMQPMessageBroker:
             exchange_name=exchange_name or amqp_settings.EVENTS_EXCHANGE,
         )
 
+    @staticmethod
+    def _build_amqp_message(message: protocol.Message) -> aio_pika.Message:
+        return aio_pika.Message(body=message.encode())
+
     async def send_message(self, message: protocol.Message) -> None:
-        await self.publisher.__call__(message=aio_pika.Message(body=orjson.dumps(message.model_dump(mode="json"))))
+        await self.publisher.__call__(message=self._build_amqp_message(message))
+
+    async def send_messages(self, messages: typing.Sequence[protocol.Message]) -> None:
+        await self.publisher.publish_many(list(map(self._build_amqp_message, messages)))
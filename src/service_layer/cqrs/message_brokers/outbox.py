@@ -0,0 +1,22 @@
+import typing
+
+from infrastructire import outbox
+from service_layer.cqrs.message_brokers import protocol
+
+
+class OutboxMessageBroker:
+    """
+    Writes messages to the outbox instead of sending them to the message broker.
+
+    Messages are sent to the message broker later by the outbox relay, so the sender
+    does not wait for the message broker.
+    """
+
+    def __init__(self, outbox: outbox.Outbox):
+        self.outbox = outbox
+
+    async def send_message(self, message: protocol.Message) -> None:
+        await self.outbox.put([message.encode()])
+
+    async def send_messages(self, messages: typing.Sequence[protocol.Message]) -> None:
+        await self.outbox.put([message.encode() for message in messages])
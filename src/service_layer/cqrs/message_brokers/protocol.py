@@ -1,6 +1,7 @@
 import typing
 import uuid
 
+import orjson
 import pydantic
 
 
@@ -10,6 +11,10 @@ class Message(pydantic.BaseModel):
     message_id: uuid.UUID = pydantic.Field(default_factory=uuid.uuid4)
     payload: dict = pydantic.Field()
 
+    def encode(self) -> bytes:
+        """Returns the message body as it is sent to the message broker"""
+        return orjson.dumps(self.model_dump(mode="json"))
+
 
 class MessageBroker(typing.Protocol):
     """
@@ -20,3 +25,6 @@ class MessageBroker(typing.Protocol):
 
     async def send_message(self, message: Message) -> None:
         ...
+
+    async def send_messages(self, messages: typing.Sequence[Message]) -> None:
+        ...
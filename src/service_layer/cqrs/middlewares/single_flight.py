@@ -0,0 +1,57 @@
+import asyncio
+import typing
+
+from infrastructire import metrics
+from service_layer.cqrs import requests, response
+
+Req = typing.TypeVar("Req", bound=requests.Request, contravariant=True)
+Res = typing.TypeVar("Res", response.Response, None, covariant=True)
+HandleType = typing.Callable[[Req], typing.Awaitable[Res]]
+
+coalesced = metrics.registry.counter(
+    "queries_coalesced",
+    "Запросы, получившие результат одновременно выполнявшегося такого же запроса",
+)
+
+
+class SingleFlightMiddleware:
+    """
+    Coalesces identical concurrent requests.
+
+    While a request is handled, requests of the same type with equal fields (except ``request_id``)
+    await its result instead of being handled again. The handling runs in a separate task, so
+    a cancelled caller does not cancel it for the others.
+
+    Only requests of ``request_types`` (and not of ``exclude``) are coalesced. They must have no
+    side effects and return a response that may be shared between callers.
+    """
+
+    def __init__(
+        self,
+        request_types: tuple[typing.Type[requests.Request], ...],
+        exclude: tuple[typing.Type[requests.Request], ...] = (),
+    ) -> None:
+        self._request_types = request_types
+        self._exclude = exclude
+        self._in_flight: dict[tuple[type, str], asyncio.Task] = {}
+
+    def _forget(self, key: tuple[type, str], task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Ошибка будет получена ожидающими, а если их не осталось - не попадет в лог как непрочитанная
+        if not task.cancelled():
+            task.exception()
+
+    async def __call__(self, request: Req, handle: HandleType) -> Res:
+        if not isinstance(request, self._request_types) or isinstance(request, self._exclude):
+            return await handle(request)
+
+        key = (type(request), request.model_dump_json(exclude={"request_id"}))
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(handle(request))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            coalesced.inc()
+        return await asyncio.shield(task)
@@ -1,9 +1,11 @@
 from service_layer.cqrs.requests.map import RequestMap
-from service_layer.cqrs.requests.request import Request
-from service_layer.cqrs.requests.request_handler import RequestHandler
+from service_layer.cqrs.requests.request import Request, RequestBatch
+from service_layer.cqrs.requests.request_handler import BatchRequestHandler, RequestHandler
 
 __all__ = (
     "RequestMap",
     "Request",
+    "RequestBatch",
     "RequestHandler",
+    "BatchRequestHandler",
 )
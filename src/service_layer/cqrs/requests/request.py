@@ -1,3 +1,4 @@
+import typing
 import uuid
 
 import pydantic
@@ -12,3 +13,13 @@ class Request(pydantic.BaseModel):
     """
 
     request_id: uuid.UUID = pydantic.Field(default_factory=uuid.uuid4)
+
+
+class RequestBatch(Request):
+    """
+    Requests of the same type handled at once by ``BatchRequestHandler.handle_batch``.
+
+    Passes a batch through the middleware chain as a single request.
+    """
+
+    requests: list[typing.Any] = pydantic.Field(default_factory=list)
@@ -43,3 +43,15 @@ class RequestHandler(typing.Protocol[Req, Res]):
 
     async def handle(self, request: Req) -> Res:
         raise NotImplementedError
+
+
+class BatchRequestHandler(RequestHandler[Req, Res], typing.Protocol):
+    """
+    The request handler, which is able to handle several requests of its type at once.
+
+    Used by ``Mediator.send_many`` instead of calling ``handle`` for each request.
+    Returns results in the order of requests, a failed request is represented by its exception.
+    """
+
+    async def handle_batch(self, requests: typing.Sequence[Req]) -> list[Res | Exception]:
+        raise NotImplementedError
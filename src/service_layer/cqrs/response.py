@@ -1,3 +1,5 @@
+import typing
+
 import pydantic
 
 
@@ -10,3 +12,16 @@ class Response(pydantic.BaseModel):
     Often the response is used for defining the result of the query.
 
     """
+
+
+class ResponseBatch(Response):
+    """
+    Responses to ``RequestBatch`` in the order of requests.
+
+    Failed requests have None response and the exception in ``errors`` by position.
+    """
+
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+    responses: list[typing.Any] = pydantic.Field(default_factory=list)
+    errors: dict[int, Exception] = pydantic.Field(default_factory=dict, exclude=True)
@@ -1,20 +1,46 @@
 import di
+import redis.asyncio as redis
 from di import dependent
 
-from infrastructire import factories, storages, uow
+from domain import deadband
+from infrastructire import (
+    caches,
+    codecs,
+    factories,
+    history,
+    imports,
+    indexes,
+    presence,
+    projections,
+    settings,
+    storages,
+    topology,
+    uow,
+)
 
 container = di.Container()
 
 SessionFactoryBind = di.bind_by_type(
-    dependent.Dependent(factories.SQLAlchemySessionFactory, scope="request"),
+    dependent.Dependent(factories.SQLAlchemySessionFactory, scope="app"),
     factories.SessionFactory[uow.S],
 )
 
-RepositoryFactoryBind = di.bind_by_type(
-    dependent.Dependent(factories.SQLAlchemyRepositoryFactory, scope="request"),
-    factories.RepositoryFactory[uow.S],
-)
+if settings.topology_settings.CACHE_ENABLED:
+    RepositoryFactoryBind = di.bind_by_type(
+        dependent.Dependent(topology.CachedRepositoryFactory, scope="app"),
+        factories.RepositoryFactory[uow.S],
+    )
+else:
+    RepositoryFactoryBind = di.bind_by_type(
+        dependent.Dependent(factories.SQLAlchemyRepositoryFactory, scope="app"),
+        factories.RepositoryFactory[uow.S],
+    )
+
 
+ReplicaSessionFactoryBind = di.bind_by_type(
+    dependent.Dependent(factories.SQLAlchemyReplicaSessionFactory, scope="app"),
+    factories.SQLAlchemyReplicaSessionFactory,
+)
 
 UoWBind = di.bind_by_type(
     dependent.Dependent(uow.SQLAlchemyUoW, scope="request"),
@@ -22,25 +48,121 @@ UoWBind = di.bind_by_type(
 )
 
 
+RedisConnectionPoolBind = di.bind_by_type(
+    dependent.Dependent(factories.get_redis_connection_pool, scope="app"),
+    redis.ConnectionPool,
+)
+
 RedisClientFactoryBind = di.bind_by_type(
-    dependent.Dependent(factories.RedisClientFactory, scope="request"),
+    dependent.Dependent(factories.RedisClientFactory, scope="app"),
     factories.RedisClientFactory,
 )
 
-TechNestIndicatorValuesStorageBind = di.bind_by_type(
-    dependent.Dependent(storages.RedisTechNestIndicatorValuesStorage, scope="request"),
-    storages.TechNestIndicatorValuesStorage,
+IndicatorValuesCodecBind = di.bind_by_type(
+    dependent.Dependent(codecs.get_codec, scope="app"),
+    codecs.IndicatorValuesCodec,
 )
 
-DeviceIndicatorValuesStorageBind = di.bind_by_type(
-    dependent.Dependent(storages.RedisDeviceIndicatorValuesStorage, scope="request"),
-    storages.DeviceIndicatorValuesStorage,
+# Хранилища с пополевой раскладкой подменяют документные, в том числе внутри кэширующих оберток
+if settings.indicators_settings.LAYOUT == "hash":
+    RedisTechNestIndicatorValuesStorage = storages.RedisHashTechNestIndicatorValuesStorage
+    RedisDeviceIndicatorValuesStorage = storages.RedisHashDeviceIndicatorValuesStorage
+else:
+    RedisTechNestIndicatorValuesStorage = storages.RedisTechNestIndicatorValuesStorage
+    RedisDeviceIndicatorValuesStorage = storages.RedisDeviceIndicatorValuesStorage
+
+RedisTechNestIndicatorValuesStorageBind = di.bind_by_type(
+    dependent.Dependent(RedisTechNestIndicatorValuesStorage, scope="request"),
+    storages.RedisTechNestIndicatorValuesStorage,
+)
+RedisDeviceIndicatorValuesStorageBind = di.bind_by_type(
+    dependent.Dependent(RedisDeviceIndicatorValuesStorage, scope="request"),
+    storages.RedisDeviceIndicatorValuesStorage,
+)
+
+if settings.indicators_settings.CACHE_ENABLED:
+    TechNestIndicatorValuesStorageBind = di.bind_by_type(
+        dependent.Dependent(caches.CachedTechNestIndicatorValuesStorage, scope="request"),
+        storages.TechNestIndicatorValuesStorage,
+    )
+    DeviceIndicatorValuesStorageBind = di.bind_by_type(
+        dependent.Dependent(caches.CachedDeviceIndicatorValuesStorage, scope="request"),
+        storages.DeviceIndicatorValuesStorage,
+    )
+else:
+    TechNestIndicatorValuesStorageBind = di.bind_by_type(
+        dependent.Dependent(RedisTechNestIndicatorValuesStorage, scope="request"),
+        storages.TechNestIndicatorValuesStorage,
+    )
+    DeviceIndicatorValuesStorageBind = di.bind_by_type(
+        dependent.Dependent(RedisDeviceIndicatorValuesStorage, scope="request"),
+        storages.DeviceIndicatorValuesStorage,
+    )
+
+IndicatorsDeadbandBind = di.bind_by_type(
+    dependent.Dependent(factories.get_indicators_deadband, scope="app"),
+    deadband.IndicatorsDeadband,
 )
 
+TechNestIndicatorsHistoryStorageBind = di.bind_by_type(
+    dependent.Dependent(history.RedisStreamTechNestIndicatorsHistoryStorage, scope="request"),
+    history.TechNestIndicatorsHistoryStorage,
+)
+
+DeviceIndicatorsHistoryStorageBind = di.bind_by_type(
+    dependent.Dependent(history.RedisStreamDeviceIndicatorsHistoryStorage, scope="request"),
+    history.DeviceIndicatorsHistoryStorage,
+)
+
+DevicesLastSeenIndexBind = di.bind_by_type(
+    dependent.Dependent(presence.RedisDevicesLastSeenIndex, scope="request"),
+    presence.DevicesLastSeenIndex,
+)
+
+TopologyImportsStorageBind = di.bind_by_type(
+    dependent.Dependent(imports.RedisTopologyImportsStorage, scope="request"),
+    imports.TopologyImportsStorage,
+)
+
+if settings.topology_settings.PROJECTION_ENABLED:
+    HolderNestsProjectionBind = di.bind_by_type(
+        dependent.Dependent(projections.RedisHolderNestsProjection, scope="request"),
+        projections.HolderNestsProjection,
+    )
+else:
+    HolderNestsProjectionBind = di.bind_by_type(
+        dependent.Dependent(projections.DisabledHolderNestsProjection, scope="request"),
+        projections.HolderNestsProjection,
+    )
+
+if settings.topology_settings.INDEX_ENABLED:
+    TopologyIndexBind = di.bind_by_type(
+        dependent.Dependent(indexes.get_topology_index, scope="app"),
+        indexes.TopologyIndex,
+    )
+else:
+    TopologyIndexBind = di.bind_by_type(
+        dependent.Dependent(indexes.DisabledTopologyIndex, scope="app"),
+        indexes.TopologyIndex,
+    )
+
 
+container.bind(RedisConnectionPoolBind)
 container.bind(RedisClientFactoryBind)
 container.bind(SessionFactoryBind)
 container.bind(RepositoryFactoryBind)
+container.bind(ReplicaSessionFactoryBind)
 container.bind(UoWBind)
+container.bind(IndicatorValuesCodecBind)
+if settings.indicators_settings.LAYOUT == "hash":
+    container.bind(RedisTechNestIndicatorValuesStorageBind)
+    container.bind(RedisDeviceIndicatorValuesStorageBind)
 container.bind(TechNestIndicatorValuesStorageBind)
 container.bind(DeviceIndicatorValuesStorageBind)
+container.bind(TechNestIndicatorsHistoryStorageBind)
+container.bind(DeviceIndicatorsHistoryStorageBind)
+container.bind(IndicatorsDeadbandBind)
+container.bind(DevicesLastSeenIndexBind)
+container.bind(TopologyImportsStorageBind)
+container.bind(HolderNestsProjectionBind)
+container.bind(TopologyIndexBind)
@@ -1,27 +1,83 @@
+import asyncio
+import datetime
+import typing
+import uuid
+
+import pydantic
+
+from domain import deadband as indicators_deadband
 from domain import exceptions, models
-from infrastructire import storages
+from infrastructire import history, imports, indexes, metrics, presence, projections, storages
 from infrastructire import uow as unit_of_work
 from service_layer.cqrs import requests
-from service_layer.cqrs.events import event
+from service_layer.cqrs.events import event, event_emitter
 from service_layer.models import commands, events, responses
 
+R = typing.TypeVar("R", bound=requests.Request)
+
+suppressed_updates = metrics.registry.counter(
+    "indicators_updates_suppressed",
+    "Обновления индикаторов, отброшенные зоной нечувствительности",
+)
+
+
+async def _publish(uow: unit_of_work.UoW, *items: event.NotificationEvent) -> None:
+    """Записывает события в outbox в транзакции команды"""
+    await uow.publish([event_emitter.build_message(item).encode() for item in items])
+
+
+async def _handle_each(handler: requests.RequestHandler, batch: typing.Sequence[requests.Request]) -> list:
+    """Обрабатывает запросы пачки по одному. Ошибка запроса возвращается на его месте"""
+    results = []
+    for request in batch:
+        try:
+            results.append(await handler.handle(request))
+        except Exception as error:
+            results.append(error)
+    return results
+
 
 class CreateHolderHandler(requests.RequestHandler[commands.CreateHolder, responses.HolderCreated]):
     """Создает новую компанию владельца"""
 
     def __init__(self, uow: unit_of_work.UoW):
         self.uow = uow
+        self._events = []
 
     @property
     def events(self) -> list[event.Event]:
-        return []
+        return self._events
 
     async def handle(self, request: commands.CreateHolder) -> responses.HolderCreated:
         async with self.uow.transaction() as uow:
             new_holder = models.Holder(name=request.name, inn=request.inn, kpp=request.kpp)
             new_holder_id = await uow.repository.add_holder(new_holder)
+            await _publish(uow, events.TopologyChanged(payload=models.TopologyChange(holder=new_holder_id)))
             await uow.commit()
-            return responses.HolderCreated(id=new_holder_id)
+        self._events.append(events.HolderCreated(holder=new_holder_id))
+        return responses.HolderCreated(id=new_holder_id)
+
+    async def handle_batch(
+        self,
+        batch: typing.Sequence[commands.CreateHolder],
+    ) -> list[responses.HolderCreated | Exception]:
+        try:
+            async with self.uow.transaction() as uow:
+                new_holder_ids = [
+                    await uow.repository.add_holder(models.Holder(name=request.name, inn=request.inn, kpp=request.kpp))
+                    for request in batch
+                ]
+                await _publish(
+                    uow,
+                    *(events.TopologyChanged(payload=models.TopologyChange(holder=id)) for id in new_holder_ids),
+                )
+                await uow.commit()
+        except Exception:
+            # Ошибка одного запроса отменяет транзакцию пачки: запросы повторяются по одному,
+            # чтобы ошибку получил только свой запрос
+            return await _handle_each(self, batch)
+        self._events.extend(events.HolderCreated(holder=id) for id in new_holder_ids)
+        return [responses.HolderCreated(id=id) for id in new_holder_ids]
 
 
 class AddTechNestHandler(requests.RequestHandler[commands.AddTechNest, responses.TechNestAdded]):
@@ -29,38 +85,75 @@ class AddTechNestHandler(requests.RequestHandler[commands.AddTechNest, responses
 
     def __init__(self, uow: unit_of_work.UoW):
         self.uow = uow
+        self._events = []
 
     @property
     def events(self) -> list[event.Event]:
-        return []
+        return self._events
+
+    @staticmethod
+    def _new_nest(request: commands.AddTechNest) -> models.TechNest:
+        new_location = models.TechNestLocation(
+            latitude=request.latitude,
+            longitude=request.longitude,
+            address=request.address,
+        )
+        return models.TechNest(
+            holder_id=request.holder,
+            name=request.name,
+            location=new_location,
+        )
 
     async def handle(self, request: commands.AddTechNest) -> responses.TechNestAdded:
         async with self.uow.transaction() as uow:
-            new_location = models.TechNestLocation(
-                latitude=request.latitude,
-                longitude=request.longitude,
-                address=request.address,
-            )
-            new_nest = models.TechNest(
-                holder_id=request.holder,
-                name=request.name,
-                location=new_location,
-            )
+            new_nest = self._new_nest(request)
             holder = await uow.repository.get_holder(request.holder)
             if holder is None:
                 raise exceptions.NotFound(f"Holder with id {request.holder} not found")
             new_nest_id = await uow.repository.add_nest(new_nest)
+            await _publish(
+                uow,
+                events.TopologyChanged(payload=models.TopologyChange(holder=request.holder, nest=new_nest_id)),
+            )
             await uow.commit()
-            return responses.TechNestAdded(id=new_nest_id)
+        self._events.append(events.TechNestAdded(holder=request.holder, nest=new_nest_id))
+        return responses.TechNestAdded(id=new_nest_id)
+
+    async def handle_batch(
+        self,
+        batch: typing.Sequence[commands.AddTechNest],
+    ) -> list[responses.TechNestAdded | Exception]:
+        try:
+            async with self.uow.transaction() as uow:
+                for holder in dict.fromkeys(request.holder for request in batch):
+                    if await uow.repository.get_holder(holder) is None:
+                        raise exceptions.NotFound(f"Holder with id {holder} not found")
+                new_nest_ids = [await uow.repository.add_nest(self._new_nest(request)) for request in batch]
+                await _publish(
+                    uow,
+                    *(
+                        events.TopologyChanged(payload=models.TopologyChange(holder=request.holder, nest=id))
+                        for request, id in zip(batch, new_nest_ids)
+                    ),
+                )
+                await uow.commit()
+        except Exception:
+            # Ошибка одного запроса отменяет транзакцию пачки: запросы повторяются по одному
+            return await _handle_each(self, batch)
+        self._events.extend(
+            events.TechNestAdded(holder=request.holder, nest=id) for request, id in zip(batch, new_nest_ids)
+        )
+        return [responses.TechNestAdded(id=id) for id in new_nest_ids]
 
 
 class AddDeviceHandler(requests.RequestHandler[commands.AddDevice, responses.DeviceAdded]):
     def __init__(self, uow: unit_of_work.UoW):
         self.uow = uow
+        self._events = []
 
     @property
     def events(self) -> list[event.Event]:
-        return []
+        return self._events
 
     async def handle(self, request: commands.AddDevice) -> responses.DeviceAdded:
         async with self.uow.transaction() as uow:
@@ -69,16 +162,111 @@ class AddDeviceHandler(requests.RequestHandler[commands.AddDevice, responses.Dev
                 raise exceptions.NotFound(f"Nest with nest_id {request.nest} not found")
             device = models.Device(name=request.name, model=request.model, nest_id=request.nest)
             new_device_id = await uow.repository.add_device(device)
+            await _publish(
+                uow,
+                events.TopologyChanged(
+                    payload=models.TopologyChange(
+                        holder=existed_nest.holder_id, nest=request.nest, device=new_device_id
+                    )
+                ),
+            )
             await uow.commit()
-            return responses.DeviceAdded(id=new_device_id)
+        self._events.append(events.DeviceAdded(holder=existed_nest.holder_id, nest=request.nest, device=new_device_id))
+        return responses.DeviceAdded(id=new_device_id)
+
+    async def handle_batch(self, batch: typing.Sequence[commands.AddDevice]) -> list[responses.DeviceAdded | Exception]:
+        try:
+            async with self.uow.transaction() as uow:
+                holders: dict[int, int] = {}
+                for nest in dict.fromkeys(request.nest for request in batch):
+                    existed_nest = await uow.repository.get_nest(nest_id=nest)
+                    if existed_nest is None:
+                        raise exceptions.NotFound(f"Nest with nest_id {nest} not found")
+                    holders[nest] = existed_nest.holder_id
+                new_device_ids = [
+                    await uow.repository.add_device(
+                        models.Device(name=request.name, model=request.model, nest_id=request.nest)
+                    )
+                    for request in batch
+                ]
+                added = [
+                    models.TopologyChange(holder=holders[request.nest], nest=request.nest, device=id)
+                    for request, id in zip(batch, new_device_ids)
+                ]
+                await _publish(uow, *(events.TopologyChanged(payload=change) for change in added))
+                await uow.commit()
+        except Exception:
+            # Ошибка одного запроса отменяет транзакцию пачки: запросы повторяются по одному
+            return await _handle_each(self, batch)
+        self._events.extend(
+            events.DeviceAdded(holder=change.holder, nest=change.nest, device=change.device) for change in added
+        )
+        return [responses.DeviceAdded(id=id) for id in new_device_ids]
+
+
+async def _check_nest(topology_index: indexes.TopologyIndex, nest: int) -> None:
+    if await topology_index.unknown_nests([nest]):
+        raise exceptions.NotFound(f"Nest {nest} not found")
+
+
+async def _check_device(topology_index: indexes.TopologyIndex, nest: int, device: int) -> None:
+    if await topology_index.mismatched_devices({device: nest}):
+        raise exceptions.NotFound(f"Device {device} of nest {nest} not found")
+
+
+def _rounds(batch: typing.Sequence[R], key: str) -> list[dict[int, tuple[int, R]]]:
+    """
+    Разбивает запросы пачки на очереди, в каждой из которых сущность встречается один раз.
+
+    Очереди обрабатываются по порядку, поэтому обновления одной сущности применяются в порядке
+    запросов, как при обработке по одному. Возвращает очереди: идентификатор -> (позиция, запрос).
+    """
+    rounds: list[dict[int, tuple[int, R]]] = []
+    for position, request in enumerate(batch):
+        id = getattr(request, key)
+        number = next((number for number, items in enumerate(rounds) if id not in items), len(rounds))
+        if number == len(rounds):
+            rounds.append({})
+        rounds[number][id] = (position, request)
+    return rounds
+
+
+async def _store_batch(
+    storage: storages.IndicatorValuesStorage,
+    history_storage: history.IndicatorsHistoryStorage,
+    values: dict[int, typing.Any],
+    changed: typing.Callable[[typing.Any, typing.Any], bool] | None,
+) -> tuple[dict[int, typing.Any], dict[int, Exception]]:
+    """Сохраняет значения пачкой, отбрасывая незначимые изменения. Возвращает сохраненные значения и ошибки"""
+    if changed is not None and values:
+        previous_values = await storage.get_values(*values)
+        significant = {
+            id: value for (id, value), previous in zip(values.items(), previous_values) if changed(previous, value)
+        }
+        suppressed_updates.inc(len(values) - len(significant))
+        values = significant
+    errors = await storage.set_values(values)
+    stored = {id: value for id, value in values.items() if id not in errors}
+    await history_storage.append_many(stored)
+    return stored, errors
 
 
 class UpdateTechNestIndicatorsHandler(requests.RequestHandler[commands.UpdateTechNestIndicators, None]):
     """Обновляет данные индикаторов технического узла"""
 
-    def __init__(self, uow: unit_of_work.UoW, storage: storages.TechNestIndicatorValuesStorage):
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        storage: storages.TechNestIndicatorValuesStorage,
+        history_storage: history.TechNestIndicatorsHistoryStorage,
+        deadband: indicators_deadband.IndicatorsDeadband,
+        topology_index: indexes.TopologyIndex,
+    ):
         self.uow = uow
         self.storage = storage
+        self.history_storage = history_storage
+        self.deadband = deadband
+        self.topology_index = topology_index
         self._events = []
 
     @property
@@ -86,7 +274,16 @@ class UpdateTechNestIndicatorsHandler(requests.RequestHandler[commands.UpdateTec
         return self._events
 
     async def handle(self, request: commands.UpdateTechNestIndicators) -> None:
-        await self.storage.set_value(request.nest, request.values)
+        await _check_nest(self.topology_index, request.nest)
+        if self.deadband.enabled:
+            previous = await self.storage.get_value(request.nest)
+            if not self.deadband.tech_nest_changed(previous, request.values):
+                suppressed_updates.inc()
+                return
+        await asyncio.gather(
+            self.storage.set_value(request.nest, request.values),
+            self.history_storage.append(request.nest, request.values),
+        )
         self._events.append(
             events.TechNestIndicatorsUpdated(
                 payload=models.TechNestIndicators(
@@ -96,13 +293,46 @@ class UpdateTechNestIndicatorsHandler(requests.RequestHandler[commands.UpdateTec
             )
         )
 
+    async def handle_batch(self, batch: typing.Sequence[commands.UpdateTechNestIndicators]) -> list[Exception | None]:
+        results: list[Exception | None] = [None] * len(batch)
+        changed = self.deadband.tech_nest_changed if self.deadband.enabled else None
+        for items in _rounds(batch, "nest"):
+            for nest in await self.topology_index.unknown_nests(items):
+                position, _ = items.pop(nest)
+                results[position] = exceptions.NotFound(f"Nest {nest} not found")
+            stored, errors = await _store_batch(
+                self.storage,
+                self.history_storage,
+                {nest: request.values for nest, (_, request) in items.items()},
+                changed,
+            )
+            for nest, error in errors.items():
+                results[items[nest][0]] = error
+            self._events.extend(
+                events.TechNestIndicatorsUpdated(payload=models.TechNestIndicators(nest=nest, values=values))
+                for nest, values in stored.items()
+            )
+        return results
+
 
 class UpdatedDeviceIndicatorsHandler(requests.RequestHandler[commands.UpdateDeviceIndicators, None]):
     """Обновляет данные индикаторов устройства"""
 
-    def __init__(self, uow: unit_of_work.UoW, storage: storages.DeviceIndicatorValuesStorage):
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        storage: storages.DeviceIndicatorValuesStorage,
+        history_storage: history.DeviceIndicatorsHistoryStorage,
+        deadband: indicators_deadband.IndicatorsDeadband,
+        last_seen_index: presence.DevicesLastSeenIndex,
+        topology_index: indexes.TopologyIndex,
+    ):
         self.uow = uow
         self.storage = storage
+        self.history_storage = history_storage
+        self.deadband = deadband
+        self.last_seen_index = last_seen_index
+        self.topology_index = topology_index
         self._events = []
 
     @property
@@ -110,7 +340,19 @@ class UpdatedDeviceIndicatorsHandler(requests.RequestHandler[commands.UpdateDevi
         return self._events
 
     async def handle(self, request: commands.UpdateDeviceIndicators) -> None:
-        await self.storage.set_value(request.device, request.values)
+        await _check_device(self.topology_index, request.nest, request.device)
+        # Активность устройства отмечается и для отброшенных зоной нечувствительности значений
+        writes = [self.last_seen_index.touch({request.device: request.nest})]
+        if self.deadband.enabled:
+            previous, _ = await asyncio.gather(self.storage.get_value(request.device), writes.pop())
+            if not self.deadband.device_changed(previous, request.values):
+                suppressed_updates.inc()
+                return
+        await asyncio.gather(
+            *writes,
+            self.storage.set_value(request.device, request.values),
+            self.history_storage.append(request.device, request.values),
+        )
         self._events.append(
             events.DeviceIndicatorsUpdated(
                 payload=models.DeviceIndicators(
@@ -120,3 +362,389 @@ class UpdatedDeviceIndicatorsHandler(requests.RequestHandler[commands.UpdateDevi
                 )
             )
         )
+
+    async def handle_batch(self, batch: typing.Sequence[commands.UpdateDeviceIndicators]) -> list[Exception | None]:
+        results: list[Exception | None] = [None] * len(batch)
+        changed = self.deadband.device_changed if self.deadband.enabled else None
+        for items in _rounds(batch, "device"):
+            mismatched = await self.topology_index.mismatched_devices(
+                {device: request.nest for device, (_, request) in items.items()}
+            )
+            for device in mismatched:
+                position, request = items.pop(device)
+                results[position] = exceptions.NotFound(f"Device {device} of nest {request.nest} not found")
+            # Активность устройства отмечается и для отброшенных зоной нечувствительности значений
+            _, (stored, errors) = await asyncio.gather(
+                self.last_seen_index.touch({device: request.nest for device, (_, request) in items.items()}),
+                _store_batch(
+                    self.storage,
+                    self.history_storage,
+                    {device: request.values for device, (_, request) in items.items()},
+                    changed,
+                ),
+            )
+            for device, error in errors.items():
+                results[items[device][0]] = error
+            self._events.extend(
+                events.DeviceIndicatorsUpdated(
+                    payload=models.DeviceIndicators(nest=items[device][1].nest, device=device, values=values)
+                )
+                for device, values in stored.items()
+            )
+        return results
+
+
+class PatchTechNestIndicatorsHandler(requests.RequestHandler[commands.PatchTechNestIndicators, None]):
+    """Обновляет отдельные поля данных индикаторов технического узла"""
+
+    def __init__(
+        self,
+        storage: storages.TechNestIndicatorValuesStorage,
+        history_storage: history.TechNestIndicatorsHistoryStorage,
+        topology_index: indexes.TopologyIndex,
+    ):
+        self.storage = storage
+        self.history_storage = history_storage
+        self.topology_index = topology_index
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    async def handle(self, request: commands.PatchTechNestIndicators) -> None:
+        await _check_nest(self.topology_index, request.nest)
+        patched = await self.storage.patch_value(request.nest, request.changes)
+        if patched is None:
+            raise exceptions.NotFound(f"Indicators of nest {request.nest} not found")
+        values, changes = patched
+        if not changes:
+            return
+        await self.history_storage.append(request.nest, values)
+        self._events.append(
+            events.TechNestIndicatorsPatched(
+                payload=models.TechNestIndicatorsChanges(nest=request.nest, changes=changes),
+            )
+        )
+
+
+class PatchDeviceIndicatorsHandler(requests.RequestHandler[commands.PatchDeviceIndicators, None]):
+    """Обновляет отдельные поля данных индикаторов устройства"""
+
+    def __init__(
+        self,
+        storage: storages.DeviceIndicatorValuesStorage,
+        history_storage: history.DeviceIndicatorsHistoryStorage,
+        last_seen_index: presence.DevicesLastSeenIndex,
+        topology_index: indexes.TopologyIndex,
+    ):
+        self.storage = storage
+        self.history_storage = history_storage
+        self.last_seen_index = last_seen_index
+        self.topology_index = topology_index
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    async def handle(self, request: commands.PatchDeviceIndicators) -> None:
+        await _check_device(self.topology_index, request.nest, request.device)
+        patched, _ = await asyncio.gather(
+            self.storage.patch_value(request.device, request.changes),
+            self.last_seen_index.touch({request.device: request.nest}),
+        )
+        if patched is None:
+            raise exceptions.NotFound(f"Indicators of device {request.device} not found")
+        values, changes = patched
+        if not changes:
+            return
+        await self.history_storage.append(request.device, values)
+        self._events.append(
+            events.DeviceIndicatorsPatched(
+                payload=models.DeviceIndicatorsChanges(nest=request.nest, device=request.device, changes=changes),
+            )
+        )
+
+
+class UpdateIndicatorsBatchHandler(
+    requests.RequestHandler[commands.UpdateIndicatorsBatch, responses.IndicatorsBatchUpdated]
+):
+    """Пакетно обновляет данные индикаторов технических узлов и устройств"""
+
+    def __init__(
+        self,
+        nest_storage: storages.TechNestIndicatorValuesStorage,
+        device_storage: storages.DeviceIndicatorValuesStorage,
+        nest_history_storage: history.TechNestIndicatorsHistoryStorage,
+        device_history_storage: history.DeviceIndicatorsHistoryStorage,
+        deadband: indicators_deadband.IndicatorsDeadband,
+        last_seen_index: presence.DevicesLastSeenIndex,
+        topology_index: indexes.TopologyIndex,
+    ):
+        self.nest_storage = nest_storage
+        self.device_storage = device_storage
+        self.nest_history_storage = nest_history_storage
+        self.device_history_storage = device_history_storage
+        self.deadband = deadband
+        self.last_seen_index = last_seen_index
+        self.topology_index = topology_index
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    @staticmethod
+    def _deduplicate(
+        items: list[commands.TechNestIndicatorsItem | commands.DeviceIndicatorsItem],
+        key: str,
+        errors: list[responses.BatchItemError],
+    ) -> dict[int, tuple[int, commands.TechNestIndicatorsItem | commands.DeviceIndicatorsItem]]:
+        unique_items = {}
+        for index, item in enumerate(items):
+            id = getattr(item, key)
+            if id in unique_items:
+                errors.append(
+                    responses.BatchItemError(path=[f"{key}s", index], message=f"Duplicate {key} {id} in batch")
+                )
+                continue
+            unique_items[id] = (index, item)
+        return unique_items
+
+    @staticmethod
+    async def _significant(
+        items: dict[int, tuple[int, commands.TechNestIndicatorsItem | commands.DeviceIndicatorsItem]],
+        storage: storages.IndicatorValuesStorage,
+        changed: typing.Callable[[typing.Any, typing.Any], bool],
+    ) -> dict[int, tuple[int, commands.TechNestIndicatorsItem | commands.DeviceIndicatorsItem]]:
+        if not items:
+            return items
+        previous_values = await storage.get_values(*items)
+        return {
+            id: item
+            for (id, item), previous in zip(items.items(), previous_values)
+            if changed(previous, item[1].values)
+        }
+
+    async def handle(self, request: commands.UpdateIndicatorsBatch) -> responses.IndicatorsBatchUpdated:
+        errors: list[responses.BatchItemError] = []
+        nests = self._deduplicate(request.nests, "nest", errors)
+        devices = self._deduplicate(request.devices, "device", errors)
+        unknown_nests, mismatched_devices = await asyncio.gather(
+            self.topology_index.unknown_nests(nests),
+            self.topology_index.mismatched_devices({id: item.nest for id, (_, item) in devices.items()}),
+        )
+        for id in unknown_nests:
+            index, _ = nests.pop(id)
+            errors.append(responses.BatchItemError(path=["nests", index], message=f"Nest {id} not found"))
+        for id in mismatched_devices:
+            index, item = devices.pop(id)
+            errors.append(
+                responses.BatchItemError(path=["devices", index], message=f"Device {id} of nest {item.nest} not found")
+            )
+        seen_devices = {id: item.nest for id, (_, item) in devices.items()}
+        skipped = 0
+        if self.deadband.enabled:
+            total = len(nests) + len(devices)
+            nests, devices = await asyncio.gather(
+                self._significant(nests, self.nest_storage, self.deadband.tech_nest_changed),
+                self._significant(devices, self.device_storage, self.deadband.device_changed),
+            )
+            skipped = total - len(nests) - len(devices)
+            suppressed_updates.inc(skipped)
+
+        nest_errors, device_errors = await asyncio.gather(
+            self.nest_storage.set_values({id: item.values for id, (_, item) in nests.items()}),
+            self.device_storage.set_values({id: item.values for id, (_, item) in devices.items()}),
+        )
+
+        accepted_nests: dict[int, models.TechNestIndicatorsValues] = {}
+        accepted_devices: dict[int, models.DeviceIndicatorsValues] = {}
+        for id, (index, item) in nests.items():
+            if id in nest_errors:
+                errors.append(responses.BatchItemError(path=["nests", index], message=str(nest_errors[id])))
+                continue
+            accepted_nests[id] = item.values
+            self._events.append(
+                events.TechNestIndicatorsUpdated(payload=models.TechNestIndicators(nest=id, values=item.values))
+            )
+        for id, (index, item) in devices.items():
+            if id in device_errors:
+                errors.append(responses.BatchItemError(path=["devices", index], message=str(device_errors[id])))
+                continue
+            accepted_devices[id] = item.values
+            self._events.append(
+                events.DeviceIndicatorsUpdated(
+                    payload=models.DeviceIndicators(nest=item.nest, device=id, values=item.values)
+                )
+            )
+
+        await asyncio.gather(
+            self.nest_history_storage.append_many(accepted_nests),
+            self.device_history_storage.append_many(accepted_devices),
+            self.last_seen_index.touch(seen_devices),
+        )
+        return responses.IndicatorsBatchUpdated(
+            accepted=len(accepted_nests) + len(accepted_devices),
+            skipped=skipped,
+            errors=errors,
+        )
+
+
+class SweepOfflineDevicesHandler(requests.RequestHandler[commands.SweepOfflineDevices, None]):
+    """Находит устройства, перешедшие в offline, и отправляет события о них пачками"""
+
+    def __init__(self, last_seen_index: presence.DevicesLastSeenIndex):
+        self.last_seen_index = last_seen_index
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    async def handle(self, request: commands.SweepOfflineDevices) -> None:
+        before = datetime.datetime.now() - datetime.timedelta(seconds=request.offline_after)
+        while True:
+            devices = await self.last_seen_index.pop_offline(before, limit=request.batch_size)
+            if devices:
+                self._events.append(events.DevicesWentOffline(payload=devices))
+            if len(devices) < request.batch_size:
+                return
+
+
+class StartTopologyImportHandler(
+    requests.RequestHandler[commands.StartTopologyImport, responses.TopologyImportStarted]
+):
+    """Регистрирует задачу импорта топологии"""
+
+    def __init__(self, imports_storage: imports.TopologyImportsStorage):
+        self.imports_storage = imports_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: commands.StartTopologyImport) -> responses.TopologyImportStarted:
+        job = models.TopologyImport(id=uuid.uuid4().hex, format=request.format)
+        await self.imports_storage.create(job)
+        return responses.TopologyImportStarted(job=job.id)
+
+
+def _row_error(number: int, error: Exception) -> models.TopologyImportRowError:
+    if isinstance(error, pydantic.ValidationError):
+        message = "; ".join(f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}" for item in error.errors())
+    else:
+        message = str(error)
+    return models.TopologyImportRowError(row=number, message=message)
+
+
+class ImportTopologyHandler(requests.RequestHandler[commands.ImportTopology, None]):
+    """
+    Импортирует владельцев, узлы и устройства из загруженного файла.
+
+    Файл читается порциями, каждая порция проверяется и записывается пачками в отдельной
+    транзакции. Ошибки строк сохраняются в задаче, импорт остальных строк продолжается.
+    """
+
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        imports_storage: imports.TopologyImportsStorage,
+        projection: projections.HolderNestsProjection,
+    ):
+        self.uow = uow
+        self.imports_storage = imports_storage
+        self.projection = projection
+        self._holders: set[int] = set()
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    async def handle(self, request: commands.ImportTopology) -> None:
+        await self.imports_storage.set_state(request.job, models.TopologyImportState.RUNNING)
+        try:
+            async for records in imports.read_records(request.path, request.format, request.chunk_size):
+                rows, errors = [], []
+                for number, record in records:
+                    try:
+                        if isinstance(record, Exception):
+                            raise record
+                        rows.append((number, commands.TopologyImportRow.model_validate(record)))
+                    except ValueError as error:
+                        errors.append(_row_error(number, error))
+                errors.extend(await self._write(rows))
+                await self.imports_storage.add_progress(request.job, len(records), errors)
+        except Exception as error:
+            await self.imports_storage.set_state(request.job, models.TopologyImportState.FAILED, error=str(error))
+            # Записанные до ошибки порции остаются в БД: модели чтения их владельцев устарели,
+            # а событие TopologyImported публикуется только при успешном импорте
+            await self.projection.drop(self._holders)
+            raise
+        finally:
+            imports.remove_upload(request.path)
+        await self.imports_storage.set_state(request.job, models.TopologyImportState.COMPLETED)
+        self._events.append(events.TopologyImported(holders=sorted(self._holders)))
+
+    async def _write(self, rows: list[tuple[int, commands.TopologyImportRow]]) -> list[models.TopologyImportRowError]:
+        if not rows:
+            return []
+        # Одновременная запись тех же сущностей другой транзакцией отменяет порцию,
+        # при повторе они будут найдены как существующие
+        for _ in range(2):
+            try:
+                await self._write_chunk([row for _, row in rows])
+                return []
+            except exceptions.AlreadyExists:
+                pass
+        # Конфликт вызван одной из строк: строки записываются по одной, ошибку получает только она
+        errors = []
+        for number, row in rows:
+            try:
+                await self._write_chunk([row])
+            except exceptions.AlreadyExists as error:
+                errors.append(_row_error(number, ValueError(error.message)))
+        return errors
+
+    async def _write_chunk(self, rows: list[commands.TopologyImportRow]) -> None:
+        async with self.uow.transaction() as uow:
+            holders = await self._merge(uow, rows)
+            await _publish(
+                uow,
+                *(
+                    events.TopologyChanged(payload=models.TopologyChange(holder=holder))
+                    for holder in sorted(set(holders))
+                ),
+            )
+            await uow.commit()
+        self._holders.update(holders)
+
+    @staticmethod
+    async def _merge(uow: unit_of_work.UoW, rows: list[commands.TopologyImportRow]) -> list[int]:
+        """Записывает порцию и возвращает идентификаторы затронутых владельцев"""
+        holder_ids = await uow.repository.merge_holders(
+            [models.Holder(name=row.holder_name, inn=row.holder_inn, kpp=row.holder_kpp) for row in rows],
+        )
+        nest_rows = [(row, holder_id) for row, holder_id in zip(rows, holder_ids) if row.nest_name is not None]
+        nest_ids = await uow.repository.merge_nests(
+            [
+                models.TechNest(
+                    name=row.nest_name,
+                    holder_id=holder_id,
+                    location=models.TechNestLocation(
+                        latitude=row.latitude, longitude=row.longitude, address=row.address
+                    ),
+                )
+                for row, holder_id in nest_rows
+            ],
+        )
+        await uow.repository.merge_devices(
+            [
+                models.Device(name=row.device_name, model=row.device_model, nest_id=nest_id)
+                for (row, _), nest_id in zip(nest_rows, nest_ids)
+                if row.device_name is not None
+            ],
+        )
+        return holder_ids
@@ -0,0 +1,56 @@
+from infrastructire import indexes, projections
+from infrastructire import uow as unit_of_work
+from service_layer import cqrs
+from service_layer.models import events
+
+
+class ProjectHolderCreatedHandler(cqrs.EventHandler[events.HolderCreated]):
+    """Строит пустую модель чтения узлов нового владельца"""
+
+    def __init__(self, projection: projections.HolderNestsProjection):
+        self.projection = projection
+
+    async def handle(self, event: events.HolderCreated) -> None:
+        await self.projection.build(event.holder, [])
+
+
+class ProjectTechNestChangedHandler(cqrs.EventHandler[events.TechNestAdded | events.DeviceAdded]):
+    """Записывает в модель чтения узел, к которому добавлено устройство, или новый узел"""
+
+    def __init__(self, uow: unit_of_work.UoW, projection: projections.HolderNestsProjection):
+        self.uow = uow
+        self.projection = projection
+
+    async def handle(self, event: events.TechNestAdded | events.DeviceAdded) -> None:
+        # Узел читается с основной БД: реплика может еще не содержать изменений команды
+        async with self.uow.transaction() as uow:
+            nest = await uow.repository.get_nest(nest_id=event.nest, with_devices=True)
+        if nest is None:
+            return
+        await self.projection.put(nest)
+
+
+class ProjectTopologyImportedHandler(cqrs.EventHandler[events.TopologyImported]):
+    """Удаляет модели чтения владельцев, затронутых импортом"""
+
+    def __init__(self, projection: projections.HolderNestsProjection):
+        self.projection = projection
+
+    async def handle(self, event: events.TopologyImported) -> None:
+        await self.projection.drop(event.holders)
+
+
+class IndexTechNestAddedHandler(cqrs.EventHandler[events.TechNestAdded]):
+    """Добавляет новый узел в индекс топологии процесса"""
+
+    async def handle(self, event: events.TechNestAdded) -> None:
+        indexes.get_topology_index().add_nests([(event.nest, event.holder)])
+
+
+class IndexDeviceAddedHandler(cqrs.EventHandler[events.DeviceAdded]):
+    """Добавляет новое устройство в индекс топологии процесса"""
+
+    async def handle(self, event: events.DeviceAdded) -> None:
+        topology_index = indexes.get_topology_index()
+        topology_index.add_nests([(event.nest, event.holder)])
+        topology_index.add_devices([(event.device, event.nest)])
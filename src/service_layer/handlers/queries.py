@@ -1,10 +1,16 @@
-from domain import exceptions, models
-from infrastructire import storages
+import asyncio
+import datetime
+import typing
+
+from domain import exceptions, geo, models
+from infrastructire import history, imports, presence, projections, storages
 from infrastructire import uow as unit_of_work
 from service_layer.cqrs import requests
 from service_layer.cqrs.events import event
 from service_layer.models import queries, responses
 
+T = typing.TypeVar("T", models.TechNest, models.Device)
+
 
 class GetHolderHandler(requests.RequestHandler[queries.Holder, responses.Holder | None]):
     """
@@ -19,32 +25,85 @@ class GetHolderHandler(requests.RequestHandler[queries.Holder, responses.Holder
         return []
 
     async def handle(self, request: queries.Holder) -> responses.Holder | None:
-        async with self.uow.transaction() as uow:
+        async with self.uow.transaction(read_only=True) as uow:
             holder_info = await uow.repository.get_holder(request.holder)
             if holder_info is None:
                 raise exceptions.NotFound(f"Holder with id {request.holder} not found")
             return responses.Holder(**holder_info.model_dump(mode="json"))
 
 
+def _probe_limit(limit: int | None) -> int | None:
+    """Размер выборки для страницы: на одну запись больше, чтобы узнать, есть ли следующая страница"""
+    return None if limit is None else limit + 1
+
+
+def _page(items: list[T], limit: int | None) -> tuple[list[T], int | None]:
+    """Отрезает страницу от выборки размера _probe_limit и возвращает ее вместе с курсором следующей страницы"""
+    if limit is None or len(items) <= limit:
+        return items, None
+    return items[:limit], items[limit - 1].id
+
+
 class GetTechNestsHandler(requests.RequestHandler[queries.TechNests, responses.TechNests]):
     """
-    Обрабатывает запросы на получение данных о технических узлах
+    Обрабатывает запросы на получение данных о технических узлах.
+
+    Все узлы владельца отдаются из модели чтения, если она построена, иначе читаются из основной БД
+    и модель достраивается: отстающая реплика закрепила бы в модели устаревшие данные. Страницы
+    читаются из БД по индексу и могут обслуживаться репликами.
     """
 
-    def __init__(self, uow: unit_of_work.UoW):
+    def __init__(self, uow: unit_of_work.UoW, projection: projections.HolderNestsProjection):
         self.uow = uow
+        self.projection = projection
 
     @property
     def events(self) -> list[event.Event]:
         return []
 
     async def handle(self, request: queries.TechNests) -> responses.TechNests:
-        async with self.uow.transaction() as uow:
-            holder = await uow.repository.get_holder(holder=request.holder)
+        paged = request.after is not None or request.limit is not None
+        if not paged and (nests := await self.projection.get(request.holder)) is not None:
+            return responses.TechNests(holder=request.holder, tech_nests=nests)
+        async with self.uow.transaction(read_only=paged) as uow:
+            holder = await uow.repository.get_holder(request.holder, with_nests=not paged)
             if holder is None:
                 raise exceptions.NotFound(f"Holder with id {request.holder} not found")
-            nests = await uow.repository.get_nests_by_holder(request.holder)
-            return responses.TechNests(holder=request.holder, tech_nests=nests)
+            nests = await uow.repository.get_nests_by_holder(
+                request.holder,
+                after=request.after,
+                limit=_probe_limit(request.limit),
+            )
+        if not paged:
+            await self.projection.build(request.holder, nests)
+        nests, next_after = _page(nests, request.limit)
+        return responses.TechNests(holder=request.holder, tech_nests=nests, next_after=next_after)
+
+
+class StreamTechNestsHandler(requests.RequestHandler[queries.TechNestsStream, responses.TechNestsStream]):
+    """Отдает технические узлы владельца потоком. Транзакция открыта, пока поток читается"""
+
+    def __init__(self, uow: unit_of_work.UoW):
+        self.uow = uow
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.TechNestsStream) -> responses.TechNestsStream:
+        async with self.uow.transaction(read_only=True) as uow:
+            if await uow.repository.get_holder(request.holder) is None:
+                raise exceptions.NotFound(f"Holder with id {request.holder} not found")
+        return responses.TechNestsStream(holder=request.holder, tech_nests=self._stream(request))
+
+    async def _stream(self, request: queries.TechNestsStream) -> typing.AsyncIterator[models.TechNest]:
+        async with self.uow.transaction(read_only=True) as uow:
+            async for nest in uow.repository.stream_nests_by_holder(
+                request.holder,
+                after=request.after,
+                limit=request.limit,
+            ):
+                yield nest
 
 
 class GetDevicesHandler(requests.RequestHandler[queries.Devices, responses.Devices]):
@@ -60,12 +119,72 @@ class GetDevicesHandler(requests.RequestHandler[queries.Devices, responses.Devic
         return []
 
     async def handle(self, request: queries.Devices) -> responses.Devices:
-        async with self.uow.transaction() as uow:
-            existed_nest = await uow.repository.get_nest(nest_id=request.nest)
-            if existed_nest is None:
+        async with self.uow.transaction(read_only=True) as uow:
+            devices = await uow.repository.get_devices(
+                request.nest,
+                after=request.after,
+                limit=_probe_limit(request.limit),
+            )
+        devices, next_after = _page(devices, request.limit)
+        return responses.Devices(nest=request.nest, devices=devices, next_after=next_after)
+
+
+class StreamDevicesHandler(requests.RequestHandler[queries.DevicesStream, responses.DevicesStream]):
+    """Отдает устройства узла потоком. Транзакция открыта, пока поток читается"""
+
+    def __init__(self, uow: unit_of_work.UoW):
+        self.uow = uow
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.DevicesStream) -> responses.DevicesStream:
+        async with self.uow.transaction(read_only=True) as uow:
+            if await uow.repository.get_nest(nest_id=request.nest) is None:
                 raise exceptions.NotFound(f"Nest with nest_id {request.nest} not found")
-            devices = await uow.repository.get_devices(request.nest)
-            return responses.Devices(nest=request.nest, devices=devices)
+        return responses.DevicesStream(nest=request.nest, devices=self._stream(request))
+
+    async def _stream(self, request: queries.DevicesStream) -> typing.AsyncIterator[models.Device]:
+        async with self.uow.transaction(read_only=True) as uow:
+            async for device in uow.repository.stream_devices(request.nest, after=request.after, limit=request.limit):
+                yield device
+
+
+class GetNestsInAreaHandler(requests.RequestHandler[queries.NestsInArea, responses.TechNestsInArea]):
+    """Возвращает технические узлы, расположенные в прямоугольной области"""
+
+    def __init__(self, uow: unit_of_work.UoW):
+        self.uow = uow
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.NestsInArea) -> responses.TechNestsInArea:
+        area = geo.BoundingBox(south=request.south, west=request.west, north=request.north, east=request.east)
+        async with self.uow.transaction(read_only=True) as uow:
+            nests = await uow.repository.get_nests_in_area(area, request.limit)
+        return responses.TechNestsInArea(tech_nests=nests)
+
+
+class GetNestsNearHandler(requests.RequestHandler[queries.NestsNear, responses.TechNestsNear]):
+    """Возвращает ближайшие к точке технические узлы в пределах радиуса"""
+
+    def __init__(self, uow: unit_of_work.UoW):
+        self.uow = uow
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.NestsNear) -> responses.TechNestsNear:
+        point = geo.Point(latitude=request.latitude, longitude=request.longitude)
+        async with self.uow.transaction(read_only=True) as uow:
+            nests = await uow.repository.get_nests_near(point, request.radius, request.limit)
+        return responses.TechNestsNear(
+            tech_nests=[responses.TechNestDistance(distance=distance, tech_nest=nest) for nest, distance in nests],
+        )
 
 
 class GetTargetNestIndicatorsHandler(requests.RequestHandler[queries.TechNestIndicators, responses.TechNestIndicators]):
@@ -85,7 +204,7 @@ class GetTargetNestIndicatorsHandler(requests.RequestHandler[queries.TechNestInd
         return self._events
 
     async def handle(self, request: queries.TechNestIndicators) -> responses.TechNestIndicators:
-        async with self.uow.transaction() as uow:
+        async with self.uow.transaction(read_only=True) as uow:
             existed_nest = await uow.repository.get_nest(nest_id=request.nest)
             if existed_nest is None:
                 raise exceptions.NotFound(f"Nest with nest_id {request.nest} not found")
@@ -113,14 +232,259 @@ class GetDevicesIndicatorsHandler(requests.RequestHandler[queries.DevicesIndicat
 
     async def handle(self, request: queries.DevicesIndicators) -> responses.DeviceIndicators:
         indicators: list[models.DeviceIndicators] = []
-        async with self.uow.transaction() as uow:
-            existed_nest = await uow.repository.get_nest(nest_id=request.nest)
+        async with self.uow.transaction(read_only=True) as uow:
+            existed_nest = await uow.repository.get_nest(nest_id=request.nest, with_devices=True)
             if existed_nest is None:
                 raise exceptions.NotFound(f"Nest with nest_id {request.nest} not found")
-            devices: list[models.Device] = await uow.repository.get_devices(nest=request.nest)
-            devices_ids = [device.id for device in devices]
+            devices_ids = [device.id for device in existed_nest.devices]
 
         values = await self.device_storage.get_values(*devices_ids)
         for device_id, value in zip(devices_ids, values):
+            if value is None:
+                continue
             indicators.append(models.DeviceIndicators(nest=request.nest, device=device_id, values=value))
         return responses.DeviceIndicators(devices=indicators)
+
+
+class GetRawTargetNestIndicatorsHandler(
+    requests.RequestHandler[queries.RawTechNestIndicators, responses.RawTechNestIndicators]
+):
+    """Возвращает актуальные данные на индикаторах узла без разбора сохраненного документа"""
+
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        tech_nest_storage: storages.TechNestIndicatorValuesStorage,
+    ):
+        self.uow = uow
+        self.nest_storage = tech_nest_storage
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    async def handle(self, request: queries.RawTechNestIndicators) -> responses.RawTechNestIndicators:
+        async with self.uow.transaction(read_only=True) as uow:
+            existed_nest = await uow.repository.get_nest(nest_id=request.nest)
+            if existed_nest is None:
+                raise exceptions.NotFound(f"Nest with nest_id {request.nest} not found")
+        values = await self.nest_storage.get_raw_value(request.nest)
+        if values is None:
+            raise exceptions.NotFound(f"Indicator values for nest {request.nest} not found")
+        return responses.RawTechNestIndicators(nest=request.nest, values=values)
+
+
+class GetRawDevicesIndicatorsHandler(
+    requests.RequestHandler[queries.RawDevicesIndicators, responses.RawDeviceIndicators]
+):
+    """Возвращает актуальные данные на индикаторах устройств узла без разбора сохраненных документов"""
+
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        device_storage: storages.DeviceIndicatorValuesStorage,
+    ):
+        self.uow = uow
+        self.device_storage = device_storage
+        self._events = []
+
+    @property
+    def events(self) -> list[event.Event]:
+        return self._events
+
+    async def handle(self, request: queries.RawDevicesIndicators) -> responses.RawDeviceIndicators:
+        async with self.uow.transaction(read_only=True) as uow:
+            existed_nest = await uow.repository.get_nest(nest_id=request.nest, with_devices=True)
+            if existed_nest is None:
+                raise exceptions.NotFound(f"Nest with nest_id {request.nest} not found")
+            devices_ids = [device.id for device in existed_nest.devices]
+
+        values = await self.device_storage.get_raw_values(*devices_ids)
+        return responses.RawDeviceIndicators(
+            nest=request.nest,
+            devices={device_id: value for device_id, value in zip(devices_ids, values) if value is not None},
+        )
+
+
+async def _fleet_snapshot(
+    nest_storage: storages.TechNestIndicatorValuesStorage,
+    device_storage: storages.DeviceIndicatorValuesStorage,
+    nests: list[models.TechNest],
+    holder: int | None = None,
+) -> responses.RawFleetSnapshot:
+    devices_ids = [device.id for nest in nests for device in nest.devices]
+    nest_values, device_values = await asyncio.gather(
+        nest_storage.get_raw_values(*(nest.id for nest in nests)),
+        device_storage.get_raw_values(*devices_ids),
+    )
+    return responses.RawFleetSnapshot(
+        holder=holder,
+        nests=nests,
+        nest_values=nest_values,
+        device_values=dict(zip(devices_ids, device_values)),
+    )
+
+
+class GetHolderSnapshotHandler(requests.RequestHandler[queries.HolderSnapshot, responses.RawFleetSnapshot]):
+    """Возвращает актуальные показатели всех узлов и устройств владельца"""
+
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        tech_nest_storage: storages.TechNestIndicatorValuesStorage,
+        device_storage: storages.DeviceIndicatorValuesStorage,
+    ):
+        self.uow = uow
+        self.nest_storage = tech_nest_storage
+        self.device_storage = device_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.HolderSnapshot) -> responses.RawFleetSnapshot:
+        async with self.uow.transaction(read_only=True) as uow:
+            nests = await uow.repository.get_nests_by_holder(request.holder)
+            if not nests and await uow.repository.get_holder(request.holder) is None:
+                raise exceptions.NotFound(f"Holder with id {request.holder} not found")
+        return await _fleet_snapshot(self.nest_storage, self.device_storage, nests, holder=request.holder)
+
+
+class GetNestsSnapshotHandler(requests.RequestHandler[queries.NestsSnapshot, responses.RawFleetSnapshot]):
+    """Возвращает актуальные показатели узлов и их устройств по списку идентификаторов"""
+
+    def __init__(
+        self,
+        uow: unit_of_work.UoW,
+        tech_nest_storage: storages.TechNestIndicatorValuesStorage,
+        device_storage: storages.DeviceIndicatorValuesStorage,
+    ):
+        self.uow = uow
+        self.nest_storage = tech_nest_storage
+        self.device_storage = device_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.NestsSnapshot) -> responses.RawFleetSnapshot:
+        nests_ids = list(dict.fromkeys(request.nests))
+        async with self.uow.transaction(read_only=True) as uow:
+            nests = {nest.id: nest for nest in await uow.repository.get_nests(nests_ids)}
+        not_found = [nest_id for nest_id in nests_ids if nest_id not in nests]
+        if not_found:
+            raise exceptions.NotFound(f"Nests with ids {not_found} not found")
+        return await _fleet_snapshot(self.nest_storage, self.device_storage, [nests[nest_id] for nest_id in nests_ids])
+
+
+class GetOfflineDevicesHandler(requests.RequestHandler[queries.OfflineDevices, responses.OfflineDevices]):
+    """Возвращает устройства владельца, не активные с заданного момента"""
+
+    def __init__(self, uow: unit_of_work.UoW, last_seen_index: presence.DevicesLastSeenIndex):
+        self.uow = uow
+        self.last_seen_index = last_seen_index
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.OfflineDevices) -> responses.OfflineDevices:
+        async with self.uow.transaction(read_only=True) as uow:
+            nests = await uow.repository.get_nests_by_holder(request.holder)
+            if not nests and await uow.repository.get_holder(request.holder) is None:
+                raise exceptions.NotFound(f"Holder with id {request.holder} not found")
+        devices = await self.last_seen_index.get_offline([nest.id for nest in nests], request.since)
+        return responses.OfflineDevices(holder=request.holder, since=request.since, devices=devices)
+
+
+class GetTechNestIndicatorsHistoryHandler(
+    requests.RequestHandler[queries.TechNestIndicatorsHistory, responses.TechNestIndicatorsHistory]
+):
+    """Возвращает страницу истории показателей технического узла"""
+
+    def __init__(self, history_storage: history.TechNestIndicatorsHistoryStorage):
+        self.history_storage = history_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.TechNestIndicatorsHistory) -> responses.TechNestIndicatorsHistory:
+        page = await self.history_storage.get_range(
+            request.nest,
+            start=request.start,
+            end=request.end,
+            step=datetime.timedelta(seconds=request.step) if request.step else None,
+            after=request.after,
+            limit=request.limit,
+        )
+        return responses.TechNestIndicatorsHistory(
+            nest=request.nest,
+            points=[responses.HistoryPoint(timestamp=timestamp, values=values) for timestamp, values in page.points],
+            next=page.next,
+        )
+
+
+class GetDeviceIndicatorsHistoryHandler(
+    requests.RequestHandler[queries.DeviceIndicatorsHistory, responses.DeviceIndicatorsHistory]
+):
+    """Возвращает страницу истории показателей устройства"""
+
+    def __init__(self, history_storage: history.DeviceIndicatorsHistoryStorage):
+        self.history_storage = history_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.DeviceIndicatorsHistory) -> responses.DeviceIndicatorsHistory:
+        page = await self.history_storage.get_range(
+            request.device,
+            start=request.start,
+            end=request.end,
+            step=datetime.timedelta(seconds=request.step) if request.step else None,
+            after=request.after,
+            limit=request.limit,
+        )
+        return responses.DeviceIndicatorsHistory(
+            device=request.device,
+            points=[responses.HistoryPoint(timestamp=timestamp, values=values) for timestamp, values in page.points],
+            next=page.next,
+        )
+
+
+class GetTopologyImportHandler(requests.RequestHandler[queries.TopologyImport, responses.TopologyImport]):
+    """Возвращает состояние задачи импорта топологии"""
+
+    def __init__(self, imports_storage: imports.TopologyImportsStorage):
+        self.imports_storage = imports_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.TopologyImport) -> responses.TopologyImport:
+        job = await self.imports_storage.get(request.job)
+        if job is None:
+            raise exceptions.NotFound(f"Topology import {request.job} not found")
+        return responses.TopologyImport(**job.model_dump())
+
+
+class GetTopologyImportErrorsHandler(
+    requests.RequestHandler[queries.TopologyImportErrors, responses.TopologyImportErrors],
+):
+    """Возвращает ошибки строк импорта топологии"""
+
+    def __init__(self, imports_storage: imports.TopologyImportsStorage):
+        self.imports_storage = imports_storage
+
+    @property
+    def events(self) -> list[event.Event]:
+        return []
+
+    async def handle(self, request: queries.TopologyImportErrors) -> responses.TopologyImportErrors:
+        if await self.imports_storage.get(request.job) is None:
+            raise exceptions.NotFound(f"Topology import {request.job} not found")
+        errors = await self.imports_storage.get_errors(request.job, request.offset, request.limit)
+        return responses.TopologyImportErrors(job=request.job, errors=errors)
@@ -1,7 +1,9 @@
 from aio_pika import abc
+from orjson import orjson
 
-from infrastructire import publishers
+from infrastructire import caches, logging, publishers
 from service_layer import cqrs
+from service_layer.models import events
 
 
 class NestIndicatorValuesPublisher(publishers.AbstractFromAmqpToWebsocketPublisher):
@@ -13,3 +15,27 @@ class NestIndicatorValuesPublisher(publishers.AbstractFromAmqpToWebsocketPublish
         if payload is None:
             return
         await self.channel.send_json(payload)
+
+
+class IndicatorsCacheInvalidator:
+    """Инвалидирует in-process кэш значений индикаторов по событиям их обновления"""
+
+    def __init__(self):
+        self.caches = {
+            events.TechNestIndicatorsUpdated.__name__: ("nest", caches.get_tech_nest_values_cache()),
+            events.DeviceIndicatorsUpdated.__name__: ("device", caches.get_device_values_cache()),
+            events.TechNestIndicatorsPatched.__name__: ("nest", caches.get_tech_nest_values_cache()),
+            events.DeviceIndicatorsPatched.__name__: ("device", caches.get_device_values_cache()),
+        }
+
+    async def __call__(self, message: abc.AbstractIncomingMessage) -> None:
+        message_body = orjson.loads(message.body)
+        target = self.caches.get(message_body.get("message_name"))
+        if target is None:
+            return
+        key, cache = target
+        try:
+            cache.invalidate(message_body["payload"]["payload"][key])
+        except (KeyError, TypeError):
+            logging.logger.warning(f"Malformed {message_body.get('message_name')} event, dropping indicators cache")
+            cache.clear()
@@ -1,9 +1,10 @@
 import decimal
+import typing
 
 import petrovna
 import pydantic
 
-from domain import models
+from domain import models, patches
 from service_layer.cqrs import requests
 from service_layer.models import validation
 
@@ -12,6 +13,18 @@ class Command(requests.Request):
     """Базовый класс команды"""
 
 
+def _validate_inn(v: str) -> str:
+    if not petrovna.validate_inn(v):
+        raise ValueError("Invalid INN value")
+    return v
+
+
+def _validate_kpp(v: str | None) -> str | None:
+    if v and not petrovna.validate_kpp(v):
+        raise ValueError("Invalid KPP value")
+    return v
+
+
 class CreateHolder(Command):
     name: str = models.HolderNameField()
     inn: str = models.INN()
@@ -20,16 +33,12 @@ class CreateHolder(Command):
     @pydantic.field_validator("inn")
     @classmethod
     def inn_validator(cls, v: str) -> str:
-        if not petrovna.validate_inn(v):
-            raise ValueError("Invalid INN value")
-        return v
+        return _validate_inn(v)
 
     @pydantic.field_validator("kpp")
     @classmethod
     def kpp_validator(cls, v: str | None) -> str | None:
-        if v and not petrovna.validate_kpp(v):
-            raise ValueError("Invalid KPP value")
-        return v
+        return _validate_kpp(v)
 
 
 class AddTechNest(Command):
@@ -52,3 +61,119 @@ class UpdateTechNestIndicators(Command, models.TechNestIndicators):
 
 class UpdateDeviceIndicators(Command, models.DeviceIndicators):
     pass
+
+
+class PatchIndicators(Command):
+    """Базовый класс частичного обновления показателей индикаторов"""
+
+    _model: typing.ClassVar[typing.Type[pydantic.BaseModel]]
+
+    changes: dict[str, typing.Any] = models.IndicatorsChangesField(min_length=1)
+
+    @pydantic.field_validator("changes")
+    @classmethod
+    def changes_validator(cls, v: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        for path in v:
+            patches.validate_path(path, cls._model)
+        return v
+
+
+class PatchTechNestIndicators(PatchIndicators):
+    _model = models.TechNestIndicatorsValues
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+
+
+class PatchDeviceIndicators(PatchIndicators):
+    _model = models.DeviceIndicatorsValues
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    device: int = validation.IdField(description="Идентификатор устройства")
+
+
+class TechNestIndicatorsItem(models.TechNestIndicators):
+    """Значения на индикаторах технического узла в составе пакета"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+
+
+class DeviceIndicatorsItem(models.DeviceIndicators):
+    """Значения на индикаторах устройства в составе пакета"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    device: int = validation.IdField(description="Идентификатор устройства")
+
+
+class UpdateIndicatorsBatch(Command):
+    """Пакетное обновление показателей индикаторов технических узлов и устройств"""
+
+    nests: list[TechNestIndicatorsItem] = pydantic.Field(
+        description="Значения на индикаторах технических узлов",
+        default_factory=list,
+    )
+    devices: list[DeviceIndicatorsItem] = pydantic.Field(
+        description="Значения на индикаторах устройств",
+        default_factory=list,
+    )
+
+
+class SweepOfflineDevices(Command):
+    """Поиск устройств, перешедших в offline"""
+
+    offline_after: int = pydantic.Field(description="Устройство считается offline после, сек", gt=0)
+    batch_size: int = pydantic.Field(description="Количество устройств в одном событии", gt=0)
+
+
+class TopologyImportRow(pydantic.BaseModel):
+    """
+    Строка импорта топологии: владелец и, если заданы, его узел и устройство узла.
+
+    Существующие владельцы (по ИНН и КПП), узлы (по владельцу и названию) и устройства
+    (по узлу и названию) не изменяются.
+    """
+
+    holder_name: str = models.HolderNameField()
+    holder_inn: str = models.INN()
+    holder_kpp: str | None = models.KPP()
+    nest_name: str | None = models.TechNestNameField(default=None)
+    latitude: decimal.Decimal | None = models.LatitudeField(default=None)
+    longitude: decimal.Decimal | None = models.LongitudeField(default=None)
+    address: str | None = models.AddressField(default=None)
+    device_name: str | None = models.DeviceNameField(default=None)
+    device_model: str | None = models.DeviceModelField()
+
+    @pydantic.field_validator("holder_inn")
+    @classmethod
+    def inn_validator(cls, v: str) -> str:
+        return _validate_inn(v)
+
+    @pydantic.field_validator("holder_kpp")
+    @classmethod
+    def kpp_validator(cls, v: str | None) -> str | None:
+        return _validate_kpp(v)
+
+    @pydantic.model_validator(mode="after")
+    def topology_validator(self) -> typing.Self:
+        location = (self.latitude, self.longitude, self.address)
+        if self.nest_name is not None and None in location:
+            raise ValueError("Nest requires latitude, longitude and address")
+        if self.nest_name is None and (any(value is not None for value in location) or self.device_name is not None):
+            raise ValueError("Nest fields and device require nest_name")
+        if self.device_name is None and self.device_model is not None:
+            raise ValueError("Device model requires device_name")
+        return self
+
+
+class StartTopologyImport(Command):
+    """Регистрирует задачу импорта загруженного файла"""
+
+    format: typing.Literal["ndjson", "csv"] = pydantic.Field(description="Формат файла")
+
+
+class ImportTopology(Command):
+    """Импортирует топологию из загруженного файла порциями по chunk_size строк"""
+
+    job: str = pydantic.Field(description="Идентификатор задачи")
+    path: str = pydantic.Field(description="Путь к загруженному файлу")
+    format: typing.Literal["ndjson", "csv"] = pydantic.Field(description="Формат файла")
+    chunk_size: int = pydantic.Field(description="Количество строк в одной транзакции", gt=0)
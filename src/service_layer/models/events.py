@@ -25,3 +25,59 @@ class DeviceIndicatorsUpdated(IndicatorsUpdatedEvent[models.DeviceIndicators]):
     """Событие об обновлении данных на индикаторах устройства"""
 
     payload: models.DeviceIndicators
+
+
+class TechNestIndicatorsPatched(IndicatorsUpdatedEvent[models.TechNestIndicatorsChanges]):
+    """Событие о частичном обновлении данных на индикаторах технического узла. Содержит только изменившиеся поля"""
+
+    payload: models.TechNestIndicatorsChanges
+
+
+class DeviceIndicatorsPatched(IndicatorsUpdatedEvent[models.DeviceIndicatorsChanges]):
+    """Событие о частичном обновлении данных на индикаторах устройства. Содержит только изменившиеся поля"""
+
+    payload: models.DeviceIndicatorsChanges
+
+
+class DevicesWentOffline(cqrs.NotificationEvent):
+    """Событие о переходе пачки устройств в offline"""
+
+    payload: list[models.DeviceLastSeen]
+
+
+class TopologyChanged(cqrs.NotificationEvent):
+    """Событие об изменении топологии владельца. Публикуется через outbox в транзакции изменения"""
+
+    payload: models.TopologyChange
+
+
+class HolderEvent(cqrs.DomainEvent):
+    """Событие топологии владельца. События одного владельца обрабатываются в порядке отправки"""
+
+    holder: int
+
+    def ordering_key(self) -> int:
+        return self.holder
+
+
+class HolderCreated(HolderEvent):
+    """Событие о создании владельца"""
+
+
+class TechNestAdded(HolderEvent):
+    """Событие о добавлении технического узла"""
+
+    nest: int
+
+
+class DeviceAdded(HolderEvent):
+    """Событие о добавлении устройства"""
+
+    nest: int
+    device: int
+
+
+class TopologyImported(cqrs.DomainEvent):
+    """Событие об импорте топологии. Содержит владельцев, чьи данные могли измениться"""
+
+    holders: list[int]
@@ -1,3 +1,8 @@
+import datetime
+import typing
+
+import pydantic
+
 from service_layer.cqrs import requests
 from service_layer.models import validation
 
@@ -13,15 +18,85 @@ class Holder(Query):
 
 
 class TechNests(Query):
-    """Запрос технических узлов по владельцу"""
+    """Запрос технических узлов по владельцу. Узлы выбираются по возрастанию идентификатора после after"""
 
     holder: int = validation.IdField(description="Идентификатор владельца технических узлов")
+    after: int | None = validation.AfterField(description="Идентификатор узла, после которого начинается страница")
+    limit: int | None = validation.LimitField()
+
+
+class TechNestsStream(TechNests):
+    """Запрос технических узлов по владельцу с потоковой выдачей"""
 
 
 class Devices(Query):
-    """Запрос устройств по техническому узлу"""
+    """Запрос устройств по техническому узлу. Устройства выбираются по возрастанию идентификатора после after"""
 
     nest: int = validation.IdField(description="Идентификатор технического узла")
+    after: int | None = validation.AfterField(
+        description="Идентификатор устройства, после которого начинается страница"
+    )
+    limit: int | None = validation.LimitField()
+
+
+class DevicesStream(Devices):
+    """Запрос устройств по техническому узлу с потоковой выдачей"""
+
+
+class HolderSnapshot(Query):
+    """Запрос актуальных показателей всех узлов и устройств владельца"""
+
+    holder: int = validation.IdField(description="Идентификатор владельца технических узлов")
+
+
+class NestsSnapshot(Query):
+    """Запрос актуальных показателей узлов и их устройств по списку идентификаторов"""
+
+    nests: list[int] = pydantic.Field(
+        description="Идентификаторы технических узлов",
+        min_length=1,
+        max_length=1000,
+    )
+
+
+class NestsInArea(Query):
+    """Запрос технических узлов, расположенных в прямоугольной области"""
+
+    south: float = pydantic.Field(description="Южная граница, широта", ge=-90, le=90)
+    west: float = pydantic.Field(description="Западная граница, долгота", ge=-180, le=180)
+    north: float = pydantic.Field(description="Северная граница, широта", ge=-90, le=90)
+    east: float = pydantic.Field(
+        description="Восточная граница, долгота. Если меньше западной, область пересекает 180-й меридиан",
+        ge=-180,
+        le=180,
+    )
+    limit: int = pydantic.Field(
+        description="Максимальное количество узлов", default=100, gt=0, le=validation.PAGE_MAX_LIMIT
+    )
+
+    @pydantic.model_validator(mode="after")
+    def latitude_validator(self) -> typing.Self:
+        if self.south > self.north:
+            raise ValueError("South bound is greater than north bound")
+        return self
+
+
+class NestsNear(Query):
+    """Запрос ближайших к точке технических узлов"""
+
+    latitude: float = pydantic.Field(description="Широта", ge=-90, le=90)
+    longitude: float = pydantic.Field(description="Долгота", ge=-180, le=180)
+    radius: float = pydantic.Field(description="Радиус поиска, м", gt=0, le=1_000_000)
+    limit: int = pydantic.Field(
+        description="Максимальное количество узлов", default=10, gt=0, le=validation.PAGE_MAX_LIMIT
+    )
+
+
+class OfflineDevices(Query):
+    """Запрос устройств владельца, не активных с заданного момента"""
+
+    holder: int = validation.IdField(description="Идентификатор владельца технических узлов")
+    since: datetime.datetime = pydantic.Field(description="Устройства без показателей с этого момента")
 
 
 class TechNestIndicators(Query):
@@ -32,3 +107,55 @@ class TechNestIndicators(Query):
 
 class DevicesIndicators(TechNestIndicators):
     """Запрос на получение актуальных показателей устройств на техническом узле"""
+
+
+class RawTechNestIndicators(TechNestIndicators):
+    """Запрос на получение актуальных показателей технического узла в виде сохраненного JSON документа"""
+
+
+class RawDevicesIndicators(TechNestIndicators):
+    """Запрос на получение актуальных показателей устройств на техническом узле в виде сохраненных JSON документов"""
+
+
+class IndicatorsHistory(Query):
+    """Запрос истории показателей"""
+
+    start: datetime.datetime | None = pydantic.Field(description="Начало диапазона", default=None)
+    end: datetime.datetime | None = pydantic.Field(description="Конец диапазона", default=None)
+    step: int | None = pydantic.Field(description="Шаг прореживания, сек", default=None, gt=0)
+    after: str | None = pydantic.Field(
+        description="Курсор предыдущей страницы", default=None, pattern=validation.STREAM_ID_PATTERN
+    )
+    limit: int = pydantic.Field(description="Максимальное количество точек", default=100, gt=0, le=10_000)
+
+    @pydantic.field_validator("after")
+    @classmethod
+    def after_validator(cls, value: str | None) -> str | None:
+        if value is not None and any(int(part) > validation.STREAM_ID_PART_MAX for part in value.split("-")):
+            raise ValueError("Cursor is out of range")
+        return value
+
+
+class TechNestIndicatorsHistory(IndicatorsHistory):
+    """Запрос истории показателей технического узла"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+
+
+class DeviceIndicatorsHistory(IndicatorsHistory):
+    """Запрос истории показателей устройства"""
+
+    device: int = validation.IdField(description="Идентификатор устройства")
+
+
+class TopologyImport(Query):
+    """Запрос состояния задачи импорта топологии"""
+
+    job: str = pydantic.Field(description="Идентификатор задачи импорта")
+
+
+class TopologyImportErrors(TopologyImport):
+    """Запрос ошибок строк импорта топологии"""
+
+    offset: int = pydantic.Field(description="Количество пропускаемых ошибок", default=0, ge=0)
+    limit: int = pydantic.Field(description="Количество ошибок", default=100, gt=0, le=validation.PAGE_MAX_LIMIT)
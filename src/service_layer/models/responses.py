@@ -1,3 +1,6 @@
+import datetime
+import typing
+
 import pydantic
 
 from domain import models
@@ -14,6 +17,19 @@ class TechNests(response.Response):
 
     holder: int = validation.IdField(description="Идентификатор владельца узлов")
     tech_nests: list[models.TechNest] = models.TechNestListField()
+    next_after: int | None = pydantic.Field(
+        description="Значение after для запроса следующей страницы, null - страница последняя",
+        default=None,
+    )
+
+
+class TechNestsStream(response.Response):
+    """Поток технических узлов владельца"""
+
+    holder: int = validation.IdField(description="Идентификатор владельца узлов")
+    tech_nests: typing.AsyncIterator[models.TechNest] = pydantic.Field(description="Технические узлы", exclude=True)
+
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
 
 
 class Devices(response.Response):
@@ -21,6 +37,38 @@ class Devices(response.Response):
 
     nest: int = validation.IdField(description="Идентификатор технического узла")
     devices: list[models.Device] = models.DevicesListField()
+    next_after: int | None = pydantic.Field(
+        description="Значение after для запроса следующей страницы, null - страница последняя",
+        default=None,
+    )
+
+
+class DevicesStream(response.Response):
+    """Поток устройств технического узла"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    devices: typing.AsyncIterator[models.Device] = pydantic.Field(description="Устройства", exclude=True)
+
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+
+class TechNestsInArea(response.Response):
+    """Технические узлы, расположенные в области"""
+
+    tech_nests: list[models.TechNest] = models.TechNestListField()
+
+
+class TechNestDistance(pydantic.BaseModel):
+    """Технический узел и расстояние до него"""
+
+    distance: float = pydantic.Field(description="Расстояние до узла, м")
+    tech_nest: models.TechNest = pydantic.Field(description="Технический узел")
+
+
+class TechNestsNear(response.Response):
+    """Ближайшие к точке технические узлы по возрастанию расстояния"""
+
+    tech_nests: list[TechNestDistance] = pydantic.Field(description="Технические узлы", default_factory=list)
 
 
 class HolderCreated(response.Response):
@@ -44,3 +92,132 @@ class DeviceIndicators(response.Response):
         description="Значения на индикаторах устройств",
         default_factory=list,
     )
+
+
+class RawTechNestIndicators(response.Response):
+    """Показатели на узле в виде сохраненного JSON документа"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    values: bytes = pydantic.Field(description="JSON документ значений на индикаторах")
+
+
+class RawDeviceIndicators(response.Response):
+    """Показатели на устройствах узла в виде сохраненных JSON документов"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    devices: dict[int, bytes] = pydantic.Field(
+        description="JSON документы значений на индикаторах по идентификаторам устройств",
+        default_factory=dict,
+    )
+
+
+class DeviceSnapshot(pydantic.BaseModel):
+    """Актуальные показатели устройства в составе снимка"""
+
+    device: int = validation.IdField(description="Идентификатор устройства")
+    name: str = models.DeviceNameField()
+    missing: bool = pydantic.Field(description="Показатели устройства еще не публиковались")
+    values: models.DeviceIndicatorsValues | None = pydantic.Field(description="Значения на индикаторах")
+
+
+class TechNestSnapshot(pydantic.BaseModel):
+    """Актуальные показатели узла и его устройств в составе снимка"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    name: str = models.TechNestNameField()
+    missing: bool = pydantic.Field(description="Показатели узла еще не публиковались")
+    values: models.TechNestIndicatorsValues | None = pydantic.Field(description="Значения на индикаторах")
+    devices: list[DeviceSnapshot] = pydantic.Field(description="Показатели устройств узла", default_factory=list)
+
+
+class FleetSnapshot(response.Response):
+    """Снимок актуальных показателей набора технических узлов"""
+
+    holder: int | None = pydantic.Field(description="Идентификатор владельца узлов", default=None)
+    nests: list[TechNestSnapshot] = pydantic.Field(default_factory=list)
+
+
+class RawFleetSnapshot(response.Response):
+    """Снимок показателей набора узлов в виде сохраненных JSON документов, выровненных по узлам и устройствам"""
+
+    holder: int | None = pydantic.Field(description="Идентификатор владельца узлов", default=None)
+    nests: list[models.TechNest] = models.TechNestListField()
+    nest_values: list[bytes | None] = pydantic.Field(
+        description="JSON документы значений узлов в порядке nests, None - значения отсутствуют",
+        default_factory=list,
+    )
+    device_values: dict[int, bytes | None] = pydantic.Field(
+        description="JSON документы значений по идентификаторам устройств, None - значения отсутствуют",
+        default_factory=dict,
+    )
+
+
+class OfflineDevices(response.Response):
+    """Устройства владельца, не активные с заданного момента"""
+
+    holder: int = validation.IdField(description="Идентификатор владельца технических узлов")
+    since: datetime.datetime = pydantic.Field(description="Устройства без показателей с этого момента")
+    devices: list[models.DeviceLastSeen] = pydantic.Field(default_factory=list)
+
+
+class TopologyImportStarted(response.Response):
+    job: str = pydantic.Field(description="Идентификатор задачи импорта")
+
+
+class TopologyImport(models.TopologyImport, response.Response):
+    pass
+
+
+class TopologyImportErrors(response.Response):
+    """Ошибки строк импорта топологии"""
+
+    job: str = pydantic.Field(description="Идентификатор задачи импорта")
+    errors: list[models.TopologyImportRowError] = pydantic.Field(default_factory=list)
+
+
+class BatchItemError(response.Response):
+    """Ошибка обработки элемента пакета"""
+
+    path: list = pydantic.Field(description="Путь до элемента пакета, например ['devices', 3]")
+    message: str = pydantic.Field(description="Описание ошибки")
+
+
+class IndicatorsBatchUpdated(response.Response):
+    """Результат пакетного обновления показателей индикаторов"""
+
+    accepted: int = pydantic.Field(description="Количество принятых элементов пакета", ge=0)
+    skipped: int = pydantic.Field(
+        description="Количество элементов, не превысивших зону нечувствительности",
+        ge=0,
+        default=0,
+    )
+    errors: list[BatchItemError] = pydantic.Field(
+        description="Ошибки по отдельным элементам пакета",
+        default_factory=list,
+    )
+
+
+HV = typing.TypeVar("HV", models.TechNestIndicatorsValues, models.DeviceIndicatorsValues)
+
+
+class HistoryPoint(pydantic.BaseModel, typing.Generic[HV]):
+    """Точка истории показателей"""
+
+    timestamp: datetime.datetime = pydantic.Field(description="Время приема значения")
+    values: HV = pydantic.Field(description="Значения на индикаторах")
+
+
+class TechNestIndicatorsHistory(response.Response):
+    """Страница истории показателей технического узла"""
+
+    nest: int = validation.IdField(description="Идентификатор технического узла")
+    points: list[HistoryPoint[models.TechNestIndicatorsValues]] = pydantic.Field(default_factory=list)
+    next: str | None = pydantic.Field(description="Курсор следующей страницы", default=None)
+
+
+class DeviceIndicatorsHistory(response.Response):
+    """Страница истории показателей устройства"""
+
+    device: int = validation.IdField(description="Идентификатор устройства")
+    points: list[HistoryPoint[models.DeviceIndicatorsValues]] = pydantic.Field(default_factory=list)
+    next: str | None = pydantic.Field(description="Курсор следующей страницы", default=None)
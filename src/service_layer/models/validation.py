@@ -6,3 +6,18 @@ IdFieldParams = dict(description="Уникальный идентификато
 
 
 IdField = functools.partial(pydantic.Field, **IdFieldParams)
+
+PAGE_MAX_LIMIT = 1000
+
+AfterField = functools.partial(pydantic.Field, default=None, gt=0)
+LimitField = functools.partial(
+    pydantic.Field,
+    default=None,
+    gt=0,
+    le=PAGE_MAX_LIMIT,
+    description="Размер страницы. Если не задан, возвращаются все записи после after",
+)
+
+# Идентификатор записи Redis Stream: <время, мс>-<последовательность>, обе части - 64-битные беззнаковые
+STREAM_ID_PATTERN = r"^\d{1,20}-\d{1,20}$"
+STREAM_ID_PART_MAX = 2**64 - 1
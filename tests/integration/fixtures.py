@@ -11,3 +11,5 @@ async def init_orm():
     async with engine.begin() as connect:
         await connect.run_sync(orm.Base.metadata.drop_all)
         await connect.run_sync(orm.Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
@@ -0,0 +1,61 @@
+import asyncio
+import decimal
+import random
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from domain import models
+from infrastructire import orm, repository
+
+ADDRESSES = [f"Москва, ул. Тверская, {number}" for number in range(10)]
+
+
+def location(address: str) -> models.TechNestLocation:
+    return models.TechNestLocation(
+        latitude=decimal.Decimal("55.76"), longitude=decimal.Decimal("37.61"), address=address
+    )
+
+
+async def test_concurrent_nests_share_locations(init_orm):
+    sessionmaker = async_sessionmaker(init_orm)
+    async with sessionmaker() as session:
+        holder = await repository.SQLAlchemyRepository(session).add_holder(
+            models.Holder(name="Холдинг", inn="7707083893", kpp="773601001"),
+        )
+        await session.commit()
+
+    async def add_nest(number: int) -> int:
+        async with sessionmaker() as session:
+            repo = repository.SQLAlchemyRepository(session)
+            await repo.get_holder(holder)
+            nest = models.TechNest(name=f"Узел {number}", holder_id=holder, location=location(ADDRESSES[number % 10]))
+            nest_id = await repo.add_nest(nest)
+            await session.commit()
+            return nest_id
+
+    async def merge_nests(batch: int) -> list[int]:
+        addresses = random.sample(ADDRESSES, k=len(ADDRESSES)) + [f"Казань, ул. Баумана, {batch}"]
+        nests = [
+            models.TechNest(name=f"Пакет {batch} узел {number}", holder_id=holder, location=location(address))
+            for number, address in enumerate(addresses)
+        ]
+        async with sessionmaker() as session:
+            repo = repository.SQLAlchemyRepository(session)
+            # Снимок транзакции создается до вставок конкурирующих пачек
+            await repo.get_holder(holder)
+            nest_ids = await repo.merge_nests(nests)
+            await session.commit()
+            return nest_ids
+
+    results = await asyncio.gather(*map(add_nest, range(20)), *map(merge_nests, range(20)))
+
+    async with sessionmaker() as session:
+        locations = dict((await session.execute(sqlalchemy.select(orm.Locations.address, orm.Locations.id))).all())
+        nests = (await session.execute(sqlalchemy.select(orm.TechNest.id, orm.TechNest.location_id))).all()
+    assert len(locations) == len(ADDRESSES) + 20
+    assert len(nests) == 20 + 20 * (len(ADDRESSES) + 1)
+    assert {nest_id for result in results for nest_id in (result if isinstance(result, list) else [result])} == {
+        nest.id for nest in nests
+    }
+    assert {location_id for _, location_id in nests} == set(locations.values())
@@ -0,0 +1,31 @@
+import decimal
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from domain import geo, models
+from infrastructire import orm, repository
+
+
+async def test_locations_without_geohash_are_found(init_orm):
+    sessionmaker = async_sessionmaker(init_orm)
+    async with sessionmaker() as session:
+        repo = repository.SQLAlchemyRepository(session)
+        holder = await repo.add_holder(models.Holder(name="Водоканал", inn="7812003110", kpp="783801001"))
+        location = models.TechNestLocation(
+            latitude=decimal.Decimal("59.93"), longitude=decimal.Decimal("30.31"), address="Санкт-Петербург, Невский, 1"
+        )
+        nest = await repo.add_nest(models.TechNest(name="Узел", holder_id=holder, location=location))
+        # Локация создана до появления geohash
+        await session.execute(
+            sqlalchemy.update(orm.Locations).where(orm.Locations.address == location.address).values(geohash=None)
+        )
+        await session.commit()
+
+    async with sessionmaker() as session:
+        repo = repository.SQLAlchemyRepository(session)
+        in_area = await repo.get_nests_in_area(geo.BoundingBox(south=59.9, west=30.2, north=60.0, east=30.4), limit=10)
+        near = await repo.get_nests_near(geo.Point(latitude=59.93, longitude=30.31), radius=1000, limit=10)
+
+    assert [item.id for item in in_area] == [nest]
+    assert [item.id for item, _ in near] == [nest]
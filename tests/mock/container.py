@@ -0,0 +1,11 @@
+class FakeContainer:
+    def __init__(self, *handlers):
+        self.handlers = {type(handler): handler for handler in handlers}
+        self.resolved: list[type] = []
+
+    async def resolve(self, type_):
+        self.resolved.append(type_)
+        return self.handlers[type_] if type_ in self.handlers else type_()
+
+    async def close(self):
+        pass
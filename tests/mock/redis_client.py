@@ -0,0 +1,111 @@
+import redis.asyncio as redis
+
+_MAX_SEQUENCE = 2**64 - 1
+
+
+def _stream_id(value: str, sequence: int) -> tuple[int, int]:
+    milliseconds, _, explicit_sequence = value.partition("-")
+    return int(milliseconds), int(explicit_sequence) if explicit_sequence else sequence
+
+
+def _in_range(entry_id: tuple[int, int], min: str, max: str) -> bool:
+    if min.startswith("("):
+        above = entry_id > _stream_id(min[1:], 0)
+    else:
+        above = min == "-" or entry_id >= _stream_id(min, 0)
+    if max.startswith("("):
+        below = entry_id < _stream_id(max[1:], _MAX_SEQUENCE)
+    else:
+        below = max == "+" or entry_id <= _stream_id(max, _MAX_SEQUENCE)
+    return above and below
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self.values: dict[str, bytes | dict[bytes, bytes] | list[tuple[bytes, dict]]] = {}
+        self.xrange_calls = 0
+        # Счетчик записей: транзакция под WATCH отменяется, если после WATCH были записи
+        self.writes = 0
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.writes += 1
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def hgetall(self, key):
+        return dict(self.values.get(key, {}))
+
+    async def xadd(self, key, fields, id, **kwargs):
+        self.values.setdefault(key, []).append((id.encode(), fields))
+
+    async def xrange(self, key, min="-", max="+", count=None):
+        self.xrange_calls += 1
+        entries = [entry for entry in self.values.get(key, []) if _in_range(_stream_id(entry[0].decode(), 0), min, max)]
+        return entries[:count]
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, client: InMemoryRedis):
+        self.client = client
+        self.commands = []
+        self.watched: int | None = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def watch(self, *keys):
+        self.watched = self.client.writes
+
+    async def get(self, key):
+        return self.client.values.get(key)
+
+    def hgetall(self, key):
+        # После WATCH команды выполняются сразу, иначе - при execute
+        if self.watched is not None and not self.commands:
+            return self.client.hgetall(key)
+        self.commands.append(lambda values: dict(values.get(key, {})))
+
+    def multi(self):
+        pass
+
+    def set(self, key, value, ex=None):
+        self.commands.append(lambda values: values.__setitem__(key, value))
+
+    def incr(self, key):
+        self.commands.append(lambda values: values.__setitem__(key, str(int(values.get(key, 0)) + 1).encode()))
+
+    def delete(self, *keys):
+        self.commands.append(lambda values: [values.pop(key, None) for key in keys])
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        fields = {field: str(value).encode()} if mapping is None else mapping
+        self.commands.append(
+            lambda values: values.setdefault(key, {}).update({name.encode(): item for name, item in fields.items()})
+        )
+
+    def hsetnx(self, key, field, value):
+        self.commands.append(lambda values: values.setdefault(key, {}).setdefault(field.encode(), value.encode()))
+
+    def expire(self, key, ttl):
+        pass
+
+    async def execute(self, raise_on_error=True):
+        commands, self.commands = self.commands, []
+        watched, self.watched = self.watched, None
+        if watched is not None and watched != self.client.writes:
+            raise redis.WatchError("Watched variable changed.")
+        results = [command(self.client.values) for command in commands]
+        if commands:
+            self.client.writes += 1
+        return results
@@ -0,0 +1,71 @@
+import datetime
+
+from domain import models
+from infrastructire import history, presence, storages
+
+
+class InMemoryStorage(storages.IndicatorValuesStorage):
+    def __init__(self, failed_ids: tuple[int, ...] = ()):
+        self.values = {}
+        self.failed_ids = failed_ids
+
+    async def set_value(self, id, value):
+        self.values[id] = value
+
+    async def set_values(self, values):
+        errors = {}
+        for id, value in values.items():
+            if id in self.failed_ids:
+                errors[id] = ConnectionError("write failed")
+                continue
+            self.values[id] = value
+        return errors
+
+    async def get_value(self, id):
+        return self.values.get(id)
+
+    async def get_values(self, *id):
+        return [self.values.get(i) for i in id]
+
+    async def get_raw_value(self, id):
+        return None
+
+    async def get_raw_values(self, *id):
+        return [None for _ in id]
+
+
+class InMemoryHistoryStorage(history.IndicatorsHistoryStorage):
+    def __init__(self):
+        self.values = {}
+
+    async def append(self, id, value):
+        self.values.setdefault(id, []).append(value)
+
+    async def append_many(self, values):
+        for id, value in values.items():
+            await self.append(id, value)
+
+    async def get_range(self, id, start=None, end=None, step=None, after=None, limit=100):
+        return history.HistoryPage(points=[])
+
+
+class InMemoryLastSeenIndex(presence.DevicesLastSeenIndex):
+    def __init__(self):
+        self.devices = {}
+
+    async def touch(self, devices):
+        now = datetime.datetime.now()
+        for device, nest in devices.items():
+            self.devices[device] = models.DeviceLastSeen(nest=nest, device=device, last_seen=now)
+
+    async def get_offline(self, nests, since):
+        return [item for item in self.devices.values() if item.nest in nests and item.last_seen < since]
+
+    async def pop_offline(self, before, limit):
+        offline = sorted(
+            (item for item in self.devices.values() if item.last_seen <= before),
+            key=lambda item: item.last_seen,
+        )[:limit]
+        for item in offline:
+            del self.devices[item.device]
+        return offline
@@ -0,0 +1,20 @@
+import contextlib
+
+
+class FakeUoW:
+    def __init__(self, repository=None):
+        self.repository = repository
+        self.read_only: list[bool] = []
+        self.commits = 0
+        self.published: list[bytes] = []
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, read_only=False):
+        self.read_only.append(read_only)
+        yield self
+
+    async def commit(self):
+        self.commits += 1
+
+    async def publish(self, bodies):
+        self.published.extend(bodies)
@@ -0,0 +1,52 @@
+import datetime
+import decimal
+
+from domain import models
+
+
+def tech_nest_values(
+    voltage: str = "220",
+    inputs: int = 2,
+    phase_control: models.PhaseControl = models.PhaseControl.NORMAL,
+    power: str = "10",
+    cumulative: str = "100",
+    instantaneous: str = "1",
+    updated_at: datetime.datetime | None = None,
+) -> models.TechNestIndicatorsValues:
+    return models.TechNestIndicatorsValues(
+        input_power=models.InputPowerIndicatorsGroup(
+            inputs=[
+                models.InputPowerIndicators(
+                    input_number=number,
+                    supply=True,
+                    voltage=models.VoltageValue(value=decimal.Decimal(voltage)),
+                )
+                for number in range(1, inputs + 1)
+            ],
+            phase_control=phase_control,
+        ),
+        consumption=models.ConsumptionIndicatorsGroup(
+            power=models.PowerConsumptionValue(value=decimal.Decimal(power)),
+            water=models.WaterConsumptionIndicators(
+                cumulative=models.CumulativeWaterConsumptionValue(value=decimal.Decimal(cumulative)),
+                instantaneous=models.InstantaneousWaterConsumptionValue(value=decimal.Decimal(instantaneous)),
+            ),
+        ),
+        # None - время создания значения
+        **({} if updated_at is None else {"updated_at": updated_at}),
+    )
+
+
+def device_values(
+    ammeter: str = "1.5",
+    mode: models.ModeEnum = models.ModeEnum.MANUAL,
+    status: models.DeviceStatus = models.DeviceStatus.TURNED_ON,
+    updated_at: datetime.datetime | None = None,
+) -> models.DeviceIndicatorsValues:
+    return models.DeviceIndicatorsValues(
+        ammeter=models.AmmeterValue(value=decimal.Decimal(ammeter)),
+        mode=mode,
+        frequency=models.Frequency(value=decimal.Decimal("50")),
+        status=status,
+        **({} if updated_at is None else {"updated_at": updated_at}),
+    )
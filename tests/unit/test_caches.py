@@ -0,0 +1,67 @@
+from infrastructire import caches, storages
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RawStorage(storages.IndicatorValuesStorage):
+    def __init__(self, values: dict[int, bytes]):
+        self.values = values
+        self.reads = []
+
+    async def set_value(self, id, value):
+        self.values[id] = value
+
+    async def set_values(self, values):
+        self.values.update(values)
+        return {}
+
+    async def get_value(self, id):
+        raise AssertionError("cached raw path must not parse values")
+
+    async def get_values(self, *id):
+        raise AssertionError("cached raw path must not parse values")
+
+    async def get_raw_value(self, id):
+        self.reads.append((id,))
+        return self.values.get(id)
+
+    async def get_raw_values(self, *id):
+        self.reads.append(id)
+        return [self.values.get(key) for key in id]
+
+
+def test_lru_cache_evicts_least_recently_used_and_expired():
+    clock = FakeClock()
+    cache = caches.LRUCache("test_lru", max_size=2, ttl=10, clock=clock)
+    cache.set(1, b"1")
+    cache.set(2, b"2")
+    assert cache.get(1) == b"1"
+
+    cache.set(3, b"3")
+    assert cache.get(2) is None
+    assert cache.get(1) == b"1"
+
+    clock.now = 11
+    assert cache.get(1) is None
+    assert len(cache) == 1
+    assert cache.hits.value >= 2
+    assert cache.misses.value >= 2
+
+
+async def test_cached_storage_reads_only_missed_keys_and_keeps_order():
+    storage = RawStorage({1: b"{}", 2: b"{}"})
+    cached = caches.CachedIndicatorValuesStorage(storage, caches.LRUCache("test_storage", max_size=10, ttl=10))
+
+    assert await cached.get_raw_value(1) == b"{}"
+    assert await cached.get_raw_values(3, 1, 2) == [None, b"{}", b"{}"]
+    assert storage.reads == [(1,), (3, 2)]
+
+    await cached.set_values({2: b"[]"})
+    assert await cached.get_raw_values(1, 2) == [b"{}", b"[]"]
+    assert storage.reads[-1] == (2,)
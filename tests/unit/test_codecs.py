@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+
+from domain import models
+from infrastructire import codecs
+from tests.mock.values import device_values, tech_nest_values
+
+TECH_NEST_VALUES = tech_nest_values(
+    voltage="220.15",
+    inputs=3,
+    phase_control=models.PhaseControl.ACCIDENT,
+    power="12.500",
+    cumulative="10234.7",
+    instantaneous="0.003",
+    updated_at=datetime.datetime(2024, 4, 13, 16, 7, 21, 660927),
+)
+DEVICE_VALUES = device_values(
+    ammeter="-0",
+    mode=models.ModeEnum.ACCIDENT,
+    status=models.DeviceStatus.TURNED_OFF,
+    updated_at=datetime.datetime(2024, 4, 13, 16, 7, 21, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+)
+
+
+@pytest.mark.parametrize("value", [TECH_NEST_VALUES, DEVICE_VALUES])
+def test_msgpack_codec_roundtrip(value):
+    codec = codecs.MsgpackCodec()
+
+    encoded = codec.encode(value)
+
+    assert len(encoded) < len(codecs.JSONCodec().encode(value))
+    assert codecs.decode(encoded, type(value)).model_dump(mode="json") == value.model_dump(mode="json")
+
+
+@pytest.mark.parametrize("value", [TECH_NEST_VALUES, DEVICE_VALUES])
+def test_json_values_are_readable_side_by_side(value):
+    encoded = codecs.JSONCodec().encode(value)
+
+    assert codecs.decode(encoded, type(value)) == value
+
+
+def test_unknown_schema_version_is_rejected():
+    encoded = codecs.MsgpackCodec().encode(DEVICE_VALUES)
+
+    with pytest.raises(ValueError):
+        codecs.decode(encoded[:1] + b"\xff" + encoded[2:], models.DeviceIndicatorsValues)
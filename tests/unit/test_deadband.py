@@ -0,0 +1,65 @@
+import datetime
+import decimal
+
+from domain import deadband, models
+from infrastructire import indexes
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands
+from tests.mock import values
+from tests.mock.storages import InMemoryHistoryStorage, InMemoryLastSeenIndex, InMemoryStorage
+
+NOW = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+def device_values(ammeter: str = "10", **fields) -> models.DeviceIndicatorsValues:
+    return values.device_values(ammeter, **{"updated_at": NOW, **fields})
+
+
+DEADBAND = deadband.IndicatorsDeadband(
+    ammeter=deadband.Threshold(absolute=decimal.Decimal("0.5")),
+    max_silence=datetime.timedelta(minutes=1),
+)
+
+
+def test_device_changed():
+    previous = device_values()
+
+    assert DEADBAND.device_changed(None, previous)
+    assert not DEADBAND.device_changed(previous, device_values("10.4", updated_at=NOW + datetime.timedelta(seconds=5)))
+    assert DEADBAND.device_changed(previous, device_values("10.6"))
+    assert DEADBAND.device_changed(previous, device_values(status=models.DeviceStatus.TURNED_OFF))
+    assert DEADBAND.device_changed(previous, device_values(updated_at=NOW + datetime.timedelta(minutes=1)))
+
+
+def test_relative_threshold():
+    threshold = deadband.Threshold(relative=decimal.Decimal("0.01"))
+
+    assert not threshold.exceeded(decimal.Decimal("220"), decimal.Decimal("222"))
+    assert threshold.exceeded(decimal.Decimal("220"), decimal.Decimal("223"))
+
+
+async def test_batch_skips_insignificant_updates():
+    device_storage = InMemoryStorage()
+    device_storage.values = {1: device_values(), 2: device_values()}
+    handler = command_handlers.UpdateIndicatorsBatchHandler(
+        nest_storage=InMemoryStorage(),
+        device_storage=device_storage,
+        nest_history_storage=InMemoryHistoryStorage(),
+        device_history_storage=InMemoryHistoryStorage(),
+        deadband=DEADBAND,
+        last_seen_index=InMemoryLastSeenIndex(),
+        topology_index=indexes.DisabledTopologyIndex(),
+    )
+    request = commands.UpdateIndicatorsBatch(
+        devices=[
+            commands.DeviceIndicatorsItem(nest=1, device=1, values=device_values("10.1")),
+            commands.DeviceIndicatorsItem(nest=1, device=2, values=device_values("12")),
+            commands.DeviceIndicatorsItem(nest=1, device=3, values=device_values()),
+        ]
+    )
+
+    result = await handler.handle(request)
+
+    assert (result.accepted, result.skipped) == (2, 1)
+    assert device_storage.values[1].ammeter.value == decimal.Decimal("10")
+    assert [event.payload.device for event in handler.events] == [2, 3]
@@ -0,0 +1,79 @@
+import typing
+
+import di
+from di import dependent
+
+from service_layer.cqrs.container import di as di_container
+
+
+class Settings:
+    pass
+
+
+class OtherSettings(Settings):
+    pass
+
+
+class Handler:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+
+def container() -> di.Container:
+    external = di.Container()
+    external.bind(di.bind_by_type(dependent.Dependent(Settings, scope="app"), Settings))
+    return external
+
+
+async def test_app_dependencies_are_shared_between_resolves():
+    resolver = di_container.DIContainer()
+    resolver.attach_external_container(container())
+
+    first, second = await resolver.resolve(Handler), await resolver.resolve(Handler)
+
+    assert first is not second
+    assert first.settings is second.settings
+
+
+async def test_reset_applies_rebound_dependencies():
+    external = container()
+    resolver = di_container.DIContainer()
+    resolver.attach_external_container(external)
+    settings = (await resolver.resolve(Handler)).settings
+
+    with external.bind(di.bind_by_type(dependent.Dependent(OtherSettings, scope="app"), Settings)):
+        await resolver.reset()
+        assert isinstance((await resolver.resolve(Handler)).settings, OtherSettings)
+
+    await resolver.reset()
+    restored = (await resolver.resolve(Handler)).settings
+    assert type(restored) is Settings
+    assert restored is not settings
+
+
+class Connection:
+    closed = False
+
+
+async def connection() -> typing.AsyncIterator[Connection]:
+    item = Connection()
+    yield item
+    item.closed = True
+
+
+class ConnectionHandler:
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+
+async def test_close_releases_app_dependencies():
+    external = di.Container()
+    external.bind(di.bind_by_type(dependent.Dependent(connection, scope="app"), Connection))
+    resolver = di_container.DIContainer()
+    resolver.attach_external_container(external)
+    opened = (await resolver.resolve(ConnectionHandler)).connection
+
+    await resolver.close()
+
+    assert opened.closed
+    assert (await resolver.resolve(ConnectionHandler)).connection is not opened
@@ -0,0 +1,58 @@
+import asyncio
+
+from service_layer.cqrs import events as cqrs_events
+from service_layer.models import events
+from tests.mock.container import FakeContainer
+
+handled: list[tuple[str, int, int]] = []
+
+
+class SlowHandler:
+    async def handle(self, event: events.TechNestAdded) -> None:
+        handled.append(("start", event.holder, event.nest))
+        await asyncio.sleep(0.01)
+        handled.append(("end", event.holder, event.nest))
+
+
+class FailingHandler:
+    async def handle(self, event: events.TechNestAdded) -> None:
+        raise RuntimeError("Subscriber is down")
+
+
+class StuckHandler:
+    async def handle(self, event: events.TechNestAdded) -> None:
+        await asyncio.sleep(60)
+
+
+def emitter(*handlers_types) -> cqrs_events.EventEmitter:
+    event_map = cqrs_events.EventMap()
+    for handler_type in handlers_types:
+        event_map.bind(events.TechNestAdded, handler_type)
+    return cqrs_events.EventEmitter(
+        event_map=event_map, container=FakeContainer(), max_concurrency=8, handler_timeout=0.1
+    )
+
+
+async def test_events_of_holder_are_ordered_and_holders_run_concurrently():
+    handled.clear()
+
+    await emitter(SlowHandler).emit_many(
+        [
+            events.TechNestAdded(holder=1, nest=1),
+            events.TechNestAdded(holder=2, nest=2),
+            events.TechNestAdded(holder=1, nest=3),
+        ]
+    )
+
+    holder_1 = [(stage, nest) for stage, holder, nest in handled if holder == 1]
+    assert holder_1 == [("start", 1), ("end", 1), ("start", 3), ("end", 3)]
+    # Второй владелец начал обработку до завершения первого события первого владельца
+    assert handled.index(("start", 2, 2)) < handled.index(("end", 1, 1))
+
+
+async def test_failed_and_stuck_handlers_do_not_affect_others():
+    handled.clear()
+
+    await emitter(FailingHandler, StuckHandler, SlowHandler).emit(events.TechNestAdded(holder=1, nest=1))
+
+    assert handled == [("start", 1, 1), ("end", 1, 1)]
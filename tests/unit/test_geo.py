@@ -0,0 +1,26 @@
+import random
+
+from domain import geo
+
+
+def test_encode():
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geo.cell_size(1) == (45.0, 45.0)
+
+
+def test_cover_contains_every_point_of_area():
+    box = geo.BoundingBox(south=59.8, west=30.1, north=60.05, east=30.6)
+    cells = geo.cover(box, max_cells=16)
+    points = [(random.uniform(box.south, box.north), random.uniform(box.west, box.east)) for _ in range(1000)]
+
+    assert 0 < len(cells) <= 16
+    assert all(geo.encode(latitude, longitude).startswith(tuple(cells)) for latitude, longitude in points)
+
+
+def test_around_crosses_antimeridian():
+    point = geo.Point(latitude=65.0, longitude=179.9)
+    area = geo.around(point, 50_000)
+
+    assert area.west > area.east
+    assert [box.east for box in area.split()] == [180.0, area.east]
+    assert round(geo.distance(point, geo.Point(latitude=65.0, longitude=-179.9))) == 9399
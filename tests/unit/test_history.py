@@ -0,0 +1,79 @@
+import datetime
+import decimal
+
+import pydantic
+import pytest
+
+from domain import models
+from infrastructire import codecs, history
+from service_layer.models import queries
+from tests.mock.redis_client import InMemoryRedis
+
+ENTRY_IDS = ["1000-0", "1000-1", "1500-0", "2100-0", "2200-0", "3900-0"]
+
+
+async def storage(chunk_size: int = 2) -> tuple[InMemoryRedis, history.RedisStreamDeviceIndicatorsHistoryStorage]:
+    client = InMemoryRedis()
+    codec = codecs.JSONCodec()
+    for number, entry_id in enumerate(ENTRY_IDS):
+        value = models.DeviceIndicatorsValues(
+            ammeter=models.AmmeterValue(value=decimal.Decimal(number)),
+            frequency=models.Frequency(value=decimal.Decimal("50")),
+            status=models.DeviceStatus.TURNED_ON,
+        )
+        await client.xadd("history:device@1", {b"v": codec.encode(value)}, id=entry_id)
+    history_storage = history.RedisStreamDeviceIndicatorsHistoryStorage(client_factory=lambda: client, codec=codec)
+    history_storage.chunk_size = chunk_size
+    return client, history_storage
+
+
+def numbers(page: history.HistoryPage) -> list[int]:
+    return [int(value.ammeter.value) for _, value in page.points]
+
+
+async def test_range_is_read_by_chunks():
+    client, history_storage = await storage()
+
+    page = await history_storage.get_range(1)
+
+    assert (numbers(page), page.next) == ([0, 1, 2, 3, 4, 5], None)
+    assert page.points[2][0] == datetime.datetime.fromtimestamp(1.5)
+    assert client.xrange_calls == 4
+
+
+async def test_limit_boundary_returns_cursor_of_last_point():
+    _, history_storage = await storage()
+
+    first = await history_storage.get_range(1, limit=2)
+    second = await history_storage.get_range(1, after=first.next, limit=4)
+    last = await history_storage.get_range(1, after=second.next, limit=4)
+
+    assert (numbers(first), first.next) == ([0, 1], "1000-1")
+    assert (numbers(second), second.next) == ([2, 3, 4, 5], "3900-0")
+    assert (numbers(last), last.next) == ([], None)
+
+
+async def test_step_returns_first_point_of_interval():
+    _, history_storage = await storage()
+
+    first = await history_storage.get_range(1, step=datetime.timedelta(seconds=1), limit=2)
+    second = await history_storage.get_range(1, step=datetime.timedelta(seconds=1), after=first.next, limit=2)
+
+    assert (numbers(first), first.next) == ([0, 3], "2999-18446744073709551615")
+    assert (numbers(second), second.next) == ([5], None)
+
+
+async def test_from_and_to_bounds_are_inclusive():
+    _, history_storage = await storage()
+
+    page = await history_storage.get_range(
+        1, start=datetime.datetime.fromtimestamp(1.5), end=datetime.datetime.fromtimestamp(2.2)
+    )
+
+    assert numbers(page) == [2, 3, 4]
+
+
+@pytest.mark.parametrize("after", ["abc", "(1000-0", "1000", "1000-18446744073709551616"])
+def test_malformed_cursor_is_rejected(after):
+    with pytest.raises(pydantic.ValidationError):
+        queries.DeviceIndicatorsHistory(device=1, after=after)
@@ -0,0 +1,46 @@
+from domain import deadband
+from infrastructire import indexes
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands
+from tests.mock.storages import InMemoryHistoryStorage, InMemoryLastSeenIndex, InMemoryStorage
+from tests.mock.values import device_values
+
+
+def topology_index() -> indexes.InProcessTopologyIndex:
+    index = indexes.InProcessTopologyIndex(negative_ttl=30)
+    index.add_nests([(1, 10), (2, 10)])
+    index.add_devices([(device, 1) for device in range(1, 1000)] + [(5000, 2)])
+    return index
+
+
+async def test_index_resolves_links_without_database():
+    index = topology_index()
+
+    assert (index.nest_of(999), index.nest_of(5000), index.nest_of(1000), index.holder_of(2)) == (1, 2, None, 10)
+    assert await index.unknown_nests([1, 2]) == set()
+    assert await index.mismatched_devices({1: 1, 5000: 1}) == {5000}
+
+
+async def test_batch_rejects_devices_of_other_nests():
+    device_storage = InMemoryStorage()
+    handler = command_handlers.UpdateIndicatorsBatchHandler(
+        nest_storage=InMemoryStorage(),
+        device_storage=device_storage,
+        nest_history_storage=InMemoryHistoryStorage(),
+        device_history_storage=InMemoryHistoryStorage(),
+        deadband=deadband.IndicatorsDeadband(enabled=False),
+        last_seen_index=InMemoryLastSeenIndex(),
+        topology_index=topology_index(),
+    )
+    request = commands.UpdateIndicatorsBatch(
+        devices=[
+            commands.DeviceIndicatorsItem(nest=1, device=1, values=device_values()),
+            commands.DeviceIndicatorsItem(nest=1, device=5000, values=device_values()),
+        ]
+    )
+
+    result = await handler.handle(request)
+
+    assert result.accepted == 1
+    assert [error.path for error in result.errors] == [["devices", 1]]
+    assert set(device_storage.values) == {1}
@@ -0,0 +1,80 @@
+import datetime
+
+from domain import deadband, models
+from infrastructire import indexes
+from service_layer.cqrs import events as cqrs_events
+from service_layer.cqrs import message_brokers
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands, events
+from tests.mock.storages import InMemoryHistoryStorage, InMemoryLastSeenIndex, InMemoryStorage
+from tests.mock.values import device_values
+
+
+class FakeMessageBroker:
+    def __init__(self):
+        self.batches = []
+
+    async def send_message(self, message: message_brokers.Message) -> None:
+        self.batches.append([message])
+
+    async def send_messages(self, messages) -> None:
+        self.batches.append(list(messages))
+
+
+async def test_batch_reports_per_item_errors():
+    device_storage = InMemoryStorage(failed_ids=(3,))
+    device_history_storage = InMemoryHistoryStorage()
+    last_seen_index = InMemoryLastSeenIndex()
+    handler = command_handlers.UpdateIndicatorsBatchHandler(
+        nest_storage=InMemoryStorage(),
+        device_storage=device_storage,
+        nest_history_storage=InMemoryHistoryStorage(),
+        device_history_storage=device_history_storage,
+        deadband=deadband.IndicatorsDeadband(enabled=False),
+        last_seen_index=last_seen_index,
+        topology_index=indexes.DisabledTopologyIndex(),
+    )
+    request = commands.UpdateIndicatorsBatch(
+        devices=[
+            commands.DeviceIndicatorsItem(nest=1, device=1, values=device_values()),
+            commands.DeviceIndicatorsItem(nest=1, device=1, values=device_values()),
+            commands.DeviceIndicatorsItem(nest=1, device=2, values=device_values()),
+            commands.DeviceIndicatorsItem(nest=1, device=3, values=device_values()),
+        ]
+    )
+
+    result = await handler.handle(request)
+
+    assert result.accepted == 2
+    assert sorted(error.path for error in result.errors) == [["devices", 1], ["devices", 3]]
+    assert set(device_storage.values) == {1, 2}
+    assert set(device_history_storage.values) == {1, 2}
+    assert set(last_seen_index.devices) == {1, 2, 3}
+    assert [type(event) for event in handler.events] == [events.DeviceIndicatorsUpdated] * 2
+
+
+async def test_emit_many_sends_notifications_as_one_batch():
+    broker = FakeMessageBroker()
+    emitter = cqrs_events.EventEmitter(event_map=cqrs_events.EventMap(), container=None, message_broker=broker)
+    payloads = [models.DeviceIndicators(nest=1, device=device, values=device_values()) for device in (1, 2, 3)]
+
+    await emitter.emit_many([events.DeviceIndicatorsUpdated(payload=payload) for payload in payloads])
+
+    assert len(broker.batches) == 1
+    assert [message.payload["payload"]["device"] for message in broker.batches[0]] == [1, 2, 3]
+
+
+async def test_sweep_emits_offline_devices_in_batches():
+    last_seen_index = InMemoryLastSeenIndex()
+    await last_seen_index.touch({device: 1 for device in range(1, 6)})
+    handler = command_handlers.SweepOfflineDevicesHandler(last_seen_index=last_seen_index)
+
+    await handler.handle(commands.SweepOfflineDevices(offline_after=1, batch_size=2))
+    assert handler.events == []
+
+    for item in last_seen_index.devices.values():
+        item.last_seen -= datetime.timedelta(minutes=1)
+    await handler.handle(commands.SweepOfflineDevices(offline_after=1, batch_size=2))
+
+    assert [len(event.payload) for event in handler.events] == [2, 2, 1]
+    assert last_seen_index.devices == {}
@@ -0,0 +1,81 @@
+import contextlib
+
+import orjson
+
+from infrastructire import outbox
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands
+
+
+class RecordingRepository:
+    async def add_holder(self, item):
+        return 7
+
+
+class RecordingUoW:
+    def __init__(self):
+        self.repository = RecordingRepository()
+        self.operations: list[tuple[str, list[bytes] | None]] = []
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, read_only=False):
+        yield self
+
+    async def publish(self, bodies):
+        self.operations.append(("publish", list(bodies)))
+
+    async def commit(self):
+        self.operations.append(("commit", None))
+
+
+class InMemoryOutbox(outbox.Outbox):
+    def __init__(self):
+        self.bodies: list[bytes] = []
+
+    async def put(self, bodies):
+        self.bodies.extend(bodies)
+
+    async def relay(self, publish, limit):
+        batch = self.bodies[:limit]
+        if batch:
+            await publish(batch)
+        del self.bodies[: len(batch)]
+        return len(batch)
+
+
+class FlakyPublisher:
+    def __init__(self):
+        self.failures = 1
+        self.published: list[bytes] = []
+
+    async def publish_many(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Broker is unavailable")
+        self.published.extend(message.body for message in messages)
+
+
+async def test_topology_change_is_written_to_outbox_before_commit():
+    uow = RecordingUoW()
+
+    await command_handlers.CreateHolderHandler(uow=uow).handle(
+        commands.CreateHolder(name="Водоканал", inn="7812003110")
+    )
+
+    (operation, bodies), commit = uow.operations
+    assert (operation, commit) == ("publish", ("commit", None))
+    message = orjson.loads(bodies[0])
+    assert (message["message_name"], message["payload"]["payload"]["holder"]) == ("TopologyChanged", 7)
+
+
+async def test_relay_keeps_messages_until_published():
+    source, publisher = InMemoryOutbox(), FlakyPublisher()
+    await source.put([b"1", b"2", b"3"])
+    relay = outbox.OutboxRelay([source], publisher, batch_size=2, poll_interval=1)
+
+    assert await relay.relay() is False
+    assert source.bodies == [b"1", b"2", b"3"]
+
+    assert await relay.relay() is True
+    assert await relay.relay() is False
+    assert (publisher.published, source.bodies) == ([b"1", b"2", b"3"], [])
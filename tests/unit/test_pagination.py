@@ -0,0 +1,27 @@
+from domain import models
+from service_layer.handlers import queries as query_handlers
+from service_layer.models import queries
+from tests.mock.uow import FakeUoW
+
+
+class DevicesRepository:
+    def __init__(self, devices: list[models.Device]):
+        self.devices = devices
+
+    async def get_devices(self, nest, after=None, limit=None):
+        devices = [device for device in self.devices if after is None or device.id > after]
+        return devices[:limit]
+
+
+async def test_devices_keyset_pages():
+    devices = [
+        models.Device(id=device_id, name=f"device {device_id}", model=None, nest_id=1) for device_id in range(1, 6)
+    ]
+    handler = query_handlers.GetDevicesHandler(uow=FakeUoW(DevicesRepository(devices)))
+
+    first = await handler.handle(queries.Devices(nest=1, limit=2))
+    last = await handler.handle(queries.Devices(nest=1, after=first.next_after, limit=3))
+
+    assert ([device.id for device in first.devices], first.next_after) == ([1, 2], 2)
+    assert ([device.id for device in last.devices], last.next_after) == ([3, 4, 5], None)
+    assert len((await handler.handle(queries.Devices(nest=1))).devices) == 5
@@ -0,0 +1,101 @@
+import decimal
+
+import pydantic
+import pytest
+
+from domain import exceptions, models, patches
+from infrastructire import codecs, indexes, storages
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands, events
+from tests.mock.redis_client import InMemoryPipeline, InMemoryRedis
+from tests.mock.storages import InMemoryHistoryStorage, InMemoryStorage
+from tests.mock.values import tech_nest_values
+
+
+def test_flatten_roundtrip():
+    values = tech_nest_values()
+
+    fields = patches.flatten(values)
+
+    assert fields["input_power.inputs[1].voltage"] == "220"
+    assert fields["consumption.power"] == "10"
+    assert patches.unflatten(fields, models.TechNestIndicatorsValues) == values
+
+
+def test_apply_returns_only_changed_fields():
+    values = tech_nest_values()
+
+    updated, changes = patches.apply(values, {"input_power.inputs[1].voltage": "231", "consumption.power": 10})
+
+    assert updated.input_power.inputs[1].voltage.value == decimal.Decimal("231")
+    assert set(changes) == {"input_power.inputs[1].voltage", "updated_at"}
+
+
+def test_apply_rejects_unknown_fields_and_invalid_values():
+    with pytest.raises(exceptions.NotFound):
+        patches.apply(tech_nest_values(), {"input_power.inputs[5].voltage": "231"})
+    with pytest.raises(pydantic.ValidationError):
+        patches.apply(tech_nest_values(), {"consumption.power": "-1"})
+    with pytest.raises(pydantic.ValidationError):
+        commands.PatchTechNestIndicators(nest=1, changes={"consumption.power.value": "1"})
+
+
+async def test_patch_emits_delta_event():
+    storage = InMemoryStorage()
+    storage.values = {1: tech_nest_values()}
+    handler = command_handlers.PatchTechNestIndicatorsHandler(
+        storage=storage,
+        history_storage=InMemoryHistoryStorage(),
+        topology_index=indexes.DisabledTopologyIndex(),
+    )
+
+    await handler.handle(commands.PatchTechNestIndicators(nest=1, changes={"consumption.water.instantaneous": "2.5"}))
+
+    assert storage.values[1].consumption.water.instantaneous.value == decimal.Decimal("2.5")
+    [event] = handler.events
+    assert isinstance(event, events.TechNestIndicatorsPatched)
+    assert set(event.payload.changes) == {"consumption.water.instantaneous", "updated_at"}
+
+
+class RacingPipeline(InMemoryPipeline):
+    def __init__(self, client: InMemoryRedis, concurrent: list):
+        super().__init__(client)
+        self.concurrent = concurrent
+
+    async def get(self, key):
+        value = await super().get(key)
+        # Между чтением и записью патча значение перезаписывает конкурирующий запрос
+        if self.concurrent:
+            await self.concurrent.pop()
+        return value
+
+
+async def test_concurrent_write_is_not_lost_by_patch():
+    client = InMemoryRedis()
+    storage = storages.RedisTechNestIndicatorValuesStorage(client_factory=lambda: client, codec=codecs.JSONCodec())
+    await storage.set_value(1, tech_nest_values())
+    writes = [storage.set_value(1, tech_nest_values(power="20"))]
+    client.pipeline = lambda transaction=True: RacingPipeline(client, writes)
+
+    _, changes = await storage.patch_value(1, {"consumption.water.instantaneous": "2.5"})
+
+    # Патч применен повторно поверх конкурирующей записи
+    value = await storage.get_value(1)
+    assert (value.consumption.power.value, value.consumption.water.instantaneous.value) == (20, decimal.Decimal("2.5"))
+    assert set(changes) == {"consumption.water.instantaneous", "updated_at"}
+
+
+async def test_hash_layout_converts_document_values_on_first_access():
+    client = InMemoryRedis()
+    document = storages.RedisTechNestIndicatorValuesStorage(client_factory=lambda: client, codec=codecs.MsgpackCodec())
+    values = tech_nest_values()
+    await document.set_values({1: values, 2: values})
+    storage = storages.RedisHashTechNestIndicatorValuesStorage(client_factory=lambda: client, codec=codecs.JSONCodec())
+
+    assert await storage.get_values(1, 3) == [values, None]
+    _, changes = await storage.patch_value(2, {"consumption.power": "12"})
+
+    # Документы перенесены в hash и удалены, патч применен к перенесенному значению
+    assert sorted(client.values) == ["nest:fields@1", "nest:fields@2"]
+    assert (await storage.get_value(2)).consumption.power.value == decimal.Decimal("12")
+    assert set(changes) == {"consumption.power", "updated_at"}
@@ -0,0 +1,73 @@
+import decimal
+
+from domain import models
+from infrastructire import projections
+from service_layer.handlers import queries as query_handlers
+from service_layer.models import queries
+from tests.mock.redis_client import InMemoryRedis
+from tests.mock.uow import FakeUoW
+
+
+class NoUoW:
+    def transaction(self, read_only=False):
+        raise AssertionError("Projection hit must not touch the database")
+
+
+class NestsRepository:
+    def __init__(self, nests: list[models.TechNest]):
+        self.nests = nests
+
+    async def get_holder(self, holder, with_nests=False):
+        return models.Holder(id=holder, name="Водоканал", inn="7812003110")
+
+    async def get_nests_by_holder(self, holder, after=None, limit=None):
+        return self.nests
+
+
+def projection(client: InMemoryRedis) -> projections.RedisHolderNestsProjection:
+    return projections.RedisHolderNestsProjection(client_factory=lambda: client)
+
+
+def nest(nest_id: int, devices: int = 0) -> models.TechNest:
+    location = models.TechNestLocation(latitude=decimal.Decimal("59.9"), longitude=decimal.Decimal("30.3"), address="a")
+    return models.TechNest(
+        id=nest_id,
+        name=f"nest {nest_id}",
+        holder_id=1,
+        location=location,
+        devices=[models.Device(id=device_id, name="pump", model=None, nest_id=nest_id) for device_id in range(devices)],
+    )
+
+
+async def test_build_keeps_entries_written_by_events():
+    client = InMemoryRedis()
+    # Событие о новом устройстве обработано раньше, чем достроилась модель по отстающим данным
+    await projection(client).put(nest(2, devices=1))
+    assert await projection(client).get(1) is None
+
+    await projection(client).build(1, [nest(2), nest(1)])
+
+    nests = await projection(client).get(1)
+    assert [(item.id, len(item.devices)) for item in nests] == [(1, 0), (2, 1)]
+
+
+async def test_nests_are_served_from_projection():
+    client = InMemoryRedis()
+    await projection(client).build(1, [nest(1, devices=2)])
+    handler = query_handlers.GetTechNestsHandler(uow=NoUoW(), projection=projection(client))
+
+    response = await handler.handle(queries.TechNests(holder=1))
+
+    assert [len(item.devices) for item in response.tech_nests] == [2]
+
+
+async def test_projection_is_built_from_primary():
+    client, uow = InMemoryRedis(), FakeUoW(NestsRepository([nest(1)]))
+    handler = query_handlers.GetTechNestsHandler(uow=uow, projection=projection(client))
+
+    await handler.handle(queries.TechNests(holder=1))
+    await handler.handle(queries.TechNests(holder=1, limit=10))
+
+    # Модель строится по основной БД, страницы читаются с реплик
+    assert uow.read_only == [False, True]
+    assert [item.id for item in await projection(client).get(1)] == [1]
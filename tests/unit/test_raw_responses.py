@@ -0,0 +1,76 @@
+import decimal
+
+import orjson
+
+from domain import models
+from infrastructire import codecs
+from presentation.models import raw
+from presentation.models import responses as pres_responses
+from service_layer.models import responses
+from tests.mock.values import device_values
+
+
+def test_raw_devices_indicators_match_model_serialization():
+    values = {1: device_values(), 2: device_values()}
+    stored = {device: codecs.MsgpackCodec().encode(value) for device, value in values.items()}
+    raw_result = responses.RawDeviceIndicators(
+        nest=7,
+        devices={device: codecs.as_json(value, models.DeviceIndicatorsValues) for device, value in stored.items()},
+    )
+    expected = pres_responses.ResponseMulti[models.DeviceIndicators](
+        result=[models.DeviceIndicators(nest=7, device=device, values=value) for device, value in values.items()]
+    )
+
+    response = raw.devices_indicators(raw_result)
+
+    assert orjson.loads(response.body) == expected.model_dump(mode="json")
+
+
+def test_raw_passthrough_keeps_stored_json_bytes():
+    stored = codecs.JSONCodec().encode(device_values())
+
+    assert codecs.as_json(stored, models.DeviceIndicatorsValues) is stored
+
+
+async def test_fleet_snapshot_matches_model_and_marks_missing_values():
+    values = device_values()
+    location = models.TechNestLocation(latitude=decimal.Decimal("1"), longitude=decimal.Decimal("2"), address="a")
+    nests = [
+        models.TechNest(
+            id=1,
+            name='Узел "1"',
+            holder_id=3,
+            location=location,
+            devices=[models.Device(id=5, name="Насос 1", nest_id=1), models.Device(id=6, name="Насос 2", nest_id=1)],
+        ),
+        models.TechNest(id=2, name="Узел 2", holder_id=3, location=location),
+    ]
+    raw_result = responses.RawFleetSnapshot(
+        holder=3,
+        nests=nests,
+        nest_values=[None, None],
+        device_values={5: None, 6: codecs.JSONCodec().encode(values)},
+    )
+    expected = pres_responses.Response[responses.FleetSnapshot](
+        result=responses.FleetSnapshot(
+            holder=3,
+            nests=[
+                responses.TechNestSnapshot(
+                    nest=1,
+                    name='Узел "1"',
+                    missing=True,
+                    values=None,
+                    devices=[
+                        responses.DeviceSnapshot(device=5, name="Насос 1", missing=True, values=None),
+                        responses.DeviceSnapshot(device=6, name="Насос 2", missing=False, values=values),
+                    ],
+                ),
+                responses.TechNestSnapshot(nest=2, name="Узел 2", missing=True, values=None),
+            ],
+        )
+    )
+
+    response = raw.fleet_snapshot(raw_result)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+
+    assert orjson.loads(body) == expected.model_dump(mode="json")
@@ -0,0 +1,40 @@
+from infrastructire import factories, uow
+
+
+def test_replicas_rotate_and_skip_unavailable():
+    replicas = factories.ReplicaSet([object(), object(), object()], retry_after=60, stickiness=0)
+
+    assert replicas.candidates() == [0, 1, 2]
+    assert replicas.candidates() == [1, 2, 0]
+    replicas.mark_unavailable(2)
+    assert replicas.candidates() == [0, 1]
+
+
+def test_reads_stick_to_primary_after_write():
+    replicas = factories.ReplicaSet([object()], retry_after=60, stickiness=60)
+
+    assert replicas.candidates() == [0]
+    replicas.mark_written()
+    assert replicas.candidates() == []
+
+
+class UnavailableReplicas:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return None
+
+
+async def test_read_only_transaction_falls_back_to_primary():
+    primary, replicas = object(), UnavailableReplicas()
+    unit = uow.SQLAlchemyUoW(
+        repository_factory=lambda session: session,
+        session_factory=lambda: primary,
+        replica_session_factory=replicas,
+    )
+
+    assert await unit._open(read_only=True) is primary
+    assert await unit._open(read_only=False) is primary
+    assert replicas.calls == 1
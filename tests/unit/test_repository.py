@@ -0,0 +1,127 @@
+import decimal
+
+import pytest
+import sqlalchemy
+from sqlalchemy import exc
+
+from domain import exceptions, models
+from infrastructire import orm, repository
+
+
+class FakeResult:
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.lastrowid = 1
+
+    def scalar(self):
+        return self.rows[0] if self.rows else None
+
+    def unique(self):
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeRow:
+    def __init__(self, **columns):
+        self._mapping = columns
+        self.id = columns["id"]
+
+
+class FakeSession:
+    def __init__(self, rows: dict[type | sqlalchemy.Table, list]):
+        self.rows = rows
+        # Сущности (или таблицы) выполненных выборок, None - прочие запросы
+        self.queries: list[type | sqlalchemy.Table | None] = []
+        self.added = []
+        self.flush_error: Exception | None = None
+
+    def add(self, item):
+        self.added.append(item)
+
+    async def flush(self):
+        if self.flush_error is not None:
+            raise self.flush_error
+        for number, item in enumerate(self.added, start=100):
+            item.id = number
+
+    async def execute(self, query, params=None):
+        entity = None
+        if isinstance(query, sqlalchemy.Select):
+            description = query.column_descriptions[0]
+            entity = description.get("entity") or description["expr"].table
+        self.queries.append(entity)
+        return FakeResult(self.rows.get(entity, []))
+
+
+def location() -> models.TechNestLocation:
+    return models.TechNestLocation(latitude=decimal.Decimal("59.9"), longitude=decimal.Decimal("30.3"), address="a")
+
+
+def nest_row() -> orm.TechNest:
+    location_row = orm.Locations(id=1, latitude=decimal.Decimal("59.9"), longitude=decimal.Decimal("30.3"), address="a")
+    return orm.TechNest(id=1, name="Узел", holder_id=1, location=location_row, devices=[])
+
+
+async def test_repeated_reads_are_served_from_identity_map():
+    session = FakeSession(
+        {orm.Company: [orm.Company(id=1, name="Водоканал", inn="7812003110")], orm.TechNest: [nest_row()]}
+    )
+    repo = repository.SQLAlchemyRepository(session)
+
+    assert await repo.get_holder(1) == await repo.get_holder(1)
+    nest = await repo.get_nest(1, with_devices=True)
+    assert await repo.get_nest(1) is nest
+    assert await repo.get_nests([1]) == [nest]
+    assert session.queries == [orm.Company, orm.TechNest]
+
+
+async def test_writes_invalidate_identity_map():
+    session = FakeSession({orm.TechNest: [nest_row()], orm.Devices: [orm.Devices(id=5, name="pump", nest_id=1)]})
+    repo = repository.SQLAlchemyRepository(session)
+    await repo.get_nests_by_holder(1)
+    await repo.get_nest(1, with_devices=True)
+
+    await repo.add_device(models.Device(name="pump", model=None, nest_id=1))
+    assert [device.id for device in (await repo.get_nest(1, with_devices=True)).devices] == [5]
+    await repo.add_nest(models.TechNest(name="Узел 2", holder_id=1, location=location()))
+    await repo.get_nests_by_holder(1)
+
+    # Устройства узла и узлы владельца загружаются повторно, вставка локации - не выборка
+    assert session.queries == [orm.TechNest, orm.Devices, None, orm.TechNest]
+
+
+async def test_only_duplicate_entry_becomes_already_exists():
+    session = FakeSession({})
+    repo = repository.SQLAlchemyRepository(session)
+    holder = models.Holder(name="Водоканал", inn="7812003110")
+
+    session.flush_error = exc.IntegrityError(
+        "INSERT", {"inn": holder.inn}, Exception(1062, "Duplicate entry '7812003110' for key 'inn_kpp_unique_index'")
+    )
+    with pytest.raises(exceptions.AlreadyExists):
+        await repo.add_holder(holder)
+
+    session.flush_error = exc.IntegrityError(
+        "INSERT", {"inn": holder.inn}, Exception(1452, "Cannot add or update a child row")
+    )
+    with pytest.raises(exc.IntegrityError):
+        await repo.add_holder(holder)
+
+
+async def test_merge_matches_names_as_database_collation():
+    table = orm.Devices.__table__
+    session = FakeSession({table: [FakeRow(id=5, nest_id=1, name="Pump")]})
+    repo = repository.SQLAlchemyRepository(session)
+
+    ids = await repo.merge_devices([models.Device(name=name, model=None, nest_id=1) for name in ("pump", "Pump ")])
+
+    # Существующее устройство найдено без вставки
+    assert (ids, session.queries) == ([5, 5], [table])
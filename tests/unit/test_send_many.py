@@ -0,0 +1,63 @@
+import decimal
+
+from domain import deadband, exceptions, models
+from infrastructire import indexes
+from service_layer import cqrs
+from service_layer.cqrs import requests
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands, events
+from tests.mock.container import FakeContainer
+from tests.mock.storages import InMemoryHistoryStorage, InMemoryLastSeenIndex, InMemoryStorage
+from tests.mock.values import device_values
+
+
+class Ping(cqrs.Request):
+    fail: bool = False
+
+
+class PingHandler:
+    @property
+    def events(self):
+        return []
+
+    async def handle(self, request: Ping) -> None:
+        if request.fail:
+            raise exceptions.NotFound("Ping failed")
+
+
+async def test_send_many_handles_groups_and_isolates_errors():
+    device_storage, history_storage = InMemoryStorage(), InMemoryHistoryStorage()
+    topology_index = indexes.InProcessTopologyIndex(negative_ttl=30)
+    topology_index.add_devices([(1, 1), (2, 1)])
+    handler = command_handlers.UpdatedDeviceIndicatorsHandler(
+        uow=None,
+        storage=device_storage,
+        history_storage=history_storage,
+        deadband=deadband.IndicatorsDeadband(enabled=False),
+        last_seen_index=InMemoryLastSeenIndex(),
+        topology_index=topology_index,
+    )
+    container = FakeContainer(handler)
+    request_map = requests.RequestMap()
+    request_map.bind(commands.UpdateDeviceIndicators, command_handlers.UpdatedDeviceIndicatorsHandler)
+    request_map.bind(Ping, PingHandler)
+    mediator = cqrs.Mediator(request_map=request_map, container=container)
+    first = device_values()
+    second = first.model_copy(update={"ammeter": models.AmmeterValue(value=decimal.Decimal("2"))})
+
+    results = await mediator.send_many(
+        [
+            commands.UpdateDeviceIndicators(nest=1, device=1, values=first),
+            Ping(fail=True),
+            commands.UpdateDeviceIndicators(nest=2, device=2, values=first),
+            commands.UpdateDeviceIndicators(nest=1, device=1, values=second),
+            Ping(),
+        ]
+    )
+
+    assert [type(result).__name__ for result in results] == ["NoneType", "NotFound", "NotFound", "NoneType", "NoneType"]
+    assert container.resolved.count(command_handlers.UpdatedDeviceIndicatorsHandler) == 1
+    # Обновления одного устройства применены в порядке запросов
+    assert device_storage.values[1] == second
+    assert history_storage.values[1] == [first, second]
+    assert [type(event) for event in handler.events] == [events.DeviceIndicatorsUpdated] * 2
@@ -0,0 +1,52 @@
+import asyncio
+
+from service_layer.cqrs.middlewares import single_flight
+from service_layer.models import commands, queries
+
+
+class CountingHandler:
+    def __init__(self):
+        self.calls = 0
+
+    async def handle(self, request):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+
+async def test_identical_concurrent_queries_are_handled_once():
+    middleware = single_flight.SingleFlightMiddleware(
+        request_types=(queries.Query,), exclude=(queries.TechNestsStream,)
+    )
+    coalesced = single_flight.coalesced.value
+    handler = CountingHandler()
+
+    first, second, other, stream = await asyncio.gather(
+        middleware(queries.TechNestIndicators(nest=1), handler.handle),
+        middleware(queries.TechNestIndicators(nest=1), handler.handle),
+        middleware(queries.TechNestIndicators(nest=2), handler.handle),
+        middleware(queries.TechNestsStream(holder=1), handler.handle),
+    )
+
+    assert first is second and first is not other
+    assert handler.calls == 3
+    assert single_flight.coalesced.value - coalesced == 1
+    # Завершенный запрос выполняется заново
+    await middleware(queries.TechNestIndicators(nest=1), handler.handle)
+    assert handler.calls == 4
+
+
+async def test_cancelled_caller_does_not_cancel_others_and_commands_are_not_coalesced():
+    middleware = single_flight.SingleFlightMiddleware(request_types=(queries.Query,))
+    handler = CountingHandler()
+
+    leader = asyncio.create_task(middleware(queries.Holder(holder=1), handler.handle))
+    follower = asyncio.create_task(middleware(queries.Holder(holder=1), handler.handle))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower is not None
+    await asyncio.gather(
+        *(middleware(commands.SweepOfflineDevices(offline_after=1, batch_size=1), handler.handle) for _ in range(2))
+    )
+    assert handler.calls == 3
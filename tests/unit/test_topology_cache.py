@@ -0,0 +1,100 @@
+import decimal
+
+from domain import models
+from infrastructire import repository, topology
+from tests.mock.redis_client import InMemoryRedis
+
+
+class CountingRepository(repository.Repository):
+    def __init__(self):
+        self.nests: dict[int, models.TechNest] = {}
+        self.calls = 0
+
+    async def add_holder(self, item):
+        pass
+
+    async def add_nest(self, item):
+        pass
+
+    async def merge_holders(self, items):
+        pass
+
+    async def merge_nests(self, items):
+        pass
+
+    async def merge_devices(self, items):
+        pass
+
+    async def add_device(self, item):
+        self.nests[item.nest_id].devices.append(
+            item.model_copy(update={"id": len(self.nests[item.nest_id].devices) + 1})
+        )
+        return 1
+
+    async def get_holder(self, holder, with_nests=False):
+        pass
+
+    async def get_nests_by_holder(self, holder, after=None, limit=None):
+        pass
+
+    def stream_nests_by_holder(self, holder, after=None, limit=None):
+        pass
+
+    async def get_nests_by_location(self, location):
+        pass
+
+    async def get_nests_in_area(self, area, limit):
+        pass
+
+    async def get_nests_near(self, point, radius, limit):
+        pass
+
+    async def get_nests(self, nest_ids):
+        self.calls += 1
+        return [self.nests[nest_id].model_copy(deep=True) for nest_id in nest_ids if nest_id in self.nests]
+
+    async def get_nest(self, nest_id, with_devices=False):
+        [nest] = await self.get_nests([nest_id]) or [None]
+        return nest
+
+    async def get_devices(self, nest, after=None, limit=None):
+        pass
+
+    def stream_devices(self, nest, after=None, limit=None):
+        pass
+
+
+def cached_repository(client: InMemoryRedis, inner: CountingRepository) -> topology.CachedRepository:
+    return topology.CachedRepository(inner, client, ttl=60, negative_ttl=5)
+
+
+def nest(nest_id: int) -> models.TechNest:
+    location = models.TechNestLocation(latitude=decimal.Decimal("59.9"), longitude=decimal.Decimal("30.3"), address="a")
+    return models.TechNest(id=nest_id, name="nest", holder_id=1, location=location)
+
+
+async def test_unknown_nests_are_cached():
+    client, inner = InMemoryRedis(), CountingRepository()
+    inner.nests = {1: nest(1)}
+
+    assert [item.id for item in await cached_repository(client, inner).get_nests([1, 2])] == [1]
+    assert await cached_repository(client, inner).get_nest(2) is None
+    assert (await cached_repository(client, inner).get_nest(1)).location.latitude == decimal.Decimal("59.9")
+    assert inner.calls == 1
+
+
+async def test_commit_invalidates_changed_nest():
+    client, inner = InMemoryRedis(), CountingRepository()
+    inner.nests = {1: nest(1)}
+    stale = cached_repository(client, inner)
+    # Конкурирующее чтение загрузило узел до фиксации добавления устройства
+    [cached] = await stale._read(stale._nest_keys(1))
+    loaded = await inner.get_nest(1)
+
+    writer = cached_repository(client, inner)
+    await writer.add_device(models.Device(name="pump", model=None, nest_id=1))
+    await writer.on_commit()
+    await stale._write((stale.NEST_KEY.format(1), cached.version, topology._dump(loaded)))
+
+    assert len(await cached_repository(client, inner).get_devices(1)) == 1
+    assert "topology:v1:version:holder@1" in client.values
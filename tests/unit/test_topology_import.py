@@ -0,0 +1,124 @@
+import pytest
+
+from domain import exceptions, models
+from infrastructire import imports, projections
+from service_layer.handlers import commands as command_handlers
+from service_layer.models import commands
+from tests.mock.uow import FakeUoW
+
+CSV = """holder_name,holder_inn,holder_kpp,nest_name,latitude,longitude,address,device_name,device_model
+Водоканал,7812003110,783801001,Насосная 1,59.9,30.3,Адрес 1,Насос 1,A
+Водоканал,7812003110,783801001,Насосная 1,59.9,30.3,Адрес 1,Насос 2,
+Водоканал,123,,,,,,,
+Водоканал,7812003110,783801001,,,,,Насос 3,
+"""
+
+
+class MergingRepository:
+    def __init__(self, conflicting: tuple[str, ...] = (), failing: tuple[str, ...] = ()):
+        self.merged: dict[str, list] = {}
+        # Названия устройств, уже существующих в БД в другом написании
+        self.conflicting = conflicting
+        # Названия устройств, на записи которых теряется соединение с БД
+        self.failing = failing
+
+    async def _merge(self, name: str, items: list) -> list[int]:
+        self.merged.setdefault(name, []).extend(items)
+        return list(range(1, len(items) + 1))
+
+    async def merge_holders(self, items):
+        return await self._merge("holders", items)
+
+    async def merge_nests(self, items):
+        return await self._merge("nests", items)
+
+    async def merge_devices(self, items):
+        if any(item.name in self.conflicting for item in items):
+            raise exceptions.AlreadyExists(message="Entity already exists")
+        if any(item.name in self.failing for item in items):
+            raise ConnectionError("Lost connection to MySQL server")
+        return await self._merge("devices", items)
+
+
+class DroppingProjection(projections.DisabledHolderNestsProjection):
+    def __init__(self):
+        self.dropped: list[int] = []
+
+    async def drop(self, holders):
+        self.dropped.extend(holders)
+
+
+class InMemoryImportsStorage(imports.TopologyImportsStorage):
+    def __init__(self):
+        self.jobs: dict[str, models.TopologyImport] = {}
+        self.errors: list[models.TopologyImportRowError] = []
+
+    async def create(self, job):
+        self.jobs[job.id] = job
+
+    async def get(self, job):
+        return self.jobs.get(job)
+
+    async def set_state(self, job, state, error=None):
+        self.jobs[job].state = state
+
+    async def add_progress(self, job, rows, errors):
+        self.jobs[job].rows += rows
+        self.jobs[job].failed += len(errors)
+        self.errors.extend(errors)
+
+    async def get_errors(self, job, offset, limit):
+        return self.errors[offset:][:limit]
+
+
+async def test_import_reports_row_errors(tmp_path):
+    path = tmp_path / "topology.csv"
+    path.write_text(CSV, encoding="utf-8")
+    uow, storage = FakeUoW(MergingRepository()), InMemoryImportsStorage()
+    started = await command_handlers.StartTopologyImportHandler(storage).handle(
+        commands.StartTopologyImport(format="csv")
+    )
+
+    handler = command_handlers.ImportTopologyHandler(uow=uow, imports_storage=storage, projection=DroppingProjection())
+    await handler.handle(commands.ImportTopology(job=started.job, path=str(path), format="csv", chunk_size=2))
+
+    job = storage.jobs[started.job]
+    assert (job.state, job.rows, job.failed, uow.commits) == (models.TopologyImportState.COMPLETED, 4, 2, 1)
+    assert [error.row for error in storage.errors] == [4, 5]
+    assert [device.name for device in uow.repository.merged["devices"]] == ["Насос 1", "Насос 2"]
+    assert not path.exists()
+
+
+async def test_conflicting_row_does_not_fail_its_chunk(tmp_path):
+    path = tmp_path / "topology.csv"
+    path.write_text(CSV, encoding="utf-8")
+    uow, storage = FakeUoW(MergingRepository(conflicting=("Насос 2",))), InMemoryImportsStorage()
+    started = await command_handlers.StartTopologyImportHandler(storage).handle(
+        commands.StartTopologyImport(format="csv")
+    )
+
+    handler = command_handlers.ImportTopologyHandler(uow=uow, imports_storage=storage, projection=DroppingProjection())
+    await handler.handle(commands.ImportTopology(job=started.job, path=str(path), format="csv", chunk_size=10))
+
+    # Строки 4 и 5 не прошли проверку, порция записана по одной строке, ошибку записи получила только строка 3
+    assert [error.row for error in storage.errors] == [4, 5, 3]
+    assert storage.errors[-1].message == "Entity already exists"
+    assert ([device.name for device in uow.repository.merged["devices"]], uow.commits) == (["Насос 1"], 1)
+
+
+async def test_failed_import_drops_projections_of_written_chunks(tmp_path):
+    path = tmp_path / "topology.csv"
+    path.write_text(CSV, encoding="utf-8")
+    uow, storage = FakeUoW(MergingRepository(failing=("Насос 2",))), InMemoryImportsStorage()
+    projection = DroppingProjection()
+    started = await command_handlers.StartTopologyImportHandler(storage).handle(
+        commands.StartTopologyImport(format="csv")
+    )
+
+    handler = command_handlers.ImportTopologyHandler(uow=uow, imports_storage=storage, projection=projection)
+    with pytest.raises(ConnectionError):
+        await handler.handle(commands.ImportTopology(job=started.job, path=str(path), format="csv", chunk_size=1))
+
+    # Первая порция записана до ошибки: модель чтения ее владельца удалена без события TopologyImported
+    assert (storage.jobs[started.job].state, uow.commits) == (models.TopologyImportState.FAILED, 1)
+    assert (projection.dropped, handler.events) == ([1], [])